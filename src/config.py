@@ -11,3 +11,53 @@ DB_PORT: str = os.environ.get('DB_PORT')
 DB_USER: str = os.environ.get('DB_USER')
 DB_PASS: str = os.environ.get('DB_PASS')
 DB_NAME: str = os.environ.get('DB_NAME')
+
+# Размер пула подключений к БД каждого воркера. Пул из DB_POOL_MIN_SIZE
+# подключений открывается при запуске приложения.
+DB_POOL_MIN_SIZE: int = int(os.environ.get('DB_POOL_MIN_SIZE', 5))
+DB_POOL_MAX_SIZE: int = int(os.environ.get('DB_POOL_MAX_SIZE', 10))
+
+# Лимит внутрипроцессного кэша траекторий (в байтах) для каждого
+# воркера.
+TRAJECTORY_CACHE_SIZE: int = int(
+    os.environ.get('TRAJECTORY_CACHE_SIZE', 256 * 1024 * 1024)
+)
+
+# Лимит (в байтах) общего для всех воркеров кэша траекторий и
+# каталог его файлов (см. services.shared_cache). Значение 0
+# отключает общий кэш.
+TRAJECTORY_SHARED_CACHE_SIZE: int = int(
+    os.environ.get('TRAJECTORY_SHARED_CACHE_SIZE', 0)
+)
+TRAJECTORY_SHARED_CACHE_DIR: str = os.environ.get(
+    'TRAJECTORY_SHARED_CACHE_DIR', '/dev/shm/well_cache'
+)
+
+# Формат хранения траекторий новых скважин: 'packed' - фрагменты
+# BYTEA, 'arrays' - четыре столбца DOUBLE PRECISION[].
+TRAJECTORY_FORMAT: str = os.environ.get('TRAJECTORY_FORMAT', 'packed')
+
+# Кодек фрагментов упакованного формата для новых скважин: 'raw' -
+# числа float64 без сжатия, 'delta' - сжатые разности соседних чисел.
+# Кодек записывается в каждый фрагмент, поэтому скважины с разными
+# кодеками читаются одинаково.
+TRAJECTORY_CODEC: str = os.environ.get('TRAJECTORY_CODEC', 'raw')
+
+# Количество отрезков траектории в одном фрагменте упакованного
+# формата. Значение 0 отключает разбиение траектории на фрагменты.
+TRAJECTORY_CHUNK_SIZE: int = int(
+    os.environ.get('TRAJECTORY_CHUNK_SIZE', 256)
+)
+
+# Хранилище скважин: 'tables' - отдельная таблица на каждую скважину,
+# 'partitioned' - единая секционированная таблица well, 'local' -
+# файлы в каталоге WELL_DATA_DIR на локальном диске.
+WELL_STORAGE: str = os.environ.get('WELL_STORAGE', 'tables')
+
+# Каталог файлов траекторий и реестра скважин хранилища 'local'.
+WELL_DATA_DIR: str = os.environ.get('WELL_DATA_DIR', 'data')
+
+# Период (в секундах) и размер партии фонового удаления данных
+# скважин, помеченных удалёнными.
+REAPER_INTERVAL: float = float(os.environ.get('REAPER_INTERVAL', 5.))
+REAPER_BATCH_SIZE: int = int(os.environ.get('REAPER_BATCH_SIZE', 100))
@@ -1,8 +1,141 @@
-from typing import Any
+import asyncio
+import struct
+import time
+import zlib
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable
 
 import asyncpg as apg
+import numpy as np
 
-from config import DB_NAME, DB_HOST, DB_PASS, DB_PORT, DB_USER
+from config import (
+    DB_NAME,
+    DB_HOST,
+    DB_PASS,
+    DB_PORT,
+    DB_POOL_MAX_SIZE,
+    DB_POOL_MIN_SIZE,
+    DB_USER,
+    TRAJECTORY_CODEC
+)
+
+
+# Заголовок упакованной траектории: сигнатура, версия формата, кодек
+# и количество столбцов. Следом идут столбцы (md, x, y, z) целиком,
+# по N чисел float64 little-endian в каждом, поэтому каждый столбец
+# декодируется в непрерывное представление без копирования.
+PACKED_TRAJECTORY_HEADER: struct.Struct = struct.Struct('<4sBBH')
+PACKED_TRAJECTORY_MAGIC: bytes = b'WTRJ'
+PACKED_TRAJECTORY_VERSION: int = 1
+PACKED_TRAJECTORY_CODEC_RAW: int = 0
+# Столбцы сжаты: вместо чисел хранятся разности их двоичных
+# представлений (как uint64) с предыдущим числом столбца, байты
+# разностей сгруппированы по разрядам, а результат сжат zlib.
+PACKED_TRAJECTORY_CODEC_DELTA: int = 1
+
+# Кодеки упакованного формата по значениям переменной TRAJECTORY_CODEC.
+PACKED_TRAJECTORY_CODECS: dict[str, int] = {
+    'raw': PACKED_TRAJECTORY_CODEC_RAW,
+    'delta': PACKED_TRAJECTORY_CODEC_DELTA
+}
+
+# Уровень сжатия zlib кодека delta. Более высокие уровни почти не
+# уменьшают размер траекторий, но заметно замедляют создание скважин.
+DELTA_COMPRESSION_LEVEL: int = 1
+
+
+def _compress_delta(
+        values: np.ndarray[Any, np.dtype[np.float64]]) -> bytes:
+    # Разности вычисляются в целых числах с переполнением, поэтому
+    # декодирование восстанавливает числа побитово точно. У соседних
+    # узлов гладкой траектории старшие байты разностей нулевые, и
+    # после группировки по разрядам они хорошо сжимаются.
+    bits: np.ndarray = values.view('<u8')
+    deltas: np.ndarray = np.empty_like(bits)
+    deltas[:, :1] = bits[:, :1]
+    np.subtract(bits[:, 1:], bits[:, :-1], out=deltas[:, 1:])
+
+    shuffled: np.ndarray = np.ascontiguousarray(
+        deltas.view(np.uint8).reshape(*deltas.shape, 8).transpose(0, 2, 1)
+    )
+
+    return zlib.compress(shuffled, DELTA_COMPRESSION_LEVEL)
+
+
+def _decompress_delta(
+        data: memoryview,
+        columns: int) -> np.ndarray[Any, np.dtype[np.float64]]:
+    shuffled: np.ndarray = np.frombuffer(
+        zlib.decompress(data), dtype=np.uint8
+    ).reshape(columns, 8, -1)
+    # Копия нужна и для одного узла: тогда транспонирование уже
+    # непрерывно, и ascontiguousarray вернул бы буфер zlib только для
+    # чтения, в который cumsum не может писать.
+    bits: np.ndarray = np.array(
+        shuffled.transpose(0, 2, 1),
+        order='C'
+    ).view('<u8').reshape(columns, -1)
+    np.cumsum(bits, axis=1, out=bits)
+
+    return bits.view('<f8')
+
+
+def encode_bytea(value: Any, codec: str = TRAJECTORY_CODEC) -> bytes:
+    """
+    Кодирует значение типа BYTEA.
+
+    Двумерный массив NumPy формы (столбцы, N) упаковывается в формат
+    траектории с кодеком codec ('raw' или 'delta'), всё остальное
+    передаётся как есть.
+
+    """
+
+    if not isinstance(value, np.ndarray):
+        return bytes(value)
+
+    codec_id: int = PACKED_TRAJECTORY_CODECS[codec]
+    header: bytes = PACKED_TRAJECTORY_HEADER.pack(
+        PACKED_TRAJECTORY_MAGIC,
+        PACKED_TRAJECTORY_VERSION,
+        codec_id,
+        value.shape[0]
+    )
+    values: np.ndarray = np.ascontiguousarray(value, dtype='<f8')
+
+    if codec_id == PACKED_TRAJECTORY_CODEC_DELTA:
+        return header + _compress_delta(values)
+
+    return header + values.tobytes()
+
+
+def decode_bytea(data: bytes) -> np.ndarray | bytes:
+    """
+    Декодирует значение типа BYTEA.
+
+    Упакованная траектория возвращается как массив NumPy формы
+    (столбцы, N). Без сжатия (кодек raw) массив ссылается на буфер
+    data без копирования. Остальные значения возвращаются как bytes.
+
+    """
+
+    if data[:4] != PACKED_TRAJECTORY_MAGIC:
+        return data
+
+    _, _, codec, columns = PACKED_TRAJECTORY_HEADER.unpack_from(data)
+
+    if codec == PACKED_TRAJECTORY_CODEC_DELTA:
+        return _decompress_delta(
+            memoryview(data)[PACKED_TRAJECTORY_HEADER.size:], columns
+        )
+
+    if codec != PACKED_TRAJECTORY_CODEC_RAW:
+        raise ValueError(f'Unknown trajectory codec: {codec}')
+
+    return np.frombuffer(
+        data,
+        dtype='<f8',
+        offset=PACKED_TRAJECTORY_HEADER.size
+    ).reshape(columns, -1)
 
 
 class Database:
@@ -43,65 +176,206 @@ class Database:
         self._password = password
         self._database = database
         self._connection_pool = None
+        self._listeners: dict[str, Callable[[str | None], Any]] = {}
+        self._listen_task: asyncio.Task | None = None
+        self._listen_connection: apg.Connection | None = None
+        self._pool_lock: asyncio.Lock = asyncio.Lock()
+        self._acquires: int = 0
+        self._acquire_wait_total: float = 0.
+        self._acquire_wait_max: float = 0.
     
     async def get_connection_pool(self) -> apg.Pool:
+        """
+        Возвращает пул подключений, создавая его при первом вызове.
+
+        Приложение вызывает этот метод при запуске, поэтому первые
+        запросы не ждут открытия DB_POOL_MIN_SIZE подключений.
+
+        """
+
         if not self._connection_pool:
-            self._connection_pool = await apg.create_pool(
-                host=self._host,
-                port=self._port,
-                user=self._user,
-                password=self._password,
-                database=self._database,
-                min_size=1,
-                max_size=5
-            )
+            async with self._pool_lock:
+                if not self._connection_pool:
+                    self._connection_pool = await apg.create_pool(
+                        host=self._host,
+                        port=self._port,
+                        user=self._user,
+                        password=self._password,
+                        database=self._database,
+                        min_size=DB_POOL_MIN_SIZE,
+                        max_size=DB_POOL_MAX_SIZE,
+                        init=self._init_connection
+                    )
         
         return self._connection_pool
 
-    async def execute(self, query: str, *args) -> apg.Record:
+    @asynccontextmanager
+    async def _acquire(self) -> AsyncIterator[apg.Connection]:
+        """
+        Выдаёт подключение из пула, учитывая время его ожидания.
+
+        """
+
         pool: apg.Pool = await self.get_connection_pool()
+        started: float = time.perf_counter()
 
         async with pool.acquire() as conn:
+            wait: float = time.perf_counter() - started
+            self._acquires += 1
+            self._acquire_wait_total += wait
+            self._acquire_wait_max = max(self._acquire_wait_max, wait)
+
+            yield conn
+
+    def stats(self) -> dict[str, int | float]:
+        """
+        Возвращает статистику пула подключений текущего процесса.
+
+        Время ожидания подключения указано в миллисекундах.
+
+        """
+
+        pool: apg.Pool | None = self._connection_pool
+
+        return {
+            'size': pool.get_size() if pool is not None else 0,
+            'idle': pool.get_idle_size() if pool is not None else 0,
+            'min_size': DB_POOL_MIN_SIZE,
+            'max_size': DB_POOL_MAX_SIZE,
+            'acquires': self._acquires,
+            'wait_ms_total': self._acquire_wait_total * 1000.,
+            'wait_ms_max': self._acquire_wait_max * 1000.
+        }
+
+    @staticmethod
+    async def _init_connection(conn: apg.Connection) -> None:
+        await conn.set_type_codec(
+            'bytea',
+            schema='pg_catalog',
+            encoder=encode_bytea,
+            decoder=decode_bytea,
+            format='binary'
+        )
+
+    async def execute(self, query: str, *args) -> apg.Record:
+        async with self._acquire() as conn:
             async with conn.transaction():
                 result: apg.Record = await conn.execute(query, *args)
 
         return result
 
     async def executemany(self, query: str, *args) -> apg.Record:
-        pool: apg.Pool = await self.get_connection_pool()
-
-        async with pool.acquire() as conn:
+        async with self._acquire() as conn:
             async with conn.transaction():
                 result: apg.Record = await conn.executemany(query, *args)
 
         return result
 
-    async def fetch(self, query: str, *args) -> apg.Record:
-        pool: apg.Pool = await self.get_connection_pool()
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[apg.Connection]:
+        """
+        Выдаёт подключение из пула с открытой транзакцией.
 
-        async with pool.acquire() as conn:
-            async with conn.transaction():
-                result: apg.Record = await conn.fetch(query, *args)
+        Используется, когда несколько запросов (в том числе COPY)
+        должны выполниться атомарно на одном подключении.
 
-        return result
+        Например:
+            async with db_instance.transaction() as conn:
+                await conn.copy_records_to_table('my_table', records=rows)
 
-    async def fetch_row(self, query: str, *args) -> apg.Record:
-        pool: apg.Pool = await self.get_connection_pool()
+        """
 
-        async with pool.acquire() as conn:
+        async with self._acquire() as conn:
             async with conn.transaction():
-                result: apg.Record = await conn.fetchrow(query, *args)
+                yield conn
 
-        return result
+    # Методы fetch, fetch_row и fetch_val выполняют один запрос без
+    # явной транзакции (BEGIN/COMMIT), так как отдельный запрос в
+    # PostgreSQL и так атомарен. Вне транзакции asyncpg также сам
+    # повторяет запрос, если закэшированный подготовленный запрос
+    # стал недействительным после изменения структуры таблицы.
+
+    async def fetch(self, query: str, *args) -> list[apg.Record]:
+        async with self._acquire() as conn:
+            return await conn.fetch(query, *args)
+
+    async def fetch_row(self, query: str, *args) -> apg.Record | None:
+        async with self._acquire() as conn:
+            return await conn.fetchrow(query, *args)
 
     async def fetch_val(self, query: str, *args) -> Any:
-        pool: apg.Pool = await self.get_connection_pool()
+        async with self._acquire() as conn:
+            return await conn.fetchval(query, *args)
 
-        async with pool.acquire() as conn:
-            async with conn.transaction():
-                result: Any = await conn.fetchval(query, *args)
+    async def listen(self, channel: str,
+                     callback: Callable[[str | None], Any]) -> None:
+        """
+        Подписывает callback на уведомления (NOTIFY) канала channel.
 
-        return result
+        Уведомления слушаются через отдельное подключение, которое не
+        занимает место в пуле и переустанавливается при разрыве.
+        callback вызывается с payload уведомления, а также с None при
+        каждом (пере)подключении, так как часть уведомлений могла быть
+        пропущена.
+
+        """
+
+        self._listeners[channel] = callback
+
+        if self._listen_connection is not None:
+            await self._subscribe(self._listen_connection, channel, callback)
+
+        if self._listen_task is None:
+            self._listen_task = asyncio.create_task(self._listen_forever())
+
+    @staticmethod
+    async def _subscribe(conn: apg.Connection, channel: str,
+                         callback: Callable[[str | None], Any]) -> None:
+        await conn.add_listener(
+            channel,
+            lambda _conn, _pid, _channel, payload: callback(payload)
+        )
+        callback(None)
+
+    async def _listen_forever(self) -> None:
+        while True:
+            try:
+                conn: apg.Connection = await apg.connect(
+                    host=self._host,
+                    port=self._port,
+                    user=self._user,
+                    password=self._password,
+                    database=self._database
+                )
+            except (OSError, apg.PostgresError):
+                await asyncio.sleep(1.)
+                continue
+
+            terminated: asyncio.Event = asyncio.Event()
+            conn.add_termination_listener(lambda _conn: terminated.set())
+
+            try:
+                for channel, callback in list(self._listeners.items()):
+                    await self._subscribe(conn, channel, callback)
+
+                self._listen_connection = conn
+                await terminated.wait()
+            except asyncio.CancelledError:
+                await conn.close()
+                raise
+            except (OSError, apg.PostgresError):
+                conn.terminate()
+            finally:
+                self._listen_connection = None
+
+    async def close(self) -> None:
+        if self._listen_task is not None:
+            self._listen_task.cancel()
+            self._listen_task = None
+
+        if self._connection_pool is not None:
+            await self._connection_pool.close()
+            self._connection_pool = None
 
 
 db_instance: Database = Database(DB_HOST, DB_PORT, DB_USER,
@@ -0,0 +1,366 @@
+"""
+Единая точка входа API в формате JSON-RPC 2.0.
+
+Принимает как одиночные вызовы, так и пакеты (массивы вызовов).
+Вызовы пакета выполняются конкурентно, а ответы возвращаются в том же
+порядке. Вызовы без поля "id" (уведомления) выполняются, но ответа на
+них нет.
+
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable
+from uuid import UUID
+
+import numpy as np
+import orjson
+from fastapi import APIRouter, Request
+from fastapi.responses import Response
+from pydantic import BaseModel, ValidationError
+
+from schemas.well import (
+    WellSchema,
+    WellCreateSchema,
+    WellCreateManySchema,
+    WellAppendSchema,
+    WellRemoveSchema,
+    WellGetSchema,
+    WellResampleSchema,
+    WellAtSchema,
+    WellAtManySchema,
+    WellMDAtDepthSchema,
+    WellNearestSchema,
+    WellSeparationSchema,
+    WellSearchSchema,
+    WellOutputSchema
+)
+import services.well as well_services
+import services.exceptions as exc
+from services.trajectory import Well
+
+
+router: APIRouter = APIRouter(
+    prefix='/api',
+    tags=['JSON-RPC']
+)
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+# Коды ошибок JSON-RPC 2.0.
+PARSE_ERROR: int = -32700
+INVALID_REQUEST: int = -32600
+METHOD_NOT_FOUND: int = -32601
+INVALID_PARAMS: int = -32602
+INTERNAL_ERROR: int = -32603
+# Код ошибок сервиса well (исключения из services.exceptions), из
+# диапазона, отведённого спецификацией под ошибки реализации.
+SERVICE_ERROR: int = -32000
+
+# Наибольшее количество точек в ответе well.resample. Ответ JSON-RPC
+# не выдаётся по частям, как у маршрута /api/well.resample, поэтому
+# сетка, координаты и JSON находятся в памяти целиком.
+RESAMPLE_MAX_POINTS: int = 100_000
+
+
+async def _create(params: BaseModel) -> dict[str, Any]:
+    uuid: UUID = await well_services.well_create(
+        params.name,
+        params.head,
+        params.MD,
+        params.X,
+        params.Y,
+        params.Z
+    )
+
+    return {'uuid': str(uuid)}
+
+
+async def _create_many(params: BaseModel) -> dict[str, Any]:
+    results: list[UUID | Exception] = await well_services.well_create_many([
+        (well.name, well.head, well.MD, well.X, well.Y, well.Z)
+        for well in params.wells
+    ])
+
+    return {'wells': [
+        WellOutputSchema(error=str(result)).model_dump()
+        if isinstance(result, Exception)
+        else WellOutputSchema(data={'uuid': str(result)}).model_dump()
+        for result in results
+    ]}
+
+
+async def _append(params: BaseModel) -> dict[str, Any]:
+    nodes: int = await well_services.well_append(
+        params.uuid,
+        params.MD,
+        params.X,
+        params.Y,
+        params.Z
+    )
+
+    return {'nodes': nodes}
+
+
+async def _remove(params: BaseModel) -> None:
+    await well_services.well_remove(params.uuid)
+
+
+async def _get(params: BaseModel) -> dict[str, Any]:
+    if not params.return_trajectory:
+        return await well_services.well_get(params.uuid)
+
+    # Массивы траектории сериализуются orjson напрямую.
+    well: Well = await well_services.well_get_trajectory(
+        params.uuid,
+        params.max_points,
+        params.tolerance,
+        params.md_from,
+        params.md_to
+    )
+
+    return {
+        'name': well.name,
+        'head': well.head,
+        'MD': well.trajectory.md,
+        'X': well.trajectory.x,
+        'Y': well.trajectory.y,
+        'Z': well.trajectory.z
+    }
+
+
+async def _resample(params: BaseModel) -> dict[str, Any]:
+    # В ответе JSON-RPC траектория не передаётся по частям, поэтому
+    # сетка вычисляется целиком, а её размер ограничен сильнее.
+    well, grid = await well_services.well_resample(
+        params.uuid,
+        params.step,
+        params.count,
+        params.md_from,
+        params.md_to,
+        RESAMPLE_MAX_POINTS
+    )
+    md: np.ndarray = grid.md()
+    x, y, z = np.ascontiguousarray(well.trajectory.at(md).T)
+
+    return {
+        'name': well.name,
+        'head': well.head,
+        'MD': md,
+        'X': x,
+        'Y': y,
+        'Z': z
+    }
+
+
+async def _at(params: BaseModel) -> dict[str, Any]:
+    x, y, z = await well_services.well_at(params.uuid, params.MD)
+
+    return {'X': x, 'Y': y, 'Z': z}
+
+
+async def _at_many(params: BaseModel) -> dict[str, Any]:
+    x, y, z = await well_services.well_at_many(params.uuid, params.MD)
+
+    return {'X': x, 'Y': y, 'Z': z}
+
+
+async def _md_at_depth(params: BaseModel) -> dict[str, Any]:
+    is_many: bool = isinstance(params.Z, list)
+    md: list[np.ndarray] = await well_services.well_md_at_depth(
+        params.uuid,
+        params.Z if is_many else [params.Z]
+    )
+
+    return {'MD': md if is_many else md[0]}
+
+
+async def _nearest(params: BaseModel) -> dict[str, Any]:
+    md, x, y, z, distance = await well_services.well_nearest(
+        params.uuid, params.points
+    )
+
+    return {'MD': md, 'X': x, 'Y': y, 'Z': z, 'distance': distance}
+
+
+async def _separation(params: BaseModel) -> dict[str, Any]:
+    return {'wells': await well_services.well_separation(
+        params.uuid,
+        params.offsets,
+        params.radius,
+        params.limit
+    )}
+
+
+async def _search(params: BaseModel) -> dict[str, Any]:
+    return {'wells': await well_services.well_search(
+        params.by == 'trajectory',
+        params.box,
+        params.point,
+        params.radius,
+        params.depth,
+        params.limit
+    )}
+
+
+# Методы API: схема запроса и обработчик, который получает
+# провалидированные параметры и возвращает поле result ответа.
+METHODS: dict[str, tuple[type[WellSchema],
+                         Callable[[Any], Awaitable[Any]]]] = {
+    'well.create': (WellCreateSchema, _create),
+    'well.create_many': (WellCreateManySchema, _create_many),
+    'well.append': (WellAppendSchema, _append),
+    'well.remove': (WellRemoveSchema, _remove),
+    'well.get': (WellGetSchema, _get),
+    'well.resample': (WellResampleSchema, _resample),
+    'well.at': (WellAtSchema, _at),
+    'well.at_many': (WellAtManySchema, _at_many),
+    'well.md_at_depth': (WellMDAtDepthSchema, _md_at_depth),
+    'well.nearest': (WellNearestSchema, _nearest),
+    'well.separation': (WellSeparationSchema, _separation),
+    'well.search': (WellSearchSchema, _search)
+}
+
+
+def _error(request_id: Any, code: int, message: str,
+           data: Any = None) -> dict[str, Any]:
+    error: dict[str, Any] = {'code': code, 'message': message}
+
+    if data is not None:
+        error['data'] = data
+
+    return {'jsonrpc': '2.0', 'error': error, 'id': request_id}
+
+
+async def _call(request: Any) -> dict[str, Any] | None:
+    """
+    Выполняет один вызов JSON-RPC и возвращает ответ на него или None,
+    если вызов является уведомлением.
+
+    """
+
+    if not (isinstance(request, dict)
+            and request.get('jsonrpc') == '2.0'
+            and isinstance(request.get('method'), str)):
+        return _error(None, INVALID_REQUEST, 'Invalid Request')
+
+    request_id: Any = request.get('id')
+    method: tuple[type[WellSchema], Callable] | None = METHODS.get(
+        request['method']
+    )
+
+    if method is None:
+        response: dict[str, Any] = _error(
+            request_id, METHOD_NOT_FOUND, 'Method not found'
+        )
+    else:
+        schema, handler = method
+
+        try:
+            well: WellSchema = schema.validate_request({
+                'method': request['method'],
+                'params': request.get('params')
+            })
+        except ValidationError as e:
+            error: dict[str, Any] = e.errors()[0]
+            response: dict[str, Any] = _error(
+                request_id, INVALID_PARAMS, error['msg'],
+                {'arg': error['loc']}
+            )
+        else:
+            try:
+                result: Any = await handler(well.params)
+            except exc.WellException as e:
+                response: dict[str, Any] = _error(
+                    request_id, SERVICE_ERROR, str(e)
+                )
+            except Exception:
+                # Ошибка одного вызова не должна прерывать остальные
+                # вызовы пакета, а клиент получает только её код,
+                # поэтому подробности записываются в журнал.
+                logger.exception('JSON-RPC method %s failed',
+                                 request['method'])
+                response: dict[str, Any] = _error(
+                    request_id, INTERNAL_ERROR, 'Internal error'
+                )
+            else:
+                response: dict[str, Any] = {
+                    'jsonrpc': '2.0', 'result': result, 'id': request_id
+                }
+
+    return response if 'id' in request else None
+
+
+def _default(value: Any) -> Any:
+    # Координаты устья приходят из БД как asyncpg.Point (наследник
+    # tuple), который orjson не сериализует.
+    if isinstance(value, tuple):
+        return list(value)
+
+    raise TypeError
+
+
+def _respond(content: Any) -> Response:
+    return Response(
+        orjson.dumps(content, default=_default,
+                     option=orjson.OPT_SERIALIZE_NUMPY),
+        media_type='application/json'
+    )
+
+
+@router.post(
+    '',
+    openapi_extra={
+        'requestBody': {
+            'required': True,
+            'content': {'application/json': {'example': [
+                {
+                    'jsonrpc': '2.0',
+                    'method': 'well.get',
+                    'params': {'uuid': '00000000-0000-4000-8000-000000000000'},
+                    'id': 1
+                },
+                {
+                    'jsonrpc': '2.0',
+                    'method': 'well.at',
+                    'params': {
+                        'uuid': '00000000-0000-4000-8000-000000000000',
+                        'MD': 100.0
+                    },
+                    'id': 2
+                }
+            ]}}
+        }
+    }
+)
+async def rpc(request: Request) -> Response:
+    """
+    Выполняет вызов или пакет вызовов JSON-RPC 2.0.
+
+    Поле "method" вызова - имя метода API (например, "well.at"), а
+    "params" - параметры в том же формате, что и у соответствующего
+    метода. Ошибки сервиса возвращаются с кодом -32000.
+
+    """
+
+    try:
+        body: Any = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        return _respond(_error(None, PARSE_ERROR, 'Parse error'))
+
+    if not isinstance(body, list):
+        response: dict[str, Any] | None = await _call(body)
+
+        return Response(status_code=204) if response is None \
+            else _respond(response)
+
+    if not body:
+        return _respond(_error(None, INVALID_REQUEST, 'Invalid Request'))
+
+    responses: list[dict[str, Any]] = [
+        response for response in await asyncio.gather(*map(_call, body))
+        if response is not None
+    ]
+
+    return _respond(responses) if responses else Response(status_code=204)
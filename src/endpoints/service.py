@@ -0,0 +1,37 @@
+import asyncio
+import os
+
+from fastapi import APIRouter
+
+from database import db_instance
+from schemas.well import WellOutputSchema
+from services.cache import trajectory_cache
+from services.shared_cache import shared_trajectory_cache
+from services.well import coalescing_stats
+
+
+router: APIRouter = APIRouter(
+    prefix='/api',
+    tags=['Service']
+)
+
+
+@router.get('/stats')
+async def stats() -> WellOutputSchema:
+    """
+    Получение статистики работы текущего воркера приложения.
+
+    Так как приложение запускается в нескольких процессах, статистика
+    относится только к тому воркеру, который обработал запрос.
+
+    """
+
+    return WellOutputSchema(data={
+        'pid': os.getpid(),
+        'trajectory_cache': trajectory_cache.stats(),
+        'shared_trajectory_cache': await asyncio.to_thread(
+            shared_trajectory_cache.stats
+        ),
+        'db_pool': db_instance.stats(),
+        'coalescing': coalescing_stats()
+    })
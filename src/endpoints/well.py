@@ -1,17 +1,34 @@
 from typing import Any
 from uuid import UUID
 
-from fastapi import APIRouter
+import numpy as np
+import orjson
+from fastapi import APIRouter, File, Form, Request, UploadFile
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import Response, StreamingResponse
+from pydantic import ValidationError
 
 from schemas.well import (
+    WellSchema,
     WellCreateSchema,
+    WellCreateManySchema,
+    WellCreateBinarySchema,
+    WellAppendSchema,
     WellRemoveSchema,
     WellGetSchema,
+    WellResampleSchema,
     WellAtSchema,
+    WellAtManySchema,
+    WellMDAtDepthSchema,
+    WellNearestSchema,
+    WellSeparationSchema,
+    WellSearchSchema,
     WellOutputSchema
 )
 import services.well as well_services
 import services.exceptions as exc
+from services.serialization import stream_resampled, stream_well
+from services.trajectory import Well
 
 
 router: APIRouter = APIRouter(
@@ -20,13 +37,70 @@ router: APIRouter = APIRouter(
 )
 
 
-@router.post('/well.create')
-async def create(well: WellCreateSchema) -> WellOutputSchema:
+async def _parse_request(request: Request,
+                         schema: type[WellSchema]) -> WellSchema:
+    """
+    Разбирает тело запроса через orjson и проверяет его схемой schema
+    (см. WellSchema.validate_request). Ошибки возвращаются в том же
+    виде, что и при проверке тела средствами FastAPI.
+
+    """
+
+    try:
+        body: Any = orjson.loads(await request.body())
+    except orjson.JSONDecodeError as e:
+        raise RequestValidationError([{
+            'type': 'json_invalid',
+            'loc': ('body', e.pos),
+            'msg': 'JSON decode error',
+            'input': {},
+            'ctx': {'error': e.msg}
+        }])
+
+    try:
+        return schema.validate_request(body)
+    except ValidationError as e:
+        raise RequestValidationError([
+            error | {'loc': ('body', *error['loc'])} for error in e.errors()
+        ])
+
+
+# Пример тела запроса well.create для документации OpenAPI: тело
+# разбирается вручную (см. _parse_request), поэтому схема не выводится
+# из сигнатуры обработчика.
+CREATE_EXAMPLE: dict[str, Any] = {
+    'method': 'well.create',
+    'params': {
+        'name': 'well_name',
+        'head': [0.0, 0.0],
+        'MD': [0.0, 1.0],
+        'X': [0.0, 0.0],
+        'Y': [0.0, 0.0],
+        'Z': [0.0, 1.0]
+    }
+}
+
+
+@router.post(
+    '/well.create',
+    openapi_extra={
+        'requestBody': {
+            'required': True,
+            'content': {'application/json': {'example': CREATE_EXAMPLE}}
+        }
+    }
+)
+async def create(request: Request) -> WellOutputSchema:
     """
     Добавляет новую информацию о скважине в базу данных.
 
+    Тело запроса - WellCreateSchema. Массивы MD, X, Y и Z
+    преобразуются сразу в массивы NumPy без проверки каждого числа
+    средствами pydantic.
+
     """
 
+    well: WellCreateSchema = await _parse_request(request, WellCreateSchema)
     output: WellOutputSchema = WellOutputSchema()
 
     try:
@@ -40,7 +114,8 @@ async def create(well: WellCreateSchema) -> WellOutputSchema:
         )
     except (exc.WellAlreadyExistsException,
             exc.ArrayDifferentSizesException,
-            exc.InconsistentHeadAndFirstNodeException) as e:
+            exc.InconsistentHeadAndFirstNodeException,
+            exc.NonMonotonicMDException) as e:
         output.error = str(e)
     else:
         output.data = {'uuid': str(created_well_uuid)}
@@ -48,6 +123,124 @@ async def create(well: WellCreateSchema) -> WellOutputSchema:
     return output
 
 
+@router.post(
+    '/well.create_many',
+    openapi_extra={
+        'requestBody': {
+            'required': True,
+            'content': {'application/json': {'example': {
+                'method': 'well.create_many',
+                'params': {'wells': [CREATE_EXAMPLE['params']]}
+            }}}
+        }
+    }
+)
+async def create_many(request: Request) -> WellOutputSchema:
+    """
+    Добавляет в базу данных информацию сразу о нескольких скважинах.
+
+    Тело запроса - WellCreateManySchema. Поле "wells" ответа содержит
+    для каждой скважины (в порядке запроса) ответ в том же формате,
+    что и у well.create.
+
+    """
+
+    wells: WellCreateManySchema = await _parse_request(
+        request, WellCreateManySchema
+    )
+
+    results: list[UUID | Exception] = await well_services.well_create_many([
+        (well.name, well.head, well.MD, well.X, well.Y, well.Z)
+        for well in wells.params.wells
+    ])
+
+    return WellOutputSchema(data={'wells': [
+        WellOutputSchema(error=str(result))
+        if isinstance(result, Exception)
+        else WellOutputSchema(data={'uuid': str(result)})
+        for result in results
+    ]})
+
+
+@router.post('/well.create_binary')
+async def create_binary(
+        well: str = Form(),
+        MD: UploadFile = File(),
+        X: UploadFile = File(),
+        Y: UploadFile = File(),
+        Z: UploadFile = File()) -> WellOutputSchema:
+    """
+    Добавляет новую информацию о скважине в базу данных, принимая
+    траекторию в бинарном виде (multipart/form-data).
+
+    Поле "well" содержит JSON с именем и устьем скважины, а "MD", "X",
+    "Y" и "Z" - массивы в формате .npy или числа float64
+    little-endian без заголовка.
+
+    """
+
+    try:
+        metadata: WellCreateBinarySchema = (
+            WellCreateBinarySchema.model_validate_json(well)
+        )
+    except ValidationError as e:
+        raise RequestValidationError([
+            error | {'loc': ('body', *error['loc'])} for error in e.errors()
+        ])
+
+    output: WellOutputSchema = WellOutputSchema()
+
+    try:
+        created_well_uuid: UUID = await well_services.well_create_binary(
+            metadata.params.name,
+            metadata.params.head,
+            await MD.read(),
+            await X.read(),
+            await Y.read(),
+            await Z.read()
+        )
+    except (exc.WellAlreadyExistsException,
+            exc.ArrayDifferentSizesException,
+            exc.InconsistentHeadAndFirstNodeException,
+            exc.NonMonotonicMDException,
+            exc.InvalidArrayException) as e:
+        output.error = str(e)
+    else:
+        output.data = {'uuid': str(created_well_uuid)}
+
+    return output
+
+
+@router.post('/well.append')
+async def append(well: WellAppendSchema) -> WellOutputSchema:
+    """
+    Добавляет узлы в конец траектории скважины, например, по мере её
+    бурения. Поле "nodes" ответа содержит количество узлов траектории
+    после добавления.
+
+    """
+
+    output: WellOutputSchema = WellOutputSchema()
+
+    try:
+        nodes: int = await well_services.well_append(
+            well.params.uuid,
+            well.params.MD,
+            well.params.X,
+            well.params.Y,
+            well.params.Z
+        )
+    except (exc.WellNotFoundException,
+            exc.WellNotPackedException,
+            exc.ArrayDifferentSizesException,
+            exc.NonMonotonicMDException) as e:
+        output.error = str(e)
+    else:
+        output.data = {'nodes': nodes}
+
+    return output
+
+
 @router.post('/well.remove')
 async def remove(well: WellRemoveSchema) -> WellOutputSchema:
     """
@@ -65,24 +258,74 @@ async def remove(well: WellRemoveSchema) -> WellOutputSchema:
     return output
 
 
-@router.post('/well.get')
-async def get(well: WellGetSchema) -> WellOutputSchema:
+@router.post('/well.get', response_model=WellOutputSchema)
+async def get(well: WellGetSchema) -> WellOutputSchema | Response:
     """
     Получение информации о скважине по её идентификатору.
 
+    Ответ с траекторией сериализуется из массивов NumPy и передаётся
+    по частям (см. services.serialization).
+
     """
 
     output: WellOutputSchema = WellOutputSchema()
 
     try:
-        queried_well: dict[str, Any] = await well_services.well_get(
-            well.params.uuid,
-            well.params.return_trajectory
+        if well.params.return_trajectory:
+            queried_well: Well = await well_services.well_get_trajectory(
+                well.params.uuid,
+                well.params.max_points,
+                well.params.tolerance,
+                well.params.md_from,
+                well.params.md_to
+            )
+
+            return StreamingResponse(
+                stream_well(queried_well.name, queried_well.head,
+                            queried_well.trajectory),
+                media_type='application/json'
+            )
+
+        queried_header: dict[str, Any] = await well_services.well_get(
+            well.params.uuid
         )
     except exc.WellNotFoundException as e:
         output.error = str(e)
     else:
-        output.data = queried_well
+        output.data = queried_header
+
+    return output
+
+
+@router.post('/well.resample', response_model=WellOutputSchema)
+async def resample(well: WellResampleSchema) -> WellOutputSchema | Response:
+    """
+    Получение траектории скважины на равномерной сетке глубин в том же
+    формате, что и у well.get.
+
+    Координаты вычисляются и передаются по частям, поэтому объём
+    памяти не зависит от количества точек.
+
+    """
+
+    output: WellOutputSchema = WellOutputSchema()
+
+    try:
+        queried_well, grid = await well_services.well_resample(
+            well.params.uuid,
+            well.params.step,
+            well.params.count,
+            well.params.md_from,
+            well.params.md_to
+        )
+    except (exc.WellNotFoundException, exc.TooManyPointsException) as e:
+        output.error = str(e)
+    else:
+        return StreamingResponse(
+            stream_resampled(queried_well.name, queried_well.head,
+                             queried_well.trajectory, grid),
+            media_type='application/json'
+        )
 
     return output
 
@@ -111,3 +354,130 @@ async def at(well: WellAtSchema) -> WellOutputSchema:
         }
     
     return output
+
+
+@router.post('/well.at_many')
+async def at_many(well: WellAtManySchema) -> WellOutputSchema:
+    """
+    Получение координат скважины сразу для списка уровней глубины.
+
+    """
+
+    output: WellOutputSchema = WellOutputSchema()
+
+    try:
+        x, y, z = await well_services.well_at_many(
+            well.params.uuid,
+            well.params.MD
+        )
+    except exc.WellNotFoundException as e:
+        output.error = str(e)
+    else:
+        output.data = {
+            'X': x.tolist(),
+            'Y': y.tolist(),
+            'Z': z.tolist()
+        }
+
+    return output
+
+
+@router.post('/well.md_at_depth')
+async def md_at_depth(well: WellMDAtDepthSchema) -> WellOutputSchema:
+    """
+    Получение уровней глубины, на которых скважина достигает заданного
+    значения Z (или каждого значения из списка).
+
+    Поле "MD" ответа содержит список уровней глубины для одного
+    значения Z или список таких списков для списка значений.
+
+    """
+
+    output: WellOutputSchema = WellOutputSchema()
+    z: float | list[float] = well.params.Z
+
+    try:
+        md: list[np.ndarray] = await well_services.well_md_at_depth(
+            well.params.uuid,
+            z if isinstance(z, list) else [z]
+        )
+    except exc.WellNotFoundException as e:
+        output.error = str(e)
+    else:
+        output.data = {
+            'MD': [values.tolist() for values in md]
+            if isinstance(z, list) else md[0].tolist()
+        }
+
+    return output
+
+
+@router.post('/well.nearest')
+async def nearest(well: WellNearestSchema) -> WellOutputSchema:
+    """
+    Получение ближайших к заданным точкам точек траектории скважины
+    вместе с их уровнями глубины и расстояниями до них.
+
+    """
+
+    output: WellOutputSchema = WellOutputSchema()
+
+    try:
+        md, x, y, z, distance = await well_services.well_nearest(
+            well.params.uuid,
+            well.params.points
+        )
+    except exc.WellNotFoundException as e:
+        output.error = str(e)
+    else:
+        output.data = {
+            'MD': md.tolist(),
+            'X': x.tolist(),
+            'Y': y.tolist(),
+            'Z': z.tolist(),
+            'distance': distance.tolist()
+        }
+
+    return output
+
+
+@router.post('/well.separation')
+async def separation(well: WellSeparationSchema) -> WellOutputSchema:
+    """
+    Получение наименьших расстояний между траекторией скважины и
+    траекториями соседних скважин (проверка на пересечение стволов).
+
+    """
+
+    output: WellOutputSchema = WellOutputSchema()
+
+    try:
+        wells: list[dict[str, Any]] = await well_services.well_separation(
+            well.params.uuid,
+            well.params.offsets,
+            well.params.radius,
+            well.params.limit
+        )
+    except exc.WellNotFoundException as e:
+        output.error = str(e)
+    else:
+        output.data = {'wells': wells}
+
+    return output
+
+
+@router.post('/well.search')
+async def search(well: WellSearchSchema) -> WellOutputSchema:
+    """
+    Поиск скважин по расположению устья или траектории.
+
+    """
+
+    return WellOutputSchema(data={'wells': await well_services.well_search(
+        well.params.by == 'trajectory',
+        well.params.box,
+        well.params.point,
+        well.params.radius,
+        well.params.depth,
+        well.params.limit
+    )})
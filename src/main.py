@@ -1,8 +1,27 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError
 
+from database import db_instance
 from endpoints.exception_handlers import validation_exception_handler
+from endpoints.rpc import router as rpc_router
+from endpoints.service import router as service_router
 from endpoints.well import router as well_router
+from services.reaper import run_reaper
+from services.well import listen_well_changes
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    await db_instance.get_connection_pool()
+    await listen_well_changes()
+    reaper: asyncio.Task = asyncio.create_task(run_reaper())
+    yield
+    reaper.cancel()
+    await db_instance.close()
 
 
 app: FastAPI = FastAPI(
@@ -11,10 +30,13 @@ app: FastAPI = FastAPI(
     swagger_ui_parameters={
         'displayRequestDuration': True,
         'defaultModelsExpandDepth': 0
-    }
+    },
+    lifespan=lifespan
 )
 
 app.include_router(well_router)
+app.include_router(rpc_router)
+app.include_router(service_router)
 app.add_exception_handler(
     RequestValidationError,
     validation_exception_handler
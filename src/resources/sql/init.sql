@@ -7,6 +7,48 @@ CREATE TABLE IF NOT EXISTS well_names
 );
 
 
+-- TABLE: well_registry
+-- Реестр скважин вне зависимости от хранилища. Проверка
+-- существования скважины и чтение её метаданных выполняются по
+-- первичному ключу этой таблицы.
+--
+-- Удалённая скважина сначала только помечается (removed_at), а её
+-- траектория удаляется позже функцией reap_wells, поэтому удаление
+-- не выполняет DDL и не ждёт блокировок каталога.
+
+CREATE TABLE IF NOT EXISTS well_registry
+(
+	pk_id UUID NOT NULL,
+	name CHARACTER VARYING(32) NOT NULL,
+	head POINT NOT NULL,
+	storage CHARACTER VARYING(16) NOT NULL,
+	nodes INTEGER NOT NULL,
+	md_min DOUBLE PRECISION NOT NULL,
+	md_max DOUBLE PRECISION NOT NULL,
+	created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+	removed_at TIMESTAMP WITH TIME ZONE,
+	CONSTRAINT well_registry_pkey PRIMARY KEY (pk_id)
+);
+
+CREATE INDEX IF NOT EXISTS well_registry_removed_at
+ON well_registry (removed_at) WHERE removed_at IS NOT NULL;
+
+-- Габариты траектории скважины: bbox по X и Y и диапазон Z. Вместе
+-- с индексами по устьям и габаритам используются методом well.search.
+-- У скважин, созданных до их появления, габариты заполняет
+-- python -m utils.index_wells.
+
+ALTER TABLE well_registry ADD COLUMN IF NOT EXISTS bbox BOX;
+ALTER TABLE well_registry ADD COLUMN IF NOT EXISTS z_min DOUBLE PRECISION;
+ALTER TABLE well_registry ADD COLUMN IF NOT EXISTS z_max DOUBLE PRECISION;
+
+CREATE INDEX IF NOT EXISTS well_registry_head
+ON well_registry USING gist (head) WHERE removed_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS well_registry_bbox
+ON well_registry USING gist (bbox) WHERE removed_at IS NULL;
+
+
 -- Procedure: insert_well
 
 CREATE OR REPLACE FUNCTION insert_well(
@@ -41,42 +83,644 @@ USING well_uuid, well_name, well_head, md, x, y, z;
 
 INSERT INTO well_names VALUES (well_name);
 
+INSERT INTO well_registry (
+	pk_id, name, head, storage, nodes, md_min, md_max, bbox, z_min, z_max
+)
+SELECT
+	well_uuid, well_name, well_head, 'tables',
+	array_length(md, 1), md[1], md[array_length(md, 1)],
+	box(point(MIN(node_x), MIN(node_y)), point(MAX(node_x), MAX(node_y))),
+	MIN(node_z), MAX(node_z)
+FROM unnest(x, y, z) AS node(node_x, node_y, node_z);
+
 RETURN well_uuid;
 
 END;
 $$ LANGUAGE plpgsql;
 
 
+-- Procedure: create_well_table
+-- Создаёт таблицу скважины с упакованной траекторией. Траектория
+-- разбита на фрагменты (chunks) по несколько сотен узлов; соседние
+-- фрагменты имеют один общий узел, поэтому диапазоны [md_min, md_max]
+-- фрагментов примыкают друг к другу. Способ сжатия фрагмента задаёт
+-- байт кодека в его заголовке (см. PACKED_TRAJECTORY_HEADER в
+-- database.py): raw - столбцы float64 без сжатия, delta - разности
+-- двоичных представлений соседних чисел, сжатые zlib.
+
+CREATE OR REPLACE FUNCTION create_well_table(
+	well_uuid UUID,
+	well_name CHARACTER VARYING(32),
+	well_head POINT,
+	md_min DOUBLE PRECISION[],
+	md_max DOUBLE PRECISION[],
+	chunks BYTEA[]
+)
+RETURNS VOID
+AS $$
+DECLARE
+	well_table_name TEXT := 'well_' || REPLACE(well_uuid::TEXT, '-', '');
+BEGIN
+
+EXECUTE
+	'CREATE TABLE ' || well_table_name ||
+	'(
+		pk_id UUID NOT NULL,
+		name CHARACTER VARYING(32) NOT NULL,
+		head POINT NOT NULL,
+		chunk_no INTEGER PRIMARY KEY,
+		md_min DOUBLE PRECISION NOT NULL,
+		md_max DOUBLE PRECISION NOT NULL,
+		trajectory BYTEA NOT NULL
+	)';
+
+EXECUTE 'ALTER TABLE ' || well_table_name ||
+		' ALTER COLUMN trajectory SET STORAGE EXTERNAL';
+
+EXECUTE 'INSERT INTO ' || well_table_name ||
+		' SELECT $1, $2, $3, i - 1, $4[i], $5[i], $6[i]
+		FROM generate_subscripts($6, 1) AS i'
+USING well_uuid, well_name, well_head, md_min, md_max, chunks;
+
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Procedure: insert_well_packed
+
+DROP FUNCTION IF EXISTS insert_well_packed(CHARACTER VARYING, POINT, BYTEA);
+DROP FUNCTION IF EXISTS insert_well_packed(
+	CHARACTER VARYING, POINT, DOUBLE PRECISION[], DOUBLE PRECISION[], BYTEA[]
+);
+DROP FUNCTION IF EXISTS insert_well_packed(
+	CHARACTER VARYING, POINT, INTEGER,
+	DOUBLE PRECISION[], DOUBLE PRECISION[], BYTEA[]
+);
+
+-- bounds: габариты траектории [x_min, y_min, z_min, x_max, y_max, z_max].
+
+CREATE OR REPLACE FUNCTION insert_well_packed(
+	well_name CHARACTER VARYING(32),
+	well_head POINT,
+	nodes INTEGER,
+	md_min DOUBLE PRECISION[],
+	md_max DOUBLE PRECISION[],
+	chunks BYTEA[],
+	bounds DOUBLE PRECISION[]
+)
+RETURNS UUID
+AS $$
+DECLARE
+	well_uuid UUID := gen_random_uuid();
+BEGIN
+
+PERFORM create_well_table(
+	well_uuid, well_name, well_head, md_min, md_max, chunks
+);
+
+INSERT INTO well_names VALUES (well_name);
+
+INSERT INTO well_registry (
+	pk_id, name, head, storage, nodes, md_min, md_max, bbox, z_min, z_max
+)
+VALUES (
+	well_uuid, well_name, well_head, 'tables',
+	nodes, md_min[1], md_max[array_length(md_max, 1)],
+	box(point(bounds[1], bounds[2]), point(bounds[4], bounds[5])),
+	bounds[3], bounds[6]
+);
+
+RETURN well_uuid;
+
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Function: read_well_chunk
+-- Возвращает фрагмент траектории скважины хранилища tables,
+-- содержащий глубину md, или NULL, если скважина не найдена или
+-- удалена. Текст запроса к функции не зависит от скважины, поэтому
+-- подготовленный запрос переиспользуется для всех скважин.
+
+CREATE OR REPLACE FUNCTION read_well_chunk(
+	well_uuid UUID,
+	md DOUBLE PRECISION
+)
+RETURNS BYTEA
+AS $$
+DECLARE
+	well_table_name TEXT := 'well_' || REPLACE(well_uuid::TEXT, '-', '');
+	chunk BYTEA;
+BEGIN
+
+IF NOT EXISTS (
+	SELECT FROM well_registry WHERE pk_id = well_uuid AND removed_at IS NULL
+) THEN
+	RETURN NULL;
+END IF;
+
+EXECUTE format(
+	'SELECT trajectory FROM %1$I
+	WHERE chunk_no = (
+		SELECT COALESCE(MAX(chunk_no), 0) FROM %1$I WHERE md_min <= $1
+	)',
+	well_table_name
+)
+INTO chunk
+USING md;
+
+RETURN chunk;
+
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+
+-- Function: read_well_chunks
+-- Возвращает все фрагменты траектории скважины хранилища tables по
+-- порядку (см. read_well_chunk).
+
+CREATE OR REPLACE FUNCTION read_well_chunks(well_uuid UUID)
+RETURNS TABLE (
+	name CHARACTER VARYING(32),
+	head POINT,
+	trajectory BYTEA
+)
+AS $$
+BEGIN
+
+IF NOT EXISTS (
+	SELECT FROM well_registry
+	WHERE pk_id = well_uuid AND removed_at IS NULL
+) THEN
+	RETURN;
+END IF;
+
+RETURN QUERY EXECUTE format(
+	'SELECT name, head, trajectory FROM %I ORDER BY chunk_no',
+	'well_' || REPLACE(well_uuid::TEXT, '-', '')
+);
+
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+
+-- Function: read_well_window
+-- Возвращает по порядку фрагменты траектории скважины хранилища
+-- tables, покрывающие глубины от md_from до md_to (см.
+-- read_well_chunk).
+
+CREATE OR REPLACE FUNCTION read_well_window(
+	well_uuid UUID,
+	md_from DOUBLE PRECISION,
+	md_to DOUBLE PRECISION
+)
+RETURNS TABLE (
+	name CHARACTER VARYING(32),
+	head POINT,
+	trajectory BYTEA
+)
+AS $$
+BEGIN
+
+IF NOT EXISTS (
+	SELECT FROM well_registry
+	WHERE pk_id = well_uuid AND removed_at IS NULL
+) THEN
+	RETURN;
+END IF;
+
+RETURN QUERY EXECUTE format(
+	'SELECT name, head, trajectory FROM %1$I
+	WHERE chunk_no BETWEEN (
+		SELECT COALESCE(MAX(chunk_no), 0) FROM %1$I WHERE md_min <= $1
+	) AND (
+		SELECT COALESCE(MAX(chunk_no), 0) FROM %1$I WHERE md_min < $2
+	)
+	ORDER BY chunk_no',
+	'well_' || REPLACE(well_uuid::TEXT, '-', '')
+)
+USING md_from, md_to;
+
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+
+-- Function: pack_well
+-- Переводит скважину, траектория которой хранится в виде массивов
+-- DOUBLE PRECISION[], на упакованный формат.
+--
+-- Старая таблица блокируется, переименовывается, и под её именем
+-- создаётся упакованная таблица, после чего старая удаляется. Всё это
+-- происходит в одной транзакции, поэтому одновременные чтения ждут
+-- её завершения и затем находят по имени уже новую таблицу, а не
+-- получают ошибку об отсутствии таблицы.
+
+DROP FUNCTION IF EXISTS pack_well(UUID, BYTEA);
+
+CREATE OR REPLACE FUNCTION pack_well(
+	well_uuid UUID,
+	md_min DOUBLE PRECISION[],
+	md_max DOUBLE PRECISION[],
+	chunks BYTEA[]
+)
+RETURNS BOOLEAN
+AS $$
+DECLARE
+	well_table_name TEXT := 'well_' || REPLACE(well_uuid::TEXT, '-', '');
+	well_name CHARACTER VARYING(32);
+	well_head POINT;
+BEGIN
+
+IF NOT EXISTS (
+	SELECT FROM information_schema.columns
+	WHERE table_name = well_table_name AND column_name = 'md'
+) THEN
+	RETURN FALSE;
+END IF;
+
+EXECUTE format('LOCK TABLE %I IN ACCESS EXCLUSIVE MODE', well_table_name);
+
+EXECUTE format('SELECT name, head FROM %I', well_table_name)
+INTO well_name, well_head;
+
+EXECUTE format(
+	'ALTER TABLE %I RENAME TO %I',
+	well_table_name,
+	well_table_name || '_legacy'
+);
+
+PERFORM create_well_table(
+	well_uuid, well_name, well_head, md_min, md_max, chunks
+);
+
+EXECUTE format('DROP TABLE %I', well_table_name || '_legacy');
+
+RETURN TRUE;
+
+END;
+$$ LANGUAGE plpgsql;
+
+
 -- Function: delete_well
+-- Помечает скважину любого хранилища удалённой. Имя скважины
+-- освобождается сразу, а её данные удаляет функция reap_wells.
 
 CREATE OR REPLACE FUNCTION delete_well(well_uuid UUID)
 RETURNS BOOLEAN
 AS $$
 DECLARE
-	is_exists BOOLEAN;
 	well_name_to_delete TEXT;
-	well_table_name TEXT;
 BEGIN
 
-well_table_name := 'well_' || REPLACE(well_uuid::TEXT, '-', '');
-is_exists := (SELECT EXISTS (
-   SELECT FROM information_schema.tables 
-   WHERE table_name = well_table_name
-));
+UPDATE well_registry SET removed_at = now()
+WHERE pk_id = well_uuid AND removed_at IS NULL
+RETURNING name INTO well_name_to_delete;
 
-IF NOT is_exists THEN
+IF NOT FOUND THEN
 	RETURN FALSE;
 END IF;
 
-EXECUTE 'SELECT name FROM ' || well_table_name || ' WHERE pk_id = $1'
-INTO well_name_to_delete
-USING well_uuid;
-
 DELETE FROM well_names WHERE well_name = well_name_to_delete;
 
+-- Оповещает воркеры приложения о необходимости сбросить кэш скважины.
+PERFORM pg_notify('well_removed', well_uuid::TEXT);
+
+RETURN TRUE;
+
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Function: reap_wells
+-- Удаляет данные не более чем batch_size помеченных удалёнными
+-- скважин и возвращает их количество. Может вызываться несколькими
+-- воркерами одновременно.
+
+CREATE OR REPLACE FUNCTION reap_wells(batch_size INTEGER)
+RETURNS INTEGER
+AS $$
+DECLARE
+	dead_well RECORD;
+	reaped INTEGER := 0;
+BEGIN
+
+FOR dead_well IN
+	SELECT pk_id, storage FROM well_registry
+	WHERE removed_at IS NOT NULL
+	ORDER BY removed_at
+	LIMIT batch_size
+	FOR UPDATE SKIP LOCKED
+LOOP
+	IF dead_well.storage = 'partitioned' THEN
+		DELETE FROM well WHERE pk_id = dead_well.pk_id;
+	ELSE
+		EXECUTE 'DROP TABLE IF EXISTS well_' ||
+				REPLACE(dead_well.pk_id::TEXT, '-', '');
+	END IF;
+
+	DELETE FROM well_registry WHERE pk_id = dead_well.pk_id;
+	reaped := reaped + 1;
+END LOOP;
+
+RETURN reaped;
+
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- TABLE: well
+-- Единая таблица скважин для хранилища partitioned (см.
+-- services/storage/partitioned.py). Одна запись соответствует одному
+-- фрагменту траектории в том же упакованном формате, что и в
+-- таблицах well_{uuid}.
+
+CREATE TABLE IF NOT EXISTS well
+(
+	pk_id UUID NOT NULL,
+	chunk_no INTEGER NOT NULL,
+	name CHARACTER VARYING(32) NOT NULL,
+	head POINT NOT NULL,
+	md_min DOUBLE PRECISION NOT NULL,
+	md_max DOUBLE PRECISION NOT NULL,
+	trajectory BYTEA NOT NULL,
+	CONSTRAINT well_pkey PRIMARY KEY (pk_id, chunk_no)
+) PARTITION BY HASH (pk_id);
+
+DO $$
+BEGIN
+	FOR i IN 0..15 LOOP
+		EXECUTE format(
+			'CREATE TABLE IF NOT EXISTS well_part_%s PARTITION OF well
+			FOR VALUES WITH (MODULUS 16, REMAINDER %s)',
+			i, i
+		);
+		EXECUTE format(
+			'ALTER TABLE well_part_%s ALTER COLUMN trajectory
+			SET STORAGE EXTERNAL',
+			i
+		);
+	END LOOP;
+END;
+$$;
+
+
+-- Procedure: insert_well_partitioned
+
+DROP FUNCTION IF EXISTS insert_well_partitioned(
+	CHARACTER VARYING, POINT, DOUBLE PRECISION[], DOUBLE PRECISION[], BYTEA[]
+);
+DROP FUNCTION IF EXISTS insert_well_partitioned(
+	CHARACTER VARYING, POINT, INTEGER,
+	DOUBLE PRECISION[], DOUBLE PRECISION[], BYTEA[]
+);
+
+CREATE OR REPLACE FUNCTION insert_well_partitioned(
+	well_name CHARACTER VARYING(32),
+	well_head POINT,
+	nodes INTEGER,
+	md_min DOUBLE PRECISION[],
+	md_max DOUBLE PRECISION[],
+	chunks BYTEA[],
+	bounds DOUBLE PRECISION[]
+)
+RETURNS UUID
+AS $$
+DECLARE
+	well_uuid UUID := gen_random_uuid();
+BEGIN
+
+INSERT INTO well_names VALUES (well_name);
+
+INSERT INTO well
+SELECT well_uuid, i - 1, well_name, well_head, md_min[i], md_max[i], chunks[i]
+FROM generate_subscripts(chunks, 1) AS i;
+
+INSERT INTO well_registry (
+	pk_id, name, head, storage, nodes, md_min, md_max, bbox, z_min, z_max
+)
+VALUES (
+	well_uuid, well_name, well_head, 'partitioned',
+	nodes, md_min[1], md_max[array_length(md_max, 1)],
+	box(point(bounds[1], bounds[2]), point(bounds[4], bounds[5])),
+	bounds[3], bounds[6]
+);
+
+RETURN well_uuid;
+
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Function: delete_well_partitioned
+-- Удаление скважин обоих хранилищ выполняет delete_well.
+
+DROP FUNCTION IF EXISTS delete_well_partitioned(UUID);
+
+
+-- Function: move_well_to_partitioned
+-- Переносит упакованную скважину из таблицы well_{uuid} в таблицу
+-- well с сохранением идентификатора и имени.
+
+CREATE OR REPLACE FUNCTION move_well_to_partitioned(well_uuid UUID)
+RETURNS BOOLEAN
+AS $$
+DECLARE
+	well_table_name TEXT := 'well_' || REPLACE(well_uuid::TEXT, '-', '');
+BEGIN
+
+IF NOT EXISTS (
+	SELECT FROM information_schema.columns
+	WHERE table_name = well_table_name AND column_name = 'chunk_no'
+) THEN
+	RETURN FALSE;
+END IF;
+
+EXECUTE 'INSERT INTO well
+	SELECT pk_id, chunk_no, name, head, md_min, md_max, trajectory
+	FROM ' || well_table_name;
+
 EXECUTE 'DROP TABLE ' || well_table_name;
 
+UPDATE well_registry SET storage = 'partitioned' WHERE pk_id = well_uuid;
+
 RETURN TRUE;
 
 END;
 $$ LANGUAGE plpgsql;
+
+
+-- Function: append_well_chunks
+-- Дописывает к упакованной траектории скважины любого хранилища
+-- фрагменты chunks (см. create_well_table) с номерами после уже
+-- записанных. Первый узел первого фрагмента должен совпадать с
+-- последним узлом траектории на глубине last_md, а nodes - количество
+-- новых узлов. Записанные фрагменты не изменяются, а количество
+-- узлов, md_max и габариты в реестре расширяются.
+--
+-- Возвращает количество узлов траектории после добавления, 0, если
+-- траектория уже не заканчивается на last_md (её продолжил другой
+-- запрос), или NULL, если скважина не найдена или удалена.
+
+CREATE OR REPLACE FUNCTION append_well_chunks(
+	well_uuid UUID,
+	last_md DOUBLE PRECISION,
+	nodes INTEGER,
+	md_min DOUBLE PRECISION[],
+	md_max DOUBLE PRECISION[],
+	chunks BYTEA[],
+	bounds DOUBLE PRECISION[]
+)
+RETURNS INTEGER
+AS $$
+DECLARE
+	registered RECORD;
+	appended_md_max DOUBLE PRECISION := md_max[array_length(md_max, 1)];
+	appended_box BOX := box(
+		point(bounds[1], bounds[2]),
+		point(bounds[4], bounds[5])
+	);
+	first_chunk_no INTEGER;
+BEGIN
+
+-- Блокировка записи реестра упорядочивает одновременные добавления
+-- и удаление скважины.
+SELECT * INTO registered FROM well_registry
+WHERE pk_id = well_uuid AND removed_at IS NULL
+FOR UPDATE;
+
+IF NOT FOUND THEN
+	RETURN NULL;
+END IF;
+
+IF registered.md_max <> last_md THEN
+	RETURN 0;
+END IF;
+
+IF registered.storage = 'partitioned' THEN
+	SELECT MAX(chunk_no) + 1 INTO first_chunk_no
+	FROM well WHERE pk_id = well_uuid;
+
+	INSERT INTO well
+	SELECT well_uuid, first_chunk_no + i - 1, registered.name,
+		registered.head, md_min[i], md_max[i], chunks[i]
+	FROM generate_subscripts(chunks, 1) AS i;
+ELSE
+	EXECUTE format(
+		'INSERT INTO %1$I
+		SELECT $1, $2, $3, (SELECT MAX(chunk_no) FROM %1$I) + i,
+			$4[i], $5[i], $6[i]
+		FROM generate_subscripts($6, 1) AS i',
+		'well_' || REPLACE(well_uuid::TEXT, '-', '')
+	)
+	USING well_uuid, registered.name, registered.head,
+		md_min, md_max, chunks;
+END IF;
+
+-- У скважин, созданных до появления габаритов и ещё не обработанных
+-- utils.index_wells, габариты в реестре равны NULL. bound_box с NULL
+-- даёт NULL, поэтому такие скважины получают габариты добавленных
+-- узлов и хотя бы по ним находятся в well.search.
+UPDATE well_registry SET
+	nodes = registered.nodes + append_well_chunks.nodes,
+	md_max = appended_md_max,
+	bbox = COALESCE(
+		bound_box(registered.bbox, appended_box),
+		appended_box
+	),
+	z_min = COALESCE(LEAST(registered.z_min, bounds[3]), bounds[3]),
+	z_max = COALESCE(GREATEST(registered.z_max, bounds[6]), bounds[6])
+WHERE pk_id = well_uuid;
+
+-- Оповещает воркеры приложения о том, что траекторию скважины в их
+-- кэшах нужно продолжить до глубины appended_md_max.
+PERFORM pg_notify(
+	'well_appended',
+	well_uuid::TEXT || ' ' || appended_md_max::TEXT
+);
+
+RETURN registered.nodes + append_well_chunks.nodes;
+
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Function: packed_chunk_nodes
+-- Возвращает количество узлов фрагмента упакованной траектории по его
+-- заголовку (см. PACKED_TRAJECTORY_HEADER в database.py): за
+-- сигнатурой (4 байта) и версией формата следуют байт кодека и
+-- количество столбцов (uint16 little-endian), а за ними - столбцы
+-- float64. Размер сжатого фрагмента (кодек не raw) не определяет
+-- количество узлов, поэтому для него возвращается NULL.
+
+CREATE OR REPLACE FUNCTION packed_chunk_nodes(chunk BYTEA)
+RETURNS INTEGER
+AS $$
+BEGIN
+
+IF get_byte(chunk, 5) <> 0 THEN
+	RETURN NULL;
+END IF;
+
+RETURN (octet_length(chunk) - 8)
+	/ (8 * (get_byte(chunk, 6) + 256 * get_byte(chunk, 7)));
+
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+
+-- Заполнение well_registry для скважин, созданных до его появления.
+-- Сжатые фрагменты появились позже реестра и записываются только
+-- вместе с записью в нём, поэтому у заполняемых скважин все фрагменты
+-- несжатые; скважины, у которых это не так, пропускаются, так как
+-- количество их узлов не определить без распаковки.
+
+DO $$
+DECLARE
+	well_table RECORD;
+BEGIN
+
+FOR well_table IN
+	SELECT relname FROM pg_class
+	WHERE relkind = 'r' AND relname ~ '^well_[0-9a-f]{32}$'
+		AND NOT EXISTS (
+			SELECT FROM well_registry
+			WHERE pk_id = substring(relname FROM 6)::UUID
+		)
+LOOP
+	IF EXISTS (
+		SELECT FROM information_schema.columns
+		WHERE table_name = well_table.relname AND column_name = 'md'
+	) THEN
+		EXECUTE format(
+			'INSERT INTO well_registry
+				(pk_id, name, head, storage, nodes, md_min, md_max)
+			SELECT pk_id, name, head, ''tables'', array_length(md, 1),
+				md[1], md[array_length(md, 1)]
+			FROM %I',
+			well_table.relname
+		);
+	ELSE
+		EXECUTE format(
+			'INSERT INTO well_registry
+				(pk_id, name, head, storage, nodes, md_min, md_max)
+			SELECT pk_id, (array_agg(name))[1], (array_agg(head))[1],
+				''tables'',
+				SUM(packed_chunk_nodes(trajectory)) - COUNT(*) + 1,
+				MIN(md_min), MAX(md_max)
+			FROM %I GROUP BY pk_id
+			HAVING bool_and(packed_chunk_nodes(trajectory) IS NOT NULL)',
+			well_table.relname
+		);
+	END IF;
+END LOOP;
+
+INSERT INTO well_registry (pk_id, name, head, storage, nodes, md_min, md_max)
+SELECT pk_id, (array_agg(name))[1], (array_agg(head))[1], 'partitioned',
+	SUM(packed_chunk_nodes(trajectory)) - COUNT(*) + 1,
+	MIN(md_min), MAX(md_max)
+FROM well GROUP BY pk_id
+HAVING bool_and(packed_chunk_nodes(trajectory) IS NOT NULL)
+ON CONFLICT DO NOTHING;
+
+END;
+$$;
@@ -3,14 +3,38 @@
 
 """
 
-from pydantic import BaseModel, Field, UUID4, computed_field
-from typing import Any
+import numpy as np
+from pydantic import (
+    BaseModel,
+    Field,
+    UUID4,
+    ValidationError,
+    computed_field,
+    model_validator
+)
+from typing import Any, Literal
+
+
+# Поля параметров well.create с массивами траектории.
+TRAJECTORY_FIELDS: tuple[str, ...] = ('MD', 'X', 'Y', 'Z')
 
 
 class WellSchema(BaseModel):
     method: str = Field(default='well.method')
     params: Any
 
+    @classmethod
+    def validate_request(cls, data: Any) -> 'WellSchema':
+        """
+        Проверяет тело запроса, уже разобранное из JSON.
+
+        Схемы запросов с большими массивами переопределяют этот метод,
+        чтобы не проверять каждый элемент массивов средствами pydantic.
+
+        """
+
+        return cls.model_validate(data)
+
 
 class WellCreateSchema(WellSchema):
     """
@@ -45,9 +69,170 @@ class WellCreateSchema(WellSchema):
         X: list[float] = Field(default=[0.0, 0.0], min_length=1)
         Y: list[float] = Field(default=[0.0, 0.0], min_length=1)
         Z: list[float] = Field(default=[0.0, 0.0], min_length=1)
-    
+
+        @classmethod
+        def validate_fast(
+                cls,
+                data: Any) -> 'WellCreateSchema.WellCreateParamsSchema | None':
+            """
+            Проверяет параметры так же, как model_validate, но списки
+            MD, X, Y и Z, уже разобранные orjson в списки float,
+            преобразуются в массивы NumPy float64 одним вызовом
+            np.array, без поэлементной проверки pydantic.
+
+            Возвращает None, если параметры не удалось проверить таким
+            образом: тогда их нужно проверить model_validate, чтобы
+            получить ошибку валидации в обычном виде.
+
+            """
+
+            if not isinstance(data, dict):
+                return None
+
+            arrays: dict[str, np.ndarray] = {}
+
+            for field in TRAJECTORY_FIELDS:
+                if field not in data:
+                    continue
+
+                try:
+                    array: np.ndarray = np.array(data[field],
+                                                 dtype=np.float64)
+                except (TypeError, ValueError, OverflowError):
+                    return None
+
+                # Пропуски (null) преобразуются в NaN.
+                if (array.ndim != 1 or not array.size
+                        or not np.isfinite(array).all()):
+                    return None
+
+                arrays[field] = array
+
+            try:
+                params: WellCreateSchema.WellCreateParamsSchema = (
+                    cls.model_validate({
+                        key: value for key, value in data.items()
+                        if key not in arrays
+                    })
+                )
+            except ValidationError:
+                return None
+
+            for field, array in arrays.items():
+                setattr(params, field, array)
+
+            return params
+
     params: WellCreateParamsSchema
 
+    @classmethod
+    def validate_request(cls, data: Any) -> 'WellCreateSchema':
+        params: WellCreateSchema.WellCreateParamsSchema | None = (
+            cls.WellCreateParamsSchema.validate_fast(data.get('params'))
+            if isinstance(data, dict) else None
+        )
+
+        if params is None:
+            return cls.model_validate(data)
+
+        well: WellCreateSchema = cls.model_validate(data | {'params': {}})
+        well.params = params
+
+        return well
+
+
+class WellCreateManySchema(WellSchema):
+    """
+    Тело запроса для создания сразу нескольких скважин.
+
+    Параметры:
+
+    wells: список скважин, каждая из которых задаётся так же, как
+    параметры запроса well.create.
+
+    """
+
+    class WellCreateManyParamsSchema(BaseModel):
+        wells: list[WellCreateSchema.WellCreateParamsSchema] = Field(
+            min_length=1
+        )
+
+    params: WellCreateManyParamsSchema
+
+    @classmethod
+    def validate_request(cls, data: Any) -> 'WellCreateManySchema':
+        params: Any = data.get('params') if isinstance(data, dict) else None
+        wells: Any = params.get('wells') if isinstance(params, dict) \
+            else None
+
+        if not isinstance(wells, list) or not wells:
+            return cls.model_validate(data)
+
+        validated: list[WellCreateSchema.WellCreateParamsSchema | None] = [
+            WellCreateSchema.WellCreateParamsSchema.validate_fast(well)
+            for well in wells
+        ]
+
+        if None in validated:
+            return cls.model_validate(data)
+
+        many: WellCreateManySchema = cls.model_validate(
+            data | {'params': params | {'wells': [{}]}}
+        )
+        many.params.wells = validated
+
+        return many
+
+
+class WellCreateBinarySchema(WellSchema):
+    """
+    Метаданные запроса для создания скважины с траекторией в бинарном
+    виде.
+
+    Запрос передаётся как multipart/form-data: поле "well" содержит
+    этот JSON, а поля "MD", "X", "Y" и "Z" - файлы с массивами в
+    формате .npy или в виде чисел float64 little-endian без заголовка.
+
+    Параметры:
+
+    name: имя скважины;
+
+    head: координаты устья скважины (x, y).
+
+    """
+
+    class WellCreateBinaryParamsSchema(BaseModel):
+        name: str = Field(default='well_name', min_length=1)
+        head: tuple[float, float] = Field(default=(0.0, 0.0),
+                                          min_length=2, max_length=2)
+
+    params: WellCreateBinaryParamsSchema
+
+
+class WellAppendSchema(WellSchema):
+    """
+    Тело запроса для добавления узлов в конец траектории скважины.
+
+    Параметры:
+
+    uuid: идентификатор скважины;
+
+    MD: список из уровней глубины новых узлов, большие последнего
+    уровня глубины траектории;
+
+    X, Y, Z: координаты новых узлов.
+
+    """
+
+    class WellAppendParamsSchema(BaseModel):
+        uuid: UUID4 = Field()
+        MD: list[float] = Field(min_length=1)
+        X: list[float] = Field(min_length=1)
+        Y: list[float] = Field(min_length=1)
+        Z: list[float] = Field(min_length=1)
+
+    params: WellAppendParamsSchema
+
 
 class WellRemoveSchema(WellSchema):
     """
@@ -74,17 +259,86 @@ class WellGetSchema(WellSchema):
     uuid: идентификатор скважины;
 
     return_trajectory: при значении true вместе с основной информацией
-    возвращает координаты точек вместе с "MD".
+    возвращает координаты точек вместе с "MD";
+
+    max_points: наибольшее количество точек возвращаемой траектории;
+
+    tolerance: допустимое отклонение возвращаемой траектории от
+    исходной;
+
+    md_from, md_to: диапазон глубин возвращаемой части траектории.
+
+    При заданных max_points или tolerance траектория упрощается с
+    сохранением формы, и возвращается часть её точек.
+
+    При заданных md_from или md_to возвращаются только точки
+    траектории внутри диапазона глубин, а на его концах добавляются
+    точки, координаты которых интерполируются по соседним.
     
     """
     
     class WellGetParamsSchema(BaseModel):
         uuid: UUID4 = Field()
         return_trajectory: bool = Field(default=False)
+        max_points: int | None = Field(default=None, ge=2)
+        tolerance: float | None = Field(default=None, ge=0.)
+        md_from: float | None = Field(default=None)
+        md_to: float | None = Field(default=None)
+
+        @model_validator(mode='after')
+        def check_window(self) -> 'WellGetSchema.WellGetParamsSchema':
+            if (self.md_from is not None and self.md_to is not None
+                    and self.md_from > self.md_to):
+                raise ValueError('md_from must not be greater than md_to')
+
+            return self
     
     params: WellGetParamsSchema
 
 
+class WellResampleSchema(WellSchema):
+    """
+    Тело запроса для получения траектории скважины на равномерной
+    сетке глубин.
+
+    Параметры:
+
+    uuid: идентификатор скважины;
+
+    step: шаг сетки по MD;
+
+    count: количество точек сетки;
+
+    md_from, md_to: диапазон глубин сетки (по умолчанию - вся
+    траектория).
+
+    Должен быть задан step или count. Последняя точка сетки всегда
+    находится на глубине md_to (или в конце траектории).
+
+    """
+
+    class WellResampleParamsSchema(BaseModel):
+        uuid: UUID4 = Field()
+        step: float | None = Field(default=None, gt=0.)
+        count: int | None = Field(default=None, ge=2)
+        md_from: float | None = Field(default=None)
+        md_to: float | None = Field(default=None)
+
+        @model_validator(mode='after')
+        def check_grid(
+                self) -> 'WellResampleSchema.WellResampleParamsSchema':
+            if (self.step is None) == (self.count is None):
+                raise ValueError('either step or count must be set')
+
+            if (self.md_from is not None and self.md_to is not None
+                    and self.md_from > self.md_to):
+                raise ValueError('md_from must not be greater than md_to')
+
+            return self
+
+    params: WellResampleParamsSchema
+
+
 class WellAtSchema(WellSchema):
     """
     Тело запроса для получения координат скважины на определенной
@@ -105,6 +359,162 @@ class WellAtSchema(WellSchema):
     params: WellAtParamsSchema
 
 
+class WellAtManySchema(WellSchema):
+    """
+    Тело запроса для получения координат скважины сразу на нескольких
+    уровнях глубины.
+
+    Параметры:
+
+    uuid: идентификатор скважины;
+
+    MD: список из уровней глубины скважины.
+
+    """
+
+    class WellAtManyParamsSchema(BaseModel):
+        uuid: UUID4 = Field()
+        MD: list[float] = Field(min_length=1)
+
+    params: WellAtManyParamsSchema
+
+
+class WellMDAtDepthSchema(WellSchema):
+    """
+    Тело запроса для получения уровней глубины, на которых скважина
+    достигает заданных значений Z.
+
+    Параметры:
+
+    uuid: идентификатор скважины;
+
+    Z: значение Z или список значений.
+
+    Для каждого значения возвращаются все уровни глубины, на которых
+    траектория его достигает (несколько, если скважина поворачивает
+    вверх, и ни одного, если траектория его не достигает).
+
+    """
+
+    class WellMDAtDepthParamsSchema(BaseModel):
+        uuid: UUID4 = Field()
+        Z: float | list[float] = Field()
+
+        @model_validator(mode='after')
+        def check_z(
+                self) -> 'WellMDAtDepthSchema.WellMDAtDepthParamsSchema':
+            if isinstance(self.Z, list) and not self.Z:
+                raise ValueError('Z must not be empty')
+
+            return self
+
+    params: WellMDAtDepthParamsSchema
+
+
+class WellNearestSchema(WellSchema):
+    """
+    Тело запроса для поиска ближайших к заданным точкам точек
+    траектории скважины.
+
+    Параметры:
+
+    uuid: идентификатор скважины;
+
+    points: список точек (x, y, z).
+
+    """
+
+    class WellNearestParamsSchema(BaseModel):
+        uuid: UUID4 = Field()
+        points: list[tuple[float, float, float]] = Field(min_length=1)
+
+    params: WellNearestParamsSchema
+
+
+class WellSeparationSchema(WellSchema):
+    """
+    Тело запроса для вычисления наименьших расстояний между
+    траекторией скважины и траекториями соседних скважин.
+
+    Параметры:
+
+    uuid: идентификатор опорной скважины;
+
+    offsets: идентификаторы соседних скважин;
+
+    radius: наибольшее расстояние до соседних скважин. Если offsets не
+    заданы, соседними считаются все скважины, траектории которых могут
+    находиться ближе radius к траектории опорной;
+
+    limit: наибольшее количество соседних скважин, найденных по
+    radius.
+
+    Должны быть заданы offsets или radius.
+
+    """
+
+    class WellSeparationParamsSchema(BaseModel):
+        uuid: UUID4 = Field()
+        offsets: list[UUID4] | None = Field(default=None, min_length=1)
+        radius: float | None = Field(default=None, ge=0.)
+        limit: int = Field(default=1000, ge=1, le=100_000)
+
+        @model_validator(mode='after')
+        def check_offsets(
+                self) -> 'WellSeparationSchema.WellSeparationParamsSchema':
+            if self.offsets is None and self.radius is None:
+                raise ValueError('offsets or radius must be set')
+
+            return self
+
+    params: WellSeparationParamsSchema
+
+
+class WellSearchSchema(WellSchema):
+    """
+    Тело запроса для поиска скважин по расположению.
+
+    Параметры:
+
+    by: "head" - искать по устьям скважин, "trajectory" - по
+    габаритам траекторий в плане;
+
+    box: прямоугольник (x_min, y_min, x_max, y_max), в который
+    попадает устье (или с которым пересекаются габариты траектории);
+
+    point, radius: центр (x, y) и радиус круга, в пределах которого
+    находится устье (или габариты траектории);
+
+    depth: диапазон Z, с которым пересекается траектория;
+
+    limit: наибольшее количество найденных скважин.
+
+    Должен быть задан box или point вместе с radius. Найденные по
+    кругу скважины упорядочены по удалённости от point.
+
+    """
+
+    class WellSearchParamsSchema(BaseModel):
+        by: Literal['head', 'trajectory'] = Field(default='head')
+        box: tuple[float, float, float, float] | None = Field(default=None)
+        point: tuple[float, float] | None = Field(default=None)
+        radius: float | None = Field(default=None, ge=0.)
+        depth: tuple[float, float] | None = Field(default=None)
+        limit: int = Field(default=1000, ge=1, le=100_000)
+
+        @model_validator(mode='after')
+        def check_area(self) -> 'WellSearchSchema.WellSearchParamsSchema':
+            if (self.point is None) != (self.radius is None):
+                raise ValueError('point and radius must be set together')
+
+            if self.box is None and self.point is None:
+                raise ValueError('box or point with radius must be set')
+
+            return self
+
+    params: WellSearchParamsSchema
+
+
 class WellOutputSchema(BaseModel):
     """
     Является основным форматом ответа API.
@@ -0,0 +1,129 @@
+"""
+Содержит внутрипроцессный кэш декодированных траекторий скважин.
+
+Записанные узлы траектории скважины не изменяются, к ней можно только
+добавить узлы в конце. Поэтому запись в кэше инвалидируется при
+удалении скважины, а при продолжении траектории заменяется
+продолженной копией. Так как приложение запускается в нескольких
+процессах, об этом каждый процесс узнает через уведомления PostgreSQL
+(см. delete_well и append_well_chunks в init.sql).
+
+"""
+
+from collections import OrderedDict
+from typing import Any
+from uuid import UUID
+
+from config import TRAJECTORY_CACHE_SIZE
+from services.trajectory import Well
+
+
+class TrajectoryCache:
+    """
+    LRU-кэш скважин, ограниченный суммарным объёмом массивов в байтах.
+
+    При превышении лимита вытесняются давно не использованные записи.
+    Запись, которая сама по себе больше лимита, не кэшируется.
+
+    """
+
+    def __init__(self, max_bytes: int):
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict[UUID, Well] = OrderedDict()
+        self._size_bytes = 0
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def version(self) -> int:
+        """
+        Номер версии кэша, который увеличивается при каждой
+        инвалидации или замене записи.
+
+        Его нужно запомнить перед загрузкой скважины из БД и передать
+        в put: если за время загрузки скважина была удалена или её
+        траектория продолжена, запись в кэш не попадёт.
+
+        """
+
+        return self._version
+
+    def get(self, uuid: UUID) -> Well | None:
+        well: Well | None = self._entries.get(uuid)
+
+        if well is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(uuid)
+
+        return well
+
+    def peek(self, uuid: UUID) -> Well | None:
+        """
+        Возвращает скважину из кэша, не учитывая обращение в
+        статистике и порядке вытеснения.
+
+        """
+
+        return self._entries.get(uuid)
+
+    def put(self, uuid: UUID, well: Well,
+            version: int | None = None) -> None:
+        if version is not None and version != self._version:
+            return
+
+        if well.nbytes > self._max_bytes:
+            return
+
+        self._discard(uuid)
+        self._entries[uuid] = well
+        self._size_bytes += well.nbytes
+
+        while self._size_bytes > self._max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size_bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def replace(self, uuid: UUID, well: Well) -> None:
+        """
+        Заменяет запись скважины новой версией well (например, с
+        продолженной траекторией) и увеличивает версию кэша, чтобы
+        загрузки прежней версии, начатые до замены, не попали в кэш.
+
+        """
+
+        self._version += 1
+        self._discard(uuid)
+        self.put(uuid, well)
+
+    def invalidate(self, uuid: UUID) -> None:
+        self._version += 1
+        self._discard(uuid)
+
+    def clear(self) -> None:
+        self._version += 1
+        self._entries.clear()
+        self._size_bytes = 0
+
+    def _discard(self, uuid: UUID) -> None:
+        well: Well | None = self._entries.pop(uuid, None)
+
+        if well is not None:
+            self._size_bytes -= well.nbytes
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            'entries': len(self._entries),
+            'size_bytes': self._size_bytes,
+            'max_bytes': self._max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
+
+trajectory_cache: TrajectoryCache = TrajectoryCache(TRAJECTORY_CACHE_SIZE)
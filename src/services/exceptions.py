@@ -3,21 +3,49 @@
 
 """
 
-class WellNotFoundException(Exception):
+class WellException(Exception):
+    """
+    Базовый класс для исключений сервиса well, сообщение которых
+    возвращается клиенту в поле error ответа.
+
+    """
+
+
+class WellNotFoundException(WellException):
     def __init__(self):
         super().__init__('Well not found!')
 
 
-class WellAlreadyExistsException(Exception):
+class WellAlreadyExistsException(WellException):
     def __init__(self):
         super().__init__('Well already exists!')
 
 
-class InconsistentHeadAndFirstNodeException(Exception):
+class InconsistentHeadAndFirstNodeException(WellException):
     def __init__(self):
         super().__init__('Well head and trajectory are inconsistent!')
 
 
-class ArrayDifferentSizesException(Exception):
+class ArrayDifferentSizesException(WellException):
     def __init__(self):
         super().__init__('Sizes of MD, X, Y and Z must be equal!')
+
+
+class NonMonotonicMDException(WellException):
+    def __init__(self):
+        super().__init__('MD must be strictly increasing!')
+
+
+class TooManyPointsException(WellException):
+    def __init__(self):
+        super().__init__('Too many points requested!')
+
+
+class InvalidArrayException(WellException):
+    def __init__(self):
+        super().__init__('MD, X, Y and Z must be non-empty float64 arrays!')
+
+
+class WellNotPackedException(WellException):
+    def __init__(self):
+        super().__init__('Well must be migrated to packed format first!')
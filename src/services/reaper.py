@@ -0,0 +1,45 @@
+"""
+Содержит фоновую задачу, которая удаляет данные скважин, помеченных
+удалёнными (см. delete_well и reap_wells в init.sql).
+
+"""
+
+import asyncio
+
+import asyncpg as apg
+
+from config import REAPER_BATCH_SIZE, REAPER_INTERVAL
+from database import db_instance
+
+
+async def reap_removed_wells() -> int:
+    """
+    Удаляет данные очередной партии удалённых скважин и возвращает их
+    количество.
+
+    """
+
+    return await db_instance.fetch_val(
+        'SELECT reap_wells($1)',
+        REAPER_BATCH_SIZE
+    )
+
+
+async def run_reaper() -> None:
+    """
+    Периодически удаляет данные удалённых скважин партиями.
+
+    Пока партии заполнены целиком, следующая запускается сразу.
+    Задача запускается в каждом воркере, при этом воркеры не
+    обрабатывают одни и те же скважины.
+
+    """
+
+    while True:
+        try:
+            reaped: int = await reap_removed_wells()
+        except (OSError, apg.PostgresError):
+            reaped = 0
+
+        if reaped < REAPER_BATCH_SIZE:
+            await asyncio.sleep(REAPER_INTERVAL)
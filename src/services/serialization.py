@@ -0,0 +1,134 @@
+"""
+Содержит функции для сериализации ответов с траекториями скважин.
+
+Траектории передаются по частям: массивы NumPy сериализуются
+напрямую через orjson, минуя списки из объектов float и общий
+кодировщик FastAPI, а тело ответа не собирается в одну строку
+целиком.
+
+"""
+
+from typing import Any, Callable, Iterable, Iterator
+
+import numpy as np
+import orjson
+
+from services.trajectory import MDGrid, Trajectory
+
+
+# Количество точек, сериализуемых за один шаг. Ответ отдаётся частями
+# примерно по 20 байт на точку.
+STREAM_CHUNK_SIZE: int = 65536
+
+
+def _dump_array(
+        chunks: Iterable[np.ndarray[Any, np.dtype[np.float64]]]
+) -> Iterator[bytes]:
+    """
+    Сериализует последовательные части одномерного массива в один
+    JSON-список.
+
+    """
+
+    yield b'['
+
+    separator: bytes = b''
+
+    for values in chunks:
+        if not len(values):
+            continue
+
+        chunk: bytes = orjson.dumps(
+            np.ascontiguousarray(values, dtype=np.float64),
+            option=orjson.OPT_SERIALIZE_NUMPY
+        )
+
+        # Квадратные скобки каждой части отбрасываются, чтобы части
+        # складывались в один список.
+        yield separator + chunk[1:-1]
+        separator = b','
+
+    yield b']'
+
+
+def _stream_columns(
+        name: str,
+        head: tuple[float, float],
+        columns: dict[str, Callable[[], Iterator[np.ndarray]]]
+) -> Iterator[bytes]:
+    """
+    Сериализует скважину в ответ формата WellOutputSchema. Каждый
+    столбец траектории (MD, X, Y, Z) задаётся функцией, которая
+    возвращает его части по порядку.
+
+    """
+
+    yield b'{"data":' + orjson.dumps({'name': name, 'head': list(head)})[:-1]
+
+    for key, chunks in columns.items():
+        yield b',"' + key.encode() + b'":'
+        yield from _dump_array(chunks())
+
+    yield b'},"error":null}'
+
+
+def stream_well(name: str, head: tuple[float, float],
+                trajectory: Trajectory,
+                chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Сериализует скважину с траекторией в ответ формата
+    WellOutputSchema:
+
+    {
+        "data": {
+            "name": "well_name",
+            "head": [x, y],
+            "MD": [...],
+            "X": [...],
+            "Y": [...],
+            "Z": [...]
+        },
+        "error": null
+    }
+
+    """
+
+    def column(values: np.ndarray) -> Callable[[], Iterator[np.ndarray]]:
+        return lambda: (
+            values[start:start + chunk_size]
+            for start in range(0, len(values), chunk_size)
+        )
+
+    yield from _stream_columns(name, head, {
+        'MD': column(trajectory.md),
+        'X': column(trajectory.x),
+        'Y': column(trajectory.y),
+        'Z': column(trajectory.z)
+    })
+
+
+def stream_resampled(name: str, head: tuple[float, float],
+                     trajectory: Trajectory, grid: MDGrid,
+                     chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Сериализует траекторию, пересчитанную на глубины сетки grid, в
+    ответ того же формата, что и stream_well.
+
+    Координаты вычисляются по частям из chunk_size глубин отдельно для
+    каждого столбца, поэтому объём памяти не зависит от размера сетки.
+
+    """
+
+    def md() -> Iterator[np.ndarray]:
+        for start in range(0, len(grid), chunk_size):
+            yield grid.md(start, start + chunk_size)
+
+    def column(axis: int) -> Callable[[], Iterator[np.ndarray]]:
+        return lambda: (trajectory.at(values)[:, axis] for values in md())
+
+    yield from _stream_columns(name, head, {
+        'MD': md,
+        'X': column(0),
+        'Y': column(1),
+        'Z': column(2)
+    })
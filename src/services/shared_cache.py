@@ -0,0 +1,263 @@
+"""
+Содержит общий для всех воркеров кэш декодированных траекторий
+скважин.
+
+Каждая скважина записывается одним воркером в файл каталога
+TRAJECTORY_SHARED_CACHE_DIR (по умолчанию /dev/shm, то есть в
+разделяемую память), а остальные воркеры отображают этот файл в
+память через np.memmap только для чтения. Поэтому траектория
+декодируется один раз на машину и занимает память один раз, сколько
+бы воркеров её ни использовали.
+
+Вытеснение и удаление записей согласуются через файловую систему:
+запись видна воркерам только после переименования готового файла,
+давно не использованные файлы удаляются под блокировкой каталога,
+а удалённые скважины удаляются из кэша каждым воркером по
+уведомлению well_removed (см. services.well). Скважину, траектория
+которой продолжена (см. well_append), удаляет из кэша воркер,
+добавивший узлы, и каждый воркер по уведомлению well_appended.
+Уведомления, отправленные, пока воркер переподключался к БД,
+теряются, поэтому после переподключения кэш очищается целиком.
+
+"""
+
+import fcntl
+import json
+import os
+import struct
+from typing import Any
+from uuid import UUID
+
+import numpy as np
+
+from config import TRAJECTORY_SHARED_CACHE_DIR, TRAJECTORY_SHARED_CACHE_SIZE
+from services.trajectory import Trajectory, Well
+
+
+# Заголовок файла записи: сигнатура, количество строк и столбцов
+# массива и длина JSON с именем и устьем скважины, который следует за
+# заголовком. Массив float64 начинается с ближайшего кратного 8
+# смещения после JSON.
+HEADER: struct.Struct = struct.Struct('<4sIII')
+MAGIC: bytes = b'WTRJ'
+
+EXTENSION: str = '.trj'
+
+
+class SharedTrajectoryCache:
+    """
+    Кэш скважин в файлах, общих для всех воркеров машины, с
+    ограничением суммарного объёма файлов в байтах.
+
+    Файл записи содержит столбцы MD, X, Y, Z, значимость узлов (если
+    она вычислена) и приращения slopes, поэтому отображённая скважина
+    готова для well_at без вычислений.
+
+    Время изменения файла обновляется при каждом чтении записи, и при
+    превышении лимита удаляются файлы, которые дольше всего не
+    читались. Воркеры, уже отобразившие удалённый файл, продолжают
+    им пользоваться, пока не освободят его, поэтому лимит может
+    ненадолго превышаться.
+
+    Кэш отключён, если max_bytes == 0.
+
+    Методы, кроме invalidate, читают каталог или ждут его блокировку,
+    поэтому из цикла событий вызываются через asyncio.to_thread.
+
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._is_ready = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, uuid: UUID) -> str:
+        return os.path.join(self._directory, f'{uuid}{EXTENSION}')
+
+    def _prepare(self) -> None:
+        # Каталог создаётся при первой записи, то есть уже в процессе
+        # воркера.
+        if not self._is_ready:
+            os.makedirs(self._directory, exist_ok=True)
+            self._is_ready = True
+
+    def get(self, uuid: UUID) -> Well | None:
+        if not self._max_bytes:
+            return None
+
+        path: str = self._path(uuid)
+
+        try:
+            with open(path, 'rb') as file:
+                magic, rows, nodes, meta_size = HEADER.unpack(
+                    file.read(HEADER.size)
+                )
+                meta: dict[str, Any] = json.loads(file.read(meta_size))
+
+            values: np.ndarray = np.memmap(
+                path,
+                dtype=np.float64,
+                mode='r',
+                offset=_data_offset(meta_size),
+                shape=(rows, nodes)
+            )
+            os.utime(path)
+        except (FileNotFoundError, struct.error, ValueError):
+            self.misses += 1
+            return None
+
+        if magic != MAGIC:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        columns: int = rows - 3
+
+        return Well(
+            name=meta['name'],
+            head=tuple(meta['head']),
+            trajectory=Trajectory(
+                md=values[0],
+                x=values[1],
+                y=values[2],
+                z=values[3],
+                significance=values[4] if columns > 4 else None,
+                slopes=values[columns:].T
+            )
+        )
+
+    def put(self, uuid: UUID, well: Well) -> Well:
+        """
+        Записывает скважину (с вычисленными slopes) в кэш и возвращает
+        её копию, отображённую из файла записи, чтобы процесс не держал
+        собственную копию траектории. Если скважина не помещается в
+        кэш, возвращается сама well.
+
+        """
+
+        trajectory: Trajectory = well.trajectory
+        meta: bytes = json.dumps(
+            {'name': well.name, 'head': list(well.head)}
+        ).encode()
+        values: np.ndarray = np.vstack(
+            (trajectory.packed(), trajectory.slopes.T)
+        )
+
+        if not self._max_bytes or values.nbytes > self._max_bytes:
+            return well
+
+        self._prepare()
+        path: str = self._path(uuid)
+        tmp_path: str = f'{path}.{os.getpid()}.tmp'
+
+        # Файл записывается под временным именем и переименовывается,
+        # поэтому другие воркеры не видят его частично записанным.
+        with open(tmp_path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, *values.shape, len(meta)))
+            file.write(meta)
+            file.write(
+                bytes(_data_offset(len(meta)) - HEADER.size - len(meta))
+            )
+            file.write(np.ascontiguousarray(values).tobytes())
+
+        os.replace(tmp_path, path)
+        self._evict()
+
+        return self.get(uuid) or well
+
+    def _evict(self) -> None:
+        with open(os.path.join(self._directory, '.lock'), 'wb') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            entries: list[os.stat_result] = []
+            paths: list[str] = []
+
+            for entry in os.scandir(self._directory):
+                if not entry.name.endswith(EXTENSION):
+                    continue
+
+                try:
+                    entries.append(entry.stat())
+                except FileNotFoundError:
+                    continue
+
+                paths.append(entry.path)
+
+            size_bytes: int = sum(stat.st_size for stat in entries)
+
+            for i in sorted(range(len(entries)),
+                            key=lambda i: entries[i].st_mtime_ns):
+                if size_bytes <= self._max_bytes:
+                    break
+
+                try:
+                    os.unlink(paths[i])
+                except FileNotFoundError:
+                    pass
+                else:
+                    self.evictions += 1
+
+                size_bytes -= entries[i].st_size
+
+    def invalidate(self, uuid: UUID) -> None:
+        if not self._max_bytes:
+            return
+
+        try:
+            os.unlink(self._path(uuid))
+        except FileNotFoundError:
+            pass
+
+    def clear(self) -> None:
+        """
+        Удаляет все записи кэша. Вызывается, когда уведомления об
+        удалении и продолжении скважин могли быть пропущены.
+
+        """
+
+        if not self._max_bytes or not os.path.isdir(self._directory):
+            return
+
+        with open(os.path.join(self._directory, '.lock'), 'wb') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+            for entry in os.scandir(self._directory):
+                if not entry.name.endswith(EXTENSION):
+                    continue
+
+                try:
+                    os.unlink(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    def stats(self) -> dict[str, Any]:
+        sizes: list[int] = []
+
+        if self._max_bytes and os.path.isdir(self._directory):
+            for entry in os.scandir(self._directory):
+                if entry.name.endswith(EXTENSION):
+                    try:
+                        sizes.append(entry.stat().st_size)
+                    except FileNotFoundError:
+                        pass
+
+        return {
+            'entries': len(sizes),
+            'size_bytes': sum(sizes),
+            'max_bytes': self._max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
+
+def _data_offset(meta_size: int) -> int:
+    return (HEADER.size + meta_size + 7) // 8 * 8
+
+
+shared_trajectory_cache: SharedTrajectoryCache = SharedTrajectoryCache(
+    TRAJECTORY_SHARED_CACHE_DIR,
+    TRAJECTORY_SHARED_CACHE_SIZE
+)
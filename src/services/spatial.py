@@ -0,0 +1,614 @@
+"""
+Содержит пространственный индекс отрезков траектории скважины.
+
+"""
+
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from services.trajectory import Trajectory
+
+
+# Количество отрезков траектории в одном листе индекса.
+SEGMENT_INDEX_LEAF_SIZE: int = 8
+
+# Количество пар отрезков, расстояния между которыми вычисляются за
+# один шаг (см. SegmentIndex.separation).
+SEPARATION_BATCH_SIZE: int = 65536
+
+
+def box_distance(
+        points: np.ndarray[Any, np.dtype[np.float64]],
+        lower: np.ndarray[Any, np.dtype[np.float64]],
+        upper: np.ndarray[Any, np.dtype[np.float64]]
+) -> tuple[np.ndarray[Any, np.dtype[np.float64]],
+           np.ndarray[Any, np.dtype[np.float64]]]:
+    """
+    Возвращает наименьшее и наибольшее расстояния от точек points
+    формы (3, M) до параллелепипедов [lower, upper] той же формы.
+
+    """
+
+    below: np.ndarray[Any, np.dtype[np.float64]] = np.maximum(
+        np.maximum(lower - points, points - upper), 0.
+    )
+    beyond: np.ndarray[Any, np.dtype[np.float64]] = np.maximum(
+        np.abs(points - lower), np.abs(points - upper)
+    )
+
+    return (
+        np.sqrt(np.einsum('ij,ij->j', below, below)),
+        np.sqrt(np.einsum('ij,ij->j', beyond, beyond))
+    )
+
+
+def segment_distance(
+        points: np.ndarray[Any, np.dtype[np.float64]],
+        start: np.ndarray[Any, np.dtype[np.float64]],
+        end: np.ndarray[Any, np.dtype[np.float64]]
+) -> tuple[np.ndarray[Any, np.dtype[np.float64]],
+           np.ndarray[Any, np.dtype[np.float64]]]:
+    """
+    Возвращает расстояния от точек points формы (3, M) до отрезков
+    [start, end] той же формы и положение ближайших точек отрезков
+    (0 - start, 1 - end).
+
+    """
+
+    direction: np.ndarray[Any, np.dtype[np.float64]] = end - start
+    offset: np.ndarray[Any, np.dtype[np.float64]] = points - start
+    length: np.ndarray[Any, np.dtype[np.float64]] = np.einsum(
+        'ij,ij->j', direction, direction
+    )
+    t: np.ndarray[Any, np.dtype[np.float64]] = np.clip(
+        np.einsum('ij,ij->j', offset, direction)
+        / np.where(length > 0., length, 1.),
+        0.,
+        1.
+    )
+    offset -= direction * t
+
+    return np.sqrt(np.einsum('ij,ij->j', offset, offset)), t
+
+
+def segments_distance(
+        start: np.ndarray[Any, np.dtype[np.float64]],
+        end: np.ndarray[Any, np.dtype[np.float64]],
+        other_start: np.ndarray[Any, np.dtype[np.float64]],
+        other_end: np.ndarray[Any, np.dtype[np.float64]]
+) -> tuple[np.ndarray[Any, np.dtype[np.float64]],
+           np.ndarray[Any, np.dtype[np.float64]],
+           np.ndarray[Any, np.dtype[np.float64]]]:
+    """
+    Возвращает расстояния между отрезками [start, end] и [other_start,
+    other_end] формы (3, M) и положение ближайших точек на каждом из
+    них (0 - начало отрезка, 1 - конец).
+
+    Вырожденные отрезки (точки) обрабатываются отдельно.
+
+    """
+
+    direction: np.ndarray[Any, np.dtype[np.float64]] = end - start
+    other_direction: np.ndarray[Any, np.dtype[np.float64]] = (
+        other_end - other_start
+    )
+    offset: np.ndarray[Any, np.dtype[np.float64]] = start - other_start
+
+    a = np.einsum('ij,ij->j', direction, direction)
+    b = np.einsum('ij,ij->j', direction, other_direction)
+    c = np.einsum('ij,ij->j', direction, offset)
+    e = np.einsum('ij,ij->j', other_direction, other_direction)
+    f = np.einsum('ij,ij->j', other_direction, offset)
+
+    degenerate: np.ndarray[Any, np.dtype[np.bool_]] = a <= 0.
+    other_degenerate: np.ndarray[Any, np.dtype[np.bool_]] = e <= 0.
+    a_safe = np.where(degenerate, 1., a)
+    e_safe = np.where(other_degenerate, 1., e)
+    denominator = a * e - b * b
+
+    # Ближайшая точка прямой первого отрезка к прямой второго (для
+    # параллельных отрезков - начало первого).
+    s = np.where(
+        denominator > 0.,
+        np.clip((b * f - c * e)
+                / np.where(denominator > 0., denominator, 1.), 0., 1.),
+        0.
+    )
+    t = (b * s + f) / e_safe
+
+    # Если точка второго отрезка вышла за его концы, она переносится
+    # на ближайший конец, а точка первого пересчитывается.
+    s = np.where(t < 0., np.clip(-c / a_safe, 0., 1.), s)
+    s = np.where(t > 1., np.clip((b - c) / a_safe, 0., 1.), s)
+    t = np.clip(t, 0., 1.)
+
+    s = np.where(degenerate, 0., s)
+    t = np.where(degenerate, np.clip(f / e_safe, 0., 1.), t)
+    s = np.where(other_degenerate & ~degenerate,
+                 np.clip(-c / a_safe, 0., 1.), s)
+    t = np.where(other_degenerate, 0., t)
+
+    offset += direction * s - other_direction * t
+
+    return np.sqrt(np.einsum('ij,ij->j', offset, offset)), s, t
+
+
+def _leaf_boxes(
+        nodes: np.ndarray[Any, np.dtype[np.float64]]
+) -> tuple[np.ndarray[Any, np.dtype[np.float64]],
+           np.ndarray[Any, np.dtype[np.float64]]]:
+    """
+    Возвращает параллелепипеды листьев SegmentIndex для ломаной nodes
+    формы (3, N).
+
+    """
+
+    leaves: int = -(-max(nodes.shape[1] - 1, 1) // SEGMENT_INDEX_LEAF_SIZE)
+
+    # Траектория дополняется копиями последнего узла до целого
+    # числа листьев. Соседние листья имеют общий узел.
+    padded: np.ndarray[Any, np.dtype[np.float64]] = np.pad(
+        nodes,
+        ((0, 0), (0, leaves * SEGMENT_INDEX_LEAF_SIZE + 1 - nodes.shape[1])),
+        mode='edge'
+    )
+    blocks: np.ndarray[Any, np.dtype[np.float64]] = padded[
+        :, :-1
+    ].reshape(3, leaves, SEGMENT_INDEX_LEAF_SIZE)
+    last: np.ndarray[Any, np.dtype[np.float64]] = padded[
+        :, SEGMENT_INDEX_LEAF_SIZE::SEGMENT_INDEX_LEAF_SIZE
+    ]
+
+    return (np.minimum(blocks.min(axis=2), last),
+            np.maximum(blocks.max(axis=2), last))
+
+
+def _levels(
+        leaf_lower: np.ndarray[Any, np.dtype[np.float64]],
+        leaf_upper: np.ndarray[Any, np.dtype[np.float64]]
+) -> tuple[list[np.ndarray[Any, np.dtype[np.float64]]],
+           list[np.ndarray[Any, np.dtype[np.float64]]]]:
+    """
+    Собирает уровни SegmentIndex над листьями от корня к листьям.
+
+    """
+
+    lower: list[np.ndarray[Any, np.dtype[np.float64]]] = [leaf_lower]
+    upper: list[np.ndarray[Any, np.dtype[np.float64]]] = [leaf_upper]
+
+    while lower[0].shape[1] > 1:
+        size: int = lower[0].shape[1]
+        # Нечётный последний узел уровня переходит выше без пары.
+        pair: slice = slice(0, size - size % 2)
+        lower.insert(0, np.hstack((
+            np.minimum(lower[0][:, pair][:, ::2], lower[0][:, pair][:, 1::2]),
+            lower[0][:, size - size % 2:]
+        )))
+        upper.insert(0, np.hstack((
+            np.maximum(upper[0][:, pair][:, ::2], upper[0][:, pair][:, 1::2]),
+            upper[0][:, size - size % 2:]
+        )))
+
+    return lower, upper
+
+
+@dataclass(frozen=True, slots=True)
+class SegmentIndex:
+    """
+    Иерархия ограничивающих параллелепипедов отрезков траектории.
+
+    Листья содержат по SEGMENT_INDEX_LEAF_SIZE соседних отрезков, а
+    каждый узел уровня level - два узла следующего уровня (2i и
+    2i + 1). lower[0] и upper[0] - параллелепипед всей траектории.
+
+    """
+
+    trajectory: Trajectory
+    lower: list[np.ndarray[Any, np.dtype[np.float64]]]
+    upper: list[np.ndarray[Any, np.dtype[np.float64]]]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(level.nbytes for level in self.lower + self.upper)
+
+    @classmethod
+    def build(cls, trajectory: Trajectory) -> 'SegmentIndex':
+        lower, upper = _leaf_boxes(
+            np.vstack((trajectory.x, trajectory.y, trajectory.z))
+        )
+
+        return cls(trajectory, *_levels(lower, upper))
+
+    def extend(self, trajectory: Trajectory) -> 'SegmentIndex':
+        """
+        Возвращает индекс траектории trajectory, которая продолжает
+        проиндексированную траекторию (см. Trajectory.extend).
+
+        Параллелепипеды заполненных листьев переиспользуются, заново
+        вычисляются только последний лист и листья новых отрезков, а
+        верхние уровни собираются из листьев.
+
+        """
+
+        kept: int = self.lower[-1].shape[1] - 1
+        start: int = kept * SEGMENT_INDEX_LEAF_SIZE
+        lower, upper = _leaf_boxes(np.vstack((
+            trajectory.x[start:], trajectory.y[start:], trajectory.z[start:]
+        )))
+
+        return SegmentIndex(
+            trajectory,
+            *_levels(np.hstack((self.lower[-1][:, :kept], lower)),
+                     np.hstack((self.upper[-1][:, :kept], upper)))
+        )
+
+    def nearest(
+            self,
+            points: np.ndarray[Any, np.dtype[np.float64]]
+    ) -> tuple[np.ndarray[Any, np.dtype[np.float64]],
+               np.ndarray[Any, np.dtype[np.intp]],
+               np.ndarray[Any, np.dtype[np.float64]]]:
+        """
+        Находит ближайшие к точкам points формы (3, M) точки
+        траектории.
+
+        Все точки спускаются по индексу одновременно: на каждом уровне
+        отбрасываются узлы, наименьшее расстояние до которых больше
+        наибольшего расстояния до какого-либо другого узла уровня.
+
+        Возвращает расстояния, номера ближайших отрезков и положение
+        ближайших точек на них (0 - начало отрезка, 1 - конец).
+
+        """
+
+        count: int = points.shape[1]
+        query: np.ndarray[Any, np.dtype[np.intp]] = np.arange(count)
+        node: np.ndarray[Any, np.dtype[np.intp]] = np.zeros(count, dtype=np.intp)
+
+        for level in range(1, len(self.lower)):
+            query = np.repeat(query, 2)
+            node = (np.repeat(node, 2) * 2) + np.tile([0, 1], len(node))
+            exists: np.ndarray[Any, np.dtype[np.bool_]] = (
+                node < self.lower[level].shape[1]
+            )
+            query, node = query[exists], node[exists]
+
+            query, node = self._prune(
+                points, query, node, self.lower[level], self.upper[level]
+            )
+
+        # Точное расстояние до всех отрезков оставшихся листьев.
+        segments: np.ndarray[Any, np.dtype[np.intp]] = (
+            np.repeat(node, SEGMENT_INDEX_LEAF_SIZE) * SEGMENT_INDEX_LEAF_SIZE
+            + np.tile(np.arange(SEGMENT_INDEX_LEAF_SIZE), len(node))
+        )
+        query = np.repeat(query, SEGMENT_INDEX_LEAF_SIZE)
+        last_segment: int = max(len(self.trajectory) - 2, 0)
+        exists: np.ndarray[Any, np.dtype[np.bool_]] = segments <= last_segment
+        query, segments = query[exists], segments[exists]
+
+        distance, t = segment_distance(
+            points[:, query],
+            self._points(segments),
+            self._points(self._segment_end(segments))
+        )
+
+        # Для каждой точки выбирается отрезок с наименьшим расстоянием.
+        order: np.ndarray[Any, np.dtype[np.intp]] = np.lexsort(
+            (distance, query)
+        )
+        first: np.ndarray[Any, np.dtype[np.intp]] = order[
+            np.r_[True, query[order][1:] != query[order][:-1]]
+        ]
+
+        return distance[first], segments[first], t[first]
+
+    def separation(
+            self,
+            other: 'SegmentIndex',
+            max_distance: float = np.inf
+    ) -> tuple[float, int, float, int, float] | None:
+        """
+        Находит наименьшее расстояние между траекторией и траекторией
+        индекса other, если оно не больше max_distance.
+
+        Оба индекса спускаются одновременно по парам узлов: пары,
+        наименьшее расстояние между параллелепипедами которых больше
+        верхней оценки расстояния между траекториями, отбрасываются.
+        Начальная оценка получается спуском по одной паре с
+        наименьшим расстоянием, а затем уточняется по первым узлам
+        траекторий в каждой паре. Для оставшихся пар листьев
+        расстояния между отрезками вычисляются частями примерно по
+        SEPARATION_BATCH_SIZE пар отрезков в порядке возрастания
+        нижней оценки.
+
+        Возвращает расстояние и для каждой из траекторий номер
+        ближайшего отрезка и положение ближайшей точки на нём или None,
+        если траектории дальше max_distance.
+
+        """
+
+        level: int = 0
+        other_level: int = 0
+        node: np.ndarray[Any, np.dtype[np.intp]] = np.zeros(1, dtype=np.intp)
+        other_node: np.ndarray[Any, np.dtype[np.intp]] = np.zeros(
+            1, dtype=np.intp
+        )
+
+        if self._gap(level, node, other, other_level, other_node)[0] \
+                > max_distance:
+            return None
+
+        found: tuple[float, int, float, int, float] = self._probe(other)
+        best: float = min(found[0], max_distance)
+
+        while True:
+            near: np.ndarray[Any, np.dtype[np.float64]] = self._gap(
+                level, node, other, other_level, other_node
+            )
+            best = min(best, self._upper_bound(
+                level, node, other, other_level, other_node
+            ))
+            kept: np.ndarray[Any, np.dtype[np.bool_]] = near <= best
+            near, node, other_node = near[kept], node[kept], other_node[kept]
+
+            if (level == len(self.lower) - 1
+                    and other_level == len(other.lower) - 1):
+                break
+
+            level, node, other_level, other_node = self._expand(
+                level, node, other, other_level, other_node
+            )
+
+        order: np.ndarray[Any, np.dtype[np.intp]] = np.argsort(near)
+        near, node, other_node = near[order], node[order], other_node[order]
+        batch_size: int = max(
+            SEPARATION_BATCH_SIZE // SEGMENT_INDEX_LEAF_SIZE ** 2, 1
+        )
+
+        for start in range(0, len(node), batch_size):
+            if near[start] > best:
+                break
+
+            batch: slice = slice(start, start + batch_size)
+            closest: tuple[float, int, float, int, float] | None = (
+                self._leaf_distance(node[batch], other, other_node[batch],
+                                    best)
+            )
+
+            if closest is not None and closest[0] < found[0]:
+                found = closest
+                best = min(best, found[0])
+
+        return found if found[0] <= max_distance else None
+
+    def _probe(self,
+               other: 'SegmentIndex') -> tuple[float, int, float, int, float]:
+        """
+        Спускается по обоим индексам, выбирая на каждом уровне пару
+        узлов с наименьшим расстоянием между параллелепипедами, и
+        возвращает расстояние между отрезками найденной пары листьев.
+
+        """
+
+        level: int = 0
+        other_level: int = 0
+        node: np.ndarray[Any, np.dtype[np.intp]] = np.zeros(1, dtype=np.intp)
+        other_node: np.ndarray[Any, np.dtype[np.intp]] = np.zeros(
+            1, dtype=np.intp
+        )
+
+        while (level < len(self.lower) - 1
+               or other_level < len(other.lower) - 1):
+            level, node, other_level, other_node = self._expand(
+                level, node, other, other_level, other_node
+            )
+            closest: int = int(np.argmin(self._gap(
+                level, node, other, other_level, other_node
+            )))
+            node = node[closest:closest + 1]
+            other_node = other_node[closest:closest + 1]
+
+        return self._leaf_distance(node, other, other_node)
+
+    def _expand(
+            self,
+            level: int,
+            node: np.ndarray[Any, np.dtype[np.intp]],
+            other: 'SegmentIndex',
+            other_level: int,
+            other_node: np.ndarray[Any, np.dtype[np.intp]]
+    ) -> tuple[int, np.ndarray[Any, np.dtype[np.intp]],
+               int, np.ndarray[Any, np.dtype[np.intp]]]:
+        # Каждая пара узлов заменяется всеми парами их потомков.
+        children, level = self._children(node, level)
+        other_children, other_level = other._children(other_node, other_level)
+        children, other_children = np.broadcast_arrays(
+            children[:, :, None], other_children[:, None, :]
+        )
+
+        return (level, children.reshape(-1),
+                other_level, other_children.reshape(-1))
+
+    def _points(
+            self,
+            nodes: np.ndarray[Any, np.dtype[np.intp]]
+    ) -> np.ndarray[Any, np.dtype[np.float64]]:
+        return np.stack((self.trajectory.x[nodes], self.trajectory.y[nodes],
+                         self.trajectory.z[nodes]))
+
+    def _segment_end(
+            self,
+            segments: np.ndarray[Any, np.dtype[np.intp]]
+    ) -> np.ndarray[Any, np.dtype[np.intp]]:
+        return np.minimum(segments + 1, len(self.trajectory) - 1)
+
+    def _children(
+            self,
+            node: np.ndarray[Any, np.dtype[np.intp]],
+            level: int
+    ) -> tuple[np.ndarray[Any, np.dtype[np.intp]], int]:
+        """
+        Возвращает потомков каждого узла уровня level в виде массива
+        формы (len(node), 2) и их уровень. Лист остаётся на месте, а
+        отсутствующий второй потомок заменяется первым.
+
+        """
+
+        if level == len(self.lower) - 1:
+            return node[:, None], level
+
+        children: np.ndarray[Any, np.dtype[np.intp]] = (
+            node[:, None] * 2 + np.array([0, 1])
+        )
+
+        return np.where(
+            children < self.lower[level + 1].shape[1],
+            children,
+            children[:, :1]
+        ), level + 1
+
+    def _first_node(
+            self,
+            node: np.ndarray[Any, np.dtype[np.intp]],
+            level: int
+    ) -> np.ndarray[Any, np.dtype[np.intp]]:
+        # Первый узел траектории, покрываемый узлом индекса.
+        return np.minimum(
+            node * SEGMENT_INDEX_LEAF_SIZE << (len(self.lower) - 1 - level),
+            len(self.trajectory) - 1
+        )
+
+    def _gap(
+            self,
+            level: int,
+            node: np.ndarray[Any, np.dtype[np.intp]],
+            other: 'SegmentIndex',
+            other_level: int,
+            other_node: np.ndarray[Any, np.dtype[np.intp]]
+    ) -> np.ndarray[Any, np.dtype[np.float64]]:
+        # Наименьшие расстояния между параллелепипедами пар узлов.
+        gap: np.ndarray[Any, np.dtype[np.float64]] = np.maximum(
+            np.maximum(
+                self.lower[level][:, node]
+                - other.upper[other_level][:, other_node],
+                other.lower[other_level][:, other_node]
+                - self.upper[level][:, node]
+            ),
+            0.
+        )
+
+        return np.sqrt(np.einsum('ij,ij->j', gap, gap))
+
+    def _upper_bound(
+            self,
+            level: int,
+            node: np.ndarray[Any, np.dtype[np.intp]],
+            other: 'SegmentIndex',
+            other_level: int,
+            other_node: np.ndarray[Any, np.dtype[np.intp]]
+    ) -> float:
+        # Наименьшее расстояние между первыми узлами траекторий,
+        # покрываемыми узлами пар.
+        offset: np.ndarray[Any, np.dtype[np.float64]] = (
+            self._points(self._first_node(node, level))
+            - other._points(other._first_node(other_node, other_level))
+        )
+
+        return float(np.sqrt(np.einsum('ij,ij->j', offset, offset).min()))
+
+    def _leaf_distance(
+            self,
+            node: np.ndarray[Any, np.dtype[np.intp]],
+            other: 'SegmentIndex',
+            other_node: np.ndarray[Any, np.dtype[np.intp]],
+            best: float = np.inf
+    ) -> tuple[float, int, float, int, float] | None:
+        """
+        Возвращает наименьшее расстояние между отрезками пар листьев,
+        если оно не больше best. Пары отрезков, параллелепипеды которых
+        дальше best, пропускаются.
+
+        """
+
+        nodes: np.ndarray[Any, np.dtype[np.float64]] = self._leaf_nodes(node)
+        other_nodes: np.ndarray[Any, np.dtype[np.float64]] = (
+            other._leaf_nodes(other_node)
+        )
+
+        # Отрезки листа сравниваются со всеми отрезками листа пары:
+        # массивы имеют форму (3, пары, отрезки, отрезки пары).
+        start, end = nodes[:, :, :-1, None], nodes[:, :, 1:, None]
+        other_start = other_nodes[:, :, None, :-1]
+        other_end = other_nodes[:, :, None, 1:]
+
+        gap: np.ndarray[Any, np.dtype[np.float64]] = np.maximum(
+            np.maximum(
+                np.minimum(start, end) - np.maximum(other_start, other_end),
+                np.minimum(other_start, other_end) - np.maximum(start, end)
+            ),
+            0.
+        )
+        kept: np.ndarray[Any, np.dtype[np.intp]] = np.flatnonzero(
+            np.einsum('i...,i...->...', gap, gap) <= best * best
+        )
+
+        if not len(kept):
+            return None
+
+        pair, i, j = np.unravel_index(kept, gap.shape[1:])
+        distance, s, t = segments_distance(
+            nodes[:, pair, i], nodes[:, pair, i + 1],
+            other_nodes[:, pair, j], other_nodes[:, pair, j + 1]
+        )
+        closest: int = int(np.argmin(distance))
+
+        return (float(distance[closest]),
+                *self._position(node[pair[closest]], i[closest], s[closest]),
+                *other._position(other_node[pair[closest]], j[closest],
+                                 t[closest]))
+
+    def _leaf_nodes(
+            self,
+            node: np.ndarray[Any, np.dtype[np.intp]]
+    ) -> np.ndarray[Any, np.dtype[np.float64]]:
+        # Узлы траектории листьев формы (3, листья, размер листа + 1).
+        # Листья за концом траектории дополняются её последним узлом.
+        return self._points(np.minimum(
+            node[:, None] * SEGMENT_INDEX_LEAF_SIZE
+            + np.arange(SEGMENT_INDEX_LEAF_SIZE + 1),
+            len(self.trajectory) - 1
+        ))
+
+    def _position(self, node: int, segment: int,
+                  position: float) -> tuple[int, float]:
+        # Номер отрезка траектории и положение точки на нём. Точки
+        # на отрезках нулевой длины за концом траектории переносятся
+        # в конец последнего отрезка.
+        segment = int(node) * SEGMENT_INDEX_LEAF_SIZE + int(segment)
+        last: int = max(len(self.trajectory) - 2, 0)
+
+        if segment > last:
+            return last, 1.
+
+        return segment, float(position)
+
+    @staticmethod
+    def _prune(
+            points: np.ndarray[Any, np.dtype[np.float64]],
+            query: np.ndarray[Any, np.dtype[np.intp]],
+            node: np.ndarray[Any, np.dtype[np.intp]],
+            lower: np.ndarray[Any, np.dtype[np.float64]],
+            upper: np.ndarray[Any, np.dtype[np.float64]]
+    ) -> tuple[np.ndarray[Any, np.dtype[np.intp]],
+               np.ndarray[Any, np.dtype[np.intp]]]:
+        near, far = box_distance(points[:, query], lower[:, node], upper[:, node])
+        bound: np.ndarray[Any, np.dtype[np.float64]] = np.full(
+            points.shape[1], np.inf
+        )
+        np.minimum.at(bound, query, far)
+        kept: np.ndarray[Any, np.dtype[np.bool_]] = near <= bound[query]
+
+        return query[kept], node[kept]
@@ -0,0 +1,27 @@
+"""
+Содержит хранилища скважин.
+
+Используемое хранилище выбирается переменной среды WELL_STORAGE:
+
+tables: отдельная таблица well_{uuid} для каждой скважины;
+
+partitioned: единая таблица well, секционированная по хэшу pk_id;
+
+local: файлы на локальном диске и реестр в SQLite.
+
+"""
+
+from config import WELL_STORAGE
+from services.storage.base import WellStorage
+from services.storage.local import LocalStorage
+from services.storage.partitioned import PartitionedStorage
+from services.storage.tables import TablePerWellStorage
+
+
+STORAGES: dict[str, type[WellStorage]] = {
+    'tables': TablePerWellStorage,
+    'partitioned': PartitionedStorage,
+    'local': LocalStorage
+}
+
+storage: WellStorage = STORAGES[WELL_STORAGE]()
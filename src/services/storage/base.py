@@ -0,0 +1,330 @@
+"""
+Содержит интерфейс хранилища скважин.
+
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, NamedTuple
+from uuid import UUID, uuid4
+
+import asyncpg as apg
+import asyncpg.exceptions as apg_exc
+
+import services.exceptions as exc
+from config import TRAJECTORY_CHUNK_SIZE
+from database import db_instance
+from services.trajectory import Trajectory, Well
+
+
+# Условие на то, что скважина с идентификатором $1 не помечена
+# удалённой. Данные удалённых скважин остаются в хранилищах до вызова
+# reap_wells, поэтому запросы к ним должны содержать это условие.
+ALIVE_CONDITION: str = '''EXISTS (
+    SELECT FROM well_registry WHERE pk_id = $1 AND removed_at IS NULL
+)'''
+
+
+class PackedWell(NamedTuple):
+    """
+    Скважина, подготовленная к записи через COPY.
+
+    """
+
+    uuid: UUID
+    name: str
+    head: tuple[float, float]
+    nodes: int
+    md_min: list[float]
+    md_max: list[float]
+    chunks: list[bytes]
+    bounds: list[float]
+
+
+class WellStorage(ABC):
+    """
+    Хранилище скважин, через которое функции из services.well работают
+    с БД.
+
+    Методы бросают исключения из services.exceptions, если скважина
+    не найдена или уже существует.
+
+    Имя, устье и метаданные скважин всех хранилищ находятся в общем
+    реестре well_registry, поэтому работа с ними реализована здесь.
+
+    """
+
+    # Значение столбца storage в well_registry для скважин хранилища.
+    name: str
+
+    @abstractmethod
+    async def create(self, name: str, head: tuple[float, float],
+                     trajectory: Trajectory) -> UUID:
+        """
+        Сохраняет новую скважину и возвращает её идентификатор.
+
+        """
+
+    @abstractmethod
+    async def create_many(
+            self,
+            wells: list[tuple[str, tuple[float, float], Trajectory]]
+    ) -> list[UUID | None]:
+        """
+        Сохраняет несколько скважин в одной транзакции и возвращает их
+        идентификаторы в том же порядке. Для скважин, имя которых уже
+        занято (в том числе другой скважиной из wells), возвращается
+        None.
+
+        """
+
+    async def remove(self, uuid: UUID) -> None:
+        """
+        Помечает скважину удалённой и уведомляет об этом канал
+        well_removed.
+
+        """
+
+        is_deleted: bool = await db_instance.fetch_val(
+            'SELECT delete_well($1)',
+            uuid
+        )
+
+        if not is_deleted:
+            raise exc.WellNotFoundException()
+
+    async def append(self, uuid: UUID, tail: Trajectory) -> int | None:
+        """
+        Дописывает к траектории скважины узлы tail, первый из которых
+        совпадает с последним узлом траектории. Записанные фрагменты
+        траектории не изменяются: tail записывается новыми фрагментами,
+        а количество узлов и габариты скважины в реестре расширяются.
+        Об этом уведомляется канал well_appended.
+
+        Возвращает количество узлов траектории после добавления или
+        None, если траектория уже не заканчивается первым узлом tail
+        (её продолжил другой запрос).
+
+        """
+
+        try:
+            nodes: int | None = await db_instance.fetch_val(
+                '''SELECT append_well_chunks(
+                    $1,
+                    $2,
+                    $3,
+                    $4::DOUBLE PRECISION[],
+                    $5::DOUBLE PRECISION[],
+                    $6::BYTEA[],
+                    $7::DOUBLE PRECISION[])''',
+                uuid,
+                float(tail.md[0]),
+                len(tail) - 1,
+                *tail.packed_chunks(TRAJECTORY_CHUNK_SIZE),
+                tail.bounds()
+            )
+        except apg_exc.UndefinedColumnError:
+            # Траектория хранится в виде массивов (см. pack_well).
+            raise exc.WellNotPackedException()
+
+        if nodes is None:
+            raise exc.WellNotFoundException()
+
+        return nodes or None
+
+    async def get_header(self, uuid: UUID) -> tuple[str, tuple[float, float]]:
+        """
+        Возвращает имя и координаты устья скважины.
+
+        """
+
+        query: apg.Record | None = await db_instance.fetch_row(
+            '''SELECT name, head FROM well_registry
+            WHERE pk_id = $1 AND removed_at IS NULL''',
+            uuid
+        )
+
+        if not query:
+            raise exc.WellNotFoundException()
+
+        return query['name'], query['head']
+
+    async def search(
+            self,
+            by_trajectory: bool,
+            box: tuple[float, float, float, float] | None = None,
+            point: tuple[float, float] | None = None,
+            radius: float | None = None,
+            depth: tuple[float, float] | None = None,
+            limit: int | None = None
+    ) -> list[apg.Record]:
+        """
+        Ищет скважины по расположению устья (by_trajectory == False)
+        или габаритов траектории в плане.
+
+        box - прямоугольник (x_min, y_min, x_max, y_max), с которым
+        должно пересекаться устье или габариты; point и radius - круг,
+        от центра которого устье или габариты находятся не дальше
+        radius. depth - диапазон Z, с которым должны пересекаться
+        габариты траектории по Z.
+
+        Возвращает записи с полями pk_id, name, head и distance
+        (расстояние до point или NULL), упорядоченные по distance.
+        Поиск выполняется по GiST-индексам реестра.
+
+        """
+
+        column: str = 'bbox' if by_trajectory else 'head'
+        # Габариты должны пересекаться с областью, а устье - лежать в ней.
+        operator: str = '&&' if by_trajectory else '<@'
+        conditions: list[str] = ['removed_at IS NULL']
+        args: list[Any] = []
+        distance: str = 'NULL::DOUBLE PRECISION'
+        order: str = 'pk_id'
+
+        if box is not None:
+            args.append(((box[0], box[1]), (box[2], box[3])))
+            conditions.append(f'{column} {operator} ${len(args)}::BOX')
+
+        if point is not None and radius is not None:
+            args += [point, radius]
+            center: str = f'${len(args) - 1}::POINT'
+            distance = order = f'{column} <-> {center}'
+            conditions.append(
+                f'''{column} {operator} box(
+                    {center} - point(${len(args)}, ${len(args)}),
+                    {center} + point(${len(args)}, ${len(args)})
+                ) AND {distance} <= ${len(args)}'''
+            )
+
+        if depth is not None:
+            args += [min(depth), max(depth)]
+            conditions.append(
+                f'z_max >= ${len(args) - 1} AND z_min <= ${len(args)}'
+            )
+
+        args.append(limit)
+
+        return await db_instance.fetch(
+            f'''SELECT pk_id, name, head, {distance} AS distance
+            FROM well_registry
+            WHERE {' AND '.join(conditions)}
+            ORDER BY {order}
+            LIMIT ${len(args)}''',
+            *args
+        )
+
+    @abstractmethod
+    async def get_well(self, uuid: UUID) -> Well:
+        """
+        Возвращает скважину вместе с полной траекторией.
+
+        """
+
+    @abstractmethod
+    async def get_window(self, uuid: UUID, md_from: float,
+                         md_to: float) -> Well:
+        """
+        Возвращает скважину вместе с частью траектории, которая
+        содержит все глубины от md_from до md_to (см. get_chunk).
+
+        Из БД передаются только фрагменты траектории, покрывающие этот
+        диапазон, поэтому возвращаемая часть может быть шире него.
+
+        """
+
+    @abstractmethod
+    async def get_chunk(self, uuid: UUID, md: float) -> Trajectory:
+        """
+        Возвращает фрагмент траектории, содержащий глубину md.
+
+        Если md выходит за пределы траектории, возвращается крайний
+        фрагмент, поэтому интерполяция по нему даёт тот же результат,
+        что и по траектории целиком.
+
+        """
+
+
+class PostgresWellStorage(WellStorage):
+    """
+    Хранилище, траектории скважин которого находятся в PostgreSQL
+    вместе с реестром.
+
+    Наследники определяют только способ записи фрагментов траекторий
+    (см. _insert_chunks).
+
+    """
+
+    async def create_many(
+            self,
+            wells: list[tuple[str, tuple[float, float], Trajectory]]
+    ) -> list[UUID | None]:
+        """
+        Сохраняет несколько скважин в одной транзакции и возвращает их
+        идентификаторы в том же порядке. Для скважин, имя которых уже
+        занято (в том числе другой скважиной из wells), возвращается
+        None.
+
+        Имена занимаются одним запросом к well_names, а реестр и
+        траектории записываются через COPY.
+
+        """
+
+        uuids: list[UUID | None] = [None] * len(wells)
+        packed: list[tuple[list[float], list[float], list[bytes]]] = [
+            trajectory.packed_chunks(TRAJECTORY_CHUNK_SIZE)
+            for _, _, trajectory in wells
+        ]
+
+        async with db_instance.transaction() as conn:
+            claimed: set[str] = {
+                row['well_name'] for row in await conn.fetch(
+                    '''INSERT INTO well_names
+                    SELECT unnest($1::CHARACTER VARYING[])
+                    ON CONFLICT DO NOTHING
+                    RETURNING well_name''',
+                    [name for name, _, _ in wells]
+                )
+            }
+
+            created: list[PackedWell] = []
+
+            for i, (name, head, trajectory) in enumerate(wells):
+                if name not in claimed:
+                    continue
+
+                claimed.discard(name)
+                uuids[i] = uuid4()
+                created.append(PackedWell(
+                    uuids[i],
+                    name,
+                    head,
+                    len(trajectory),
+                    *packed[i],
+                    trajectory.bounds()
+                ))
+
+            if created:
+                await self._insert_chunks(conn, created)
+                await conn.copy_records_to_table(
+                    'well_registry',
+                    records=[
+                        (well.uuid, well.name, well.head, self.name,
+                         well.nodes, well.md_min[0], well.md_max[-1],
+                         (well.bounds[:2], well.bounds[3:5]),
+                         well.bounds[2], well.bounds[5])
+                        for well in created
+                    ],
+                    columns=['pk_id', 'name', 'head', 'storage', 'nodes',
+                             'md_min', 'md_max', 'bbox', 'z_min', 'z_max']
+                )
+
+        return uuids
+
+    @abstractmethod
+    async def _insert_chunks(self, conn: apg.Connection,
+                             wells: list[PackedWell]) -> None:
+        """
+        Записывает фрагменты траекторий скважин (см.
+        Trajectory.packed_chunks) в рамках транзакции conn.
+
+        """
@@ -0,0 +1,540 @@
+"""
+Хранилище, в котором траектории скважин находятся в файлах на
+локальном диске, а реестр скважин - в локальной БД SQLite.
+
+"""
+
+import asyncio
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+from uuid import UUID, uuid4
+
+import numpy as np
+
+import services.exceptions as exc
+from config import WELL_DATA_DIR
+from database import db_instance
+from services.storage.base import WellStorage
+from services.trajectory import Trajectory, Well
+
+
+# Реестр скважин. Габариты устья и траектории в плане дублируются в
+# индексах R*Tree (аналог GiST-индексов well_registry). R*Tree хранит
+# координаты в float32 с округлением наружу, поэтому найденные по нему
+# скважины проверяются ещё раз по точным значениям из well_registry.
+SCHEMA: str = '''
+CREATE TABLE IF NOT EXISTS well_registry (
+    id INTEGER PRIMARY KEY,
+    pk_id TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL UNIQUE,
+    head_x REAL NOT NULL,
+    head_y REAL NOT NULL,
+    nodes INTEGER NOT NULL,
+    md_min REAL NOT NULL,
+    md_max REAL NOT NULL,
+    x_min REAL NOT NULL,
+    y_min REAL NOT NULL,
+    z_min REAL NOT NULL,
+    x_max REAL NOT NULL,
+    y_max REAL NOT NULL,
+    z_max REAL NOT NULL,
+    segments INTEGER NOT NULL DEFAULT 1
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS well_heads
+USING rtree(id, x_min, x_max, y_min, y_max);
+CREATE VIRTUAL TABLE IF NOT EXISTS well_bounds
+USING rtree(id, x_min, x_max, y_min, y_max);
+'''
+
+
+class LocalStorage(WellStorage):
+    """
+    Траектория каждой скважины хранится в файле {uuid}.npy каталога
+    WELL_DATA_DIR в виде упакованного массива (см. Trajectory.packed),
+    а имя, устье и габариты - в файле wells.sqlite3 того же каталога.
+    Узлы, добавленные методом append, записываются в следующие файлы
+    {uuid}.1.npy, {uuid}.2.npy и т. д. (сегменты), которые, как и
+    фрагменты в PostgreSQL, имеют с предыдущим по одному общему узлу.
+
+    Файлы траекторий открываются через np.memmap, поэтому поиск
+    глубины в get_chunk и get_window читает с диска только страницы,
+    через которые проходит двоичный поиск по столбцу MD, и страницы
+    возвращаемых узлов. Траектории из get_well (если у скважины один
+    сегмент) также не копируются в память процесса: закэшированные
+    воркерами скважины разделяют страничный кэш ОС.
+
+    Чтения не обращаются к PostgreSQL. Он используется только для
+    оповещения воркеров об удалении и продолжении траекторий скважин
+    (каналы well_removed и well_appended), так что все воркеры должны
+    работать на одной машине с общим каталогом WELL_DATA_DIR.
+
+    Запросы к SQLite выполняются в отдельном потоке хранилища (см.
+    _run), поэтому ожидание блокировки БД другим воркером не
+    останавливает цикл событий.
+
+    """
+
+    name: str = 'local'
+
+    def __init__(self) -> None:
+        self._connection: sqlite3.Connection | None = None
+        # Подключение к SQLite нельзя использовать из нескольких
+        # потоков одновременно, а транзакции разных запросов не должны
+        # перемежаться, поэтому все обращения к нему выполняются в
+        # одном потоке. Поток создаётся при первом обращении, то есть
+        # уже в процессе воркера.
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix='local-storage'
+        )
+
+    async def _run(self, function: Callable[..., Any], *args: Any) -> Any:
+        """
+        Выполняет function(*args) в потоке подключения к SQLite.
+
+        """
+
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor,
+            function,
+            *args
+        )
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        # Подключение открывается при первом обращении из потока
+        # хранилища (см. _run).
+        if self._connection is None:
+            os.makedirs(WELL_DATA_DIR, exist_ok=True)
+            connection: sqlite3.Connection = sqlite3.connect(
+                os.path.join(WELL_DATA_DIR, 'wells.sqlite3'),
+                timeout=30.,
+                isolation_level=None
+            )
+            connection.row_factory = sqlite3.Row
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.executescript(SCHEMA)
+
+            try:
+                # Реестры, созданные до появления сегментов.
+                connection.execute(
+                    '''ALTER TABLE well_registry
+                    ADD COLUMN segments INTEGER NOT NULL DEFAULT 1'''
+                )
+            except sqlite3.OperationalError:
+                pass
+
+            self._connection = connection
+
+        return self._connection
+
+    @staticmethod
+    def _path(uuid: UUID, segment: int = 0) -> str:
+        return os.path.join(
+            WELL_DATA_DIR,
+            f'{uuid}.{segment}.npy' if segment else f'{uuid}.npy'
+        )
+
+    @staticmethod
+    def _write(path: str, trajectory: Trajectory) -> None:
+        # Файл записывается под временным именем и переименовывается,
+        # поэтому читатели не видят его частично записанным.
+        with open(path + '.tmp', 'wb') as file:
+            np.save(file, trajectory.packed())
+
+        os.replace(path + '.tmp', path)
+
+    def _get_row(self, uuid: UUID) -> sqlite3.Row:
+        row: sqlite3.Row | None = self._db.execute(
+            '''SELECT name, head_x, head_y, segments FROM well_registry
+            WHERE pk_id = ?''',
+            (str(uuid),)
+        ).fetchone()
+
+        if row is None:
+            raise exc.WellNotFoundException()
+
+        return row
+
+    def _open(self, uuid: UUID, segments: int) -> list[np.ndarray]:
+        try:
+            return [
+                np.load(self._path(uuid, segment), mmap_mode='r')
+                for segment in range(segments)
+            ]
+        except FileNotFoundError:
+            raise exc.WellNotFoundException()
+
+    def _register(self, uuid: UUID, name: str, head: tuple[float, float],
+                  trajectory: Trajectory) -> bool:
+        """
+        Добавляет скважину в реестр в рамках текущей транзакции.
+        Возвращает False, если имя уже занято.
+
+        """
+
+        bounds: list[float] = trajectory.bounds()
+        cursor: sqlite3.Cursor = self._db.execute(
+            '''INSERT INTO well_registry (
+                pk_id, name, head_x, head_y, nodes, md_min, md_max,
+                x_min, y_min, z_min, x_max, y_max, z_max
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (name) DO NOTHING''',
+            (str(uuid), name, *head, len(trajectory),
+             float(trajectory.md[0]), float(trajectory.md[-1]), *bounds)
+        )
+
+        if not cursor.rowcount:
+            return False
+
+        self._db.execute(
+            'INSERT INTO well_heads VALUES (?, ?, ?, ?, ?)',
+            (cursor.lastrowid, head[0], head[0], head[1], head[1])
+        )
+        self._db.execute(
+            'INSERT INTO well_bounds VALUES (?, ?, ?, ?, ?)',
+            (cursor.lastrowid, bounds[0], bounds[3], bounds[1], bounds[4])
+        )
+
+        return True
+
+    async def create(self, name: str, head: tuple[float, float],
+                     trajectory: Trajectory) -> UUID:
+        uuids: list[UUID | None] = await self.create_many(
+            [(name, head, trajectory)]
+        )
+
+        if uuids[0] is None:
+            raise exc.WellAlreadyExistsException()
+
+        return uuids[0]
+
+    async def create_many(
+            self,
+            wells: list[tuple[str, tuple[float, float], Trajectory]]
+    ) -> list[UUID | None]:
+        uuids: list[UUID | None] = [uuid4() for _ in wells]
+        # При открытии подключения создаётся каталог WELL_DATA_DIR,
+        # поэтому оно открывается до записи файлов.
+        await self._run(lambda: self._db)
+        await asyncio.to_thread(
+            lambda: [
+                self._write(self._path(uuid), trajectory)
+                for uuid, (_, _, trajectory) in zip(uuids, wells)
+            ]
+        )
+
+        return await self._run(self._register_many, uuids, wells)
+
+    def _register_many(
+            self,
+            uuids: list[UUID | None],
+            wells: list[tuple[str, tuple[float, float], Trajectory]]
+    ) -> list[UUID | None]:
+        """
+        Добавляет в реестр скважины, файлы которых уже записаны, и
+        удаляет файлы скважин, имя которых занято.
+
+        """
+
+        db: sqlite3.Connection = self._db
+
+        try:
+            db.execute('BEGIN IMMEDIATE')
+
+            for i, (name, head, trajectory) in enumerate(wells):
+                if not self._register(uuids[i], name, head, trajectory):
+                    os.unlink(self._path(uuids[i]))
+                    uuids[i] = None
+
+            db.execute('COMMIT')
+        except Exception:
+            # Если ошибкой завершился сам BEGIN, транзакции нет, и ROLLBACK
+            # заменил бы исходное исключение своим.
+            if db.in_transaction:
+                db.execute('ROLLBACK')
+
+            for uuid in uuids:
+                if uuid is not None:
+                    os.unlink(self._path(uuid))
+
+            raise
+
+        return uuids
+
+    async def append(self, uuid: UUID, tail: Trajectory) -> int | None:
+        # Номер сегмента известен только в транзакции, поэтому файл
+        # сначала записывается под временным именем.
+        tmp_path: str = os.path.join(WELL_DATA_DIR,
+                                     f'{uuid}.{uuid4().hex}.npy')
+        await asyncio.to_thread(self._write, tmp_path, tail)
+        nodes: int | None = await self._run(self._add_segment, uuid,
+                                            tmp_path, tail)
+
+        if nodes is None:
+            return None
+
+        await db_instance.execute(
+            "SELECT pg_notify('well_appended', $1)",
+            f'{uuid} {float(tail.md[-1])!r}'
+        )
+
+        return nodes
+
+    def _add_segment(self, uuid: UUID, tmp_path: str,
+                     tail: Trajectory) -> int | None:
+        """
+        Переименовывает записанный во временный файл tmp_path сегмент
+        в следующий сегмент скважины и расширяет её запись в реестре.
+        Возвращает количество узлов траектории или None (см. append).
+
+        """
+
+        db: sqlite3.Connection = self._db
+        bounds: list[float] = tail.bounds()
+
+        try:
+            db.execute('BEGIN IMMEDIATE')
+            row: sqlite3.Row | None = db.execute(
+                'SELECT id, md_max, segments FROM well_registry WHERE pk_id = ?',
+                (str(uuid),)
+            ).fetchone()
+            is_last: bool = row is not None and row['md_max'] == tail.md[0]
+
+            if is_last:
+                path: str = self._path(uuid, row['segments'])
+                os.replace(tmp_path, path)
+                tmp_path = path
+                updated: sqlite3.Row = db.execute(
+                    '''UPDATE well_registry SET
+                        nodes = nodes + ?,
+                        md_max = ?,
+                        x_min = min(x_min, ?),
+                        y_min = min(y_min, ?),
+                        z_min = min(z_min, ?),
+                        x_max = max(x_max, ?),
+                        y_max = max(y_max, ?),
+                        z_max = max(z_max, ?),
+                        segments = segments + 1
+                    WHERE id = ?
+                    RETURNING nodes, x_min, y_min, x_max, y_max''',
+                    (len(tail) - 1, float(tail.md[-1]), *bounds, row['id'])
+                ).fetchone()
+                db.execute(
+                    '''UPDATE well_bounds
+                    SET x_min = ?, x_max = ?, y_min = ?, y_max = ?
+                    WHERE id = ?''',
+                    (updated['x_min'], updated['x_max'], updated['y_min'],
+                     updated['y_max'], row['id'])
+                )
+                db.execute('COMMIT')
+            else:
+                db.execute('ROLLBACK')
+        except Exception:
+            if db.in_transaction:
+                db.execute('ROLLBACK')
+
+            os.unlink(tmp_path)
+            raise
+
+        if row is None:
+            os.unlink(tmp_path)
+            raise exc.WellNotFoundException()
+
+        if not is_last:
+            os.unlink(tmp_path)
+            return None
+
+        return updated['nodes']
+
+    async def remove(self, uuid: UUID) -> None:
+        await self._run(self._delete, uuid)
+        await db_instance.execute(
+            "SELECT pg_notify('well_removed', $1)",
+            str(uuid)
+        )
+
+    def _delete(self, uuid: UUID) -> None:
+        """
+        Удаляет скважину из реестра и её файлы.
+
+        """
+
+        db: sqlite3.Connection = self._db
+
+        try:
+            db.execute('BEGIN IMMEDIATE')
+            rows: list[sqlite3.Row] = db.execute(
+                '''DELETE FROM well_registry WHERE pk_id = ?
+                RETURNING id, segments''',
+                (str(uuid),)
+            ).fetchall()
+
+            for row in rows:
+                db.execute('DELETE FROM well_heads WHERE id = ?',
+                           (row['id'],))
+                db.execute('DELETE FROM well_bounds WHERE id = ?',
+                           (row['id'],))
+
+            db.execute('COMMIT')
+        except Exception:
+            if db.in_transaction:
+                db.execute('ROLLBACK')
+
+            raise
+
+        if not rows:
+            raise exc.WellNotFoundException()
+
+        # Воркеры, которые уже открыли файлы, могут читать их до
+        # закрытия, даже если они удалены.
+        for segment in range(rows[0]['segments']):
+            try:
+                os.unlink(self._path(uuid, segment))
+            except FileNotFoundError:
+                pass
+
+    async def get_header(self, uuid: UUID) -> tuple[str, tuple[float, float]]:
+        row: sqlite3.Row = await self._run(self._get_row, uuid)
+
+        return row['name'], (row['head_x'], row['head_y'])
+
+    async def search(
+            self,
+            by_trajectory: bool,
+            box: tuple[float, float, float, float] | None = None,
+            point: tuple[float, float] | None = None,
+            radius: float | None = None,
+            depth: tuple[float, float] | None = None,
+            limit: int | None = None
+    ) -> list[dict[str, Any]]:
+        if by_trajectory:
+            index: str = 'well_bounds'
+            columns: tuple[str, ...] = ('x_min', 'y_min', 'x_max', 'y_max')
+        else:
+            index: str = 'well_heads'
+            columns: tuple[str, ...] = ('head_x', 'head_y', 'head_x',
+                                        'head_y')
+
+        # Области поиска в виде прямоугольников (x_min, y_min, x_max,
+        # y_max), с которыми должны пересекаться габариты (для устья
+        # вырожденные).
+        areas: list[tuple[float, float, float, float]] = []
+        args: dict[str, Any] = {'limit': -1 if limit is None else limit}
+        conditions: list[str] = []
+        distance: str = 'NULL'
+        order: str = 'pk_id'
+
+        if box is not None:
+            areas.append((min(box[0], box[2]), min(box[1], box[3]),
+                          max(box[0], box[2]), max(box[1], box[3])))
+
+        if point is not None and radius is not None:
+            areas.append((point[0] - radius, point[1] - radius,
+                          point[0] + radius, point[1] + radius))
+            args |= {'px': point[0], 'py': point[1], 'radius': radius}
+            # Расстояние от точки до прямоугольника (0 внутри него).
+            distance = order = f'''sqrt(
+                pow(max({columns[0]} - :px, 0, :px - {columns[2]}), 2)
+                + pow(max({columns[1]} - :py, 0, :py - {columns[3]}), 2)
+            )'''
+            conditions.append(f'{distance} <= :radius')
+
+        for i, area in enumerate(areas):
+            args |= dict(zip((f'x_min{i}', f'y_min{i}', f'x_max{i}',
+                              f'y_max{i}'), area))
+            conditions.append(
+                f'''id IN (SELECT id FROM {index}
+                    WHERE x_max >= :x_min{i} AND x_min <= :x_max{i}
+                    AND y_max >= :y_min{i} AND y_min <= :y_max{i})
+                AND {columns[2]} >= :x_min{i} AND {columns[0]} <= :x_max{i}
+                AND {columns[3]} >= :y_min{i} AND {columns[1]} <= :y_max{i}'''
+            )
+
+        if depth is not None:
+            args |= {'z_min': min(depth), 'z_max': max(depth)}
+            conditions.append('z_max >= :z_min AND z_min <= :z_max')
+
+        rows: list[sqlite3.Row] = await self._run(
+            lambda: self._db.execute(
+                f'''SELECT pk_id, name, head_x, head_y, {distance} AS distance
+                FROM well_registry
+                WHERE {' AND '.join(conditions) or 'TRUE'}
+                ORDER BY {order}
+                LIMIT :limit''',
+                args
+            ).fetchall()
+        )
+
+        return [
+            {
+                'pk_id': UUID(row['pk_id']),
+                'name': row['name'],
+                'head': (row['head_x'], row['head_y']),
+                'distance': row['distance']
+            }
+            for row in rows
+        ]
+
+    async def get_well(self, uuid: UUID) -> Well:
+        row: sqlite3.Row = await self._run(self._get_row, uuid)
+
+        return Well(
+            name=row['name'],
+            head=(row['head_x'], row['head_y']),
+            trajectory=Trajectory.from_chunks(
+                self._open(uuid, row['segments'])
+            )
+        )
+
+    async def get_window(self, uuid: UUID, md_from: float,
+                         md_to: float) -> Well:
+        row: sqlite3.Row = await self._run(self._get_row, uuid)
+        segments: list[np.ndarray] = self._open(uuid, row['segments'])
+        # Сегменты, покрывающие диапазон, выбираются так же, как
+        # фрагменты в read_well_window, а из крайних берутся только
+        # узлы, покрывающие диапазон.
+        starts: list[float] = [float(segment[0, 0]) for segment in segments]
+        first: int = max(int(np.searchsorted(starts, md_from, 'right')) - 1, 0)
+        last: int = max(int(np.searchsorted(starts, md_to, 'left')) - 1,
+                        first)
+        start: int = max(
+            int(np.searchsorted(segments[first][0], md_from, 'right')) - 1, 0
+        )
+        stop: int = int(np.searchsorted(segments[last][0], md_to, 'left')) + 1
+
+        if first == last:
+            packed: np.ndarray = segments[first][:, start:max(stop, start + 2)]
+        else:
+            packed: np.ndarray = np.concatenate(
+                [segments[first][:, start:]]
+                + [segment[:, 1:] for segment in segments[first + 1:last]]
+                + [segments[last][:, 1:stop]],
+                axis=1
+            )
+
+        return Well(
+            name=row['name'],
+            head=(row['head_x'], row['head_y']),
+            trajectory=Trajectory.from_packed(packed)
+        )
+
+    async def get_chunk(self, uuid: UUID, md: float) -> Trajectory:
+        row: sqlite3.Row = await self._run(self._get_row, uuid)
+        segments: list[np.ndarray] = self._open(uuid, row['segments'])
+        packed: np.ndarray = segments[max(
+            int(np.searchsorted([segment[0, 0] for segment in segments],
+                                md, 'right')) - 1,
+            0
+        )]
+        # Отрезок траектории, на котором лежит глубина md (крайний,
+        # если md выходит за её пределы).
+        start: int = max(
+            min(int(np.searchsorted(packed[0], md, 'right')) - 1,
+                packed.shape[1] - 2),
+            0
+        )
+
+        return Trajectory.from_packed(np.array(packed[:, start:start + 2]))
@@ -0,0 +1,136 @@
+"""
+Хранилище, в котором все скважины находятся в одной таблице well,
+секционированной по хэшу идентификатора скважины.
+
+"""
+
+from uuid import UUID
+
+import asyncpg as apg
+import asyncpg.exceptions as apg_exc
+import numpy as np
+
+import services.exceptions as exc
+from config import TRAJECTORY_CHUNK_SIZE
+from database import db_instance
+from services.storage.base import (
+    ALIVE_CONDITION,
+    PackedWell,
+    PostgresWellStorage
+)
+from services.trajectory import Trajectory, Well
+
+
+class PartitionedStorage(PostgresWellStorage):
+    """
+    Все скважины хранятся в таблице well по одной записи на фрагмент
+    траектории с первичным ключом (pk_id, chunk_no).
+
+    В отличие от TablePerWellStorage, количество таблиц в каталоге
+    PostgreSQL не растёт вместе с количеством скважин, а текст запросов
+    не зависит от скважины, поэтому подготовленные запросы
+    переиспользуются.
+
+    """
+
+    name: str = 'partitioned'
+
+    async def create(self, name: str, head: tuple[float, float],
+                     trajectory: Trajectory) -> UUID:
+        try:
+            return await db_instance.fetch_val(
+                '''SELECT insert_well_partitioned(
+                    $1,
+                    $2,
+                    $3,
+                    $4::DOUBLE PRECISION[],
+                    $5::DOUBLE PRECISION[],
+                    $6::BYTEA[],
+                    $7::DOUBLE PRECISION[])''',
+                name,
+                head,
+                len(trajectory),
+                *trajectory.packed_chunks(TRAJECTORY_CHUNK_SIZE),
+                trajectory.bounds()
+            )
+        except apg_exc.UniqueViolationError:
+            raise exc.WellAlreadyExistsException()
+
+    async def _insert_chunks(self, conn: apg.Connection,
+                             wells: list[PackedWell]) -> None:
+        await conn.copy_records_to_table(
+            'well',
+            records=[
+                (well.uuid, chunk_no, well.name, well.head,
+                 md_min, md_max, chunk)
+                for well in wells
+                for chunk_no, (md_min, md_max, chunk) in enumerate(
+                    zip(well.md_min, well.md_max, well.chunks)
+                )
+            ],
+            columns=['pk_id', 'chunk_no', 'name', 'head', 'md_min',
+                     'md_max', 'trajectory']
+        )
+
+    async def get_well(self, uuid: UUID) -> Well:
+        query: list[apg.Record] = await db_instance.fetch(
+            f'''SELECT name, head, trajectory FROM well
+            WHERE pk_id = $1 AND {ALIVE_CONDITION}
+            ORDER BY chunk_no''',
+            uuid
+        )
+
+        if not query:
+            raise exc.WellNotFoundException()
+
+        return Well(
+            name=query[0]['name'],
+            head=query[0]['head'],
+            trajectory=Trajectory.from_chunks(
+                [row['trajectory'] for row in query]
+            )
+        )
+
+    async def get_window(self, uuid: UUID, md_from: float,
+                         md_to: float) -> Well:
+        query: list[apg.Record] = await db_instance.fetch(
+            f'''SELECT name, head, trajectory FROM well
+            WHERE pk_id = $1 AND chunk_no BETWEEN (
+                SELECT COALESCE(MAX(chunk_no), 0) FROM well
+                WHERE pk_id = $1 AND md_min <= $2
+            ) AND (
+                SELECT COALESCE(MAX(chunk_no), 0) FROM well
+                WHERE pk_id = $1 AND md_min < $3
+            ) AND {ALIVE_CONDITION}
+            ORDER BY chunk_no''',
+            uuid,
+            md_from,
+            md_to
+        )
+
+        if not query:
+            raise exc.WellNotFoundException()
+
+        return Well(
+            name=query[0]['name'],
+            head=query[0]['head'],
+            trajectory=Trajectory.from_chunks(
+                [row['trajectory'] for row in query]
+            )
+        )
+
+    async def get_chunk(self, uuid: UUID, md: float) -> Trajectory:
+        chunk: np.ndarray | None = await db_instance.fetch_val(
+            f'''SELECT trajectory FROM well
+            WHERE pk_id = $1 AND chunk_no = (
+                SELECT COALESCE(MAX(chunk_no), 0) FROM well
+                WHERE pk_id = $1 AND md_min <= $2
+            ) AND {ALIVE_CONDITION}''',
+            uuid,
+            md
+        )
+
+        if chunk is None:
+            raise exc.WellNotFoundException()
+
+        return Trajectory.from_packed(chunk)
@@ -0,0 +1,209 @@
+"""
+Хранилище, в котором для каждой скважины создаётся отдельная таблица
+well_{uuid}.
+
+"""
+
+from uuid import UUID
+
+import asyncpg as apg
+import asyncpg.exceptions as apg_exc
+import numpy as np
+
+import services.exceptions as exc
+from config import TRAJECTORY_CHUNK_SIZE, TRAJECTORY_FORMAT
+from database import db_instance
+from services.storage.base import (
+    ALIVE_CONDITION,
+    PackedWell,
+    PostgresWellStorage
+)
+from services.trajectory import Trajectory, Well
+
+
+class TablePerWellStorage(PostgresWellStorage):
+    """
+    Каждая скважина хранится в собственной таблице well_{uuid}.
+
+    Формат новых скважин задаётся переменной TRAJECTORY_FORMAT, при
+    этом скважины в старом формате (массивы DOUBLE PRECISION[])
+    продолжают читаться.
+
+    Чтение выполняется через функции read_well_chunk и
+    read_well_chunks, поэтому текст запросов не зависит от скважины и
+    подготовленные запросы переиспользуются.
+
+    """
+
+    name: str = 'tables'
+
+    async def create(self, name: str, head: tuple[float, float],
+                     trajectory: Trajectory) -> UUID:
+        try:
+            if TRAJECTORY_FORMAT == 'packed':
+                return await db_instance.fetch_val(
+                    '''SELECT insert_well_packed(
+                        $1,
+                        $2,
+                        $3,
+                        $4::DOUBLE PRECISION[],
+                        $5::DOUBLE PRECISION[],
+                        $6::BYTEA[],
+                        $7::DOUBLE PRECISION[])''',
+                    name,
+                    head,
+                    len(trajectory),
+                    *trajectory.packed_chunks(TRAJECTORY_CHUNK_SIZE),
+                    trajectory.bounds()
+                )
+
+            return await db_instance.fetch_val(
+                '''SELECT insert_well(
+                    $1,
+                    $2,
+                    $3::DOUBLE PRECISION[],
+                    $4::DOUBLE PRECISION[],
+                    $5::DOUBLE PRECISION[],
+                    $6::DOUBLE PRECISION[])''',
+                name,
+                head,
+                trajectory.md,
+                trajectory.x,
+                trajectory.y,
+                trajectory.z
+            )
+        except apg_exc.UniqueViolationError:
+            raise exc.WellAlreadyExistsException()
+
+    async def _insert_chunks(self, conn: apg.Connection,
+                             wells: list[PackedWell]) -> None:
+        # Таблицу каждой скважины всё равно нужно создать отдельной
+        # командой, поэтому COPY здесь не применяется. Скважины,
+        # созданные пакетно, всегда хранятся в упакованном формате.
+        await conn.executemany(
+            '''SELECT create_well_table(
+                $1,
+                $2,
+                $3,
+                $4::DOUBLE PRECISION[],
+                $5::DOUBLE PRECISION[],
+                $6::BYTEA[])''',
+            [(well.uuid, well.name, well.head,
+              well.md_min, well.md_max, well.chunks) for well in wells]
+        )
+
+    async def get_well(self, uuid: UUID) -> Well:
+        try:
+            query: list[apg.Record] = await db_instance.fetch(
+                'SELECT * FROM read_well_chunks($1)',
+                uuid
+            )
+        except apg_exc.UndefinedTableError:
+            raise exc.WellNotFoundException()
+        except apg_exc.UndefinedColumnError:
+            # Скважины, ещё не переведённые на упакованный формат,
+            # хранят траекторию в четырёх отдельных массивах.
+            return await self._get_well_arrays(uuid)
+
+        if not query:
+            raise exc.WellNotFoundException()
+
+        return Well(
+            name=query[0]['name'],
+            head=query[0]['head'],
+            trajectory=Trajectory.from_chunks(
+                [row['trajectory'] for row in query]
+            )
+        )
+
+    async def _get_well_arrays(self, uuid: UUID) -> Well:
+        query: apg.Record | None = await db_instance.fetch_row(
+            f'''SELECT name, head, md, x, y, z FROM well_{uuid.hex}
+            WHERE {ALIVE_CONDITION}''',
+            uuid
+        )
+
+        if not query:
+            raise exc.WellNotFoundException()
+
+        return Well(
+            name=query['name'],
+            head=query['head'],
+            trajectory=Trajectory.from_arrays(
+                query['md'], query['x'], query['y'], query['z']
+            )
+        )
+
+    async def get_window(self, uuid: UUID, md_from: float,
+                         md_to: float) -> Well:
+        try:
+            query: list[apg.Record] = await db_instance.fetch(
+                'SELECT * FROM read_well_window($1, $2, $3)',
+                uuid,
+                md_from,
+                md_to
+            )
+        except apg_exc.UndefinedTableError:
+            raise exc.WellNotFoundException()
+        except apg_exc.UndefinedColumnError:
+            return await self._get_window_arrays(uuid, md_from, md_to)
+
+        if not query:
+            raise exc.WellNotFoundException()
+
+        return Well(
+            name=query[0]['name'],
+            head=query[0]['head'],
+            trajectory=Trajectory.from_chunks(
+                [row['trajectory'] for row in query]
+            )
+        )
+
+    async def _get_window_arrays(self, uuid: UUID, md_from: float,
+                                 md_to: float) -> Well:
+        # Границы окна находятся по индексам массива md, а из БД
+        # передаются только срезы массивов.
+        query: apg.Record | None = await db_instance.fetch_row(
+            f'''SELECT name, head, md[lo:hi] AS md, x[lo:hi] AS x,
+                y[lo:hi] AS y, z[lo:hi] AS z
+            FROM well_{uuid.hex}, LATERAL (
+                SELECT
+                    COALESCE(MAX(i) FILTER (WHERE md[i] <= $2), 1) AS lo,
+                    COALESCE(MIN(i) FILTER (WHERE md[i] >= $3),
+                             array_length(md, 1)) AS hi
+                FROM generate_subscripts(md, 1) AS i
+            ) AS bounds
+            WHERE {ALIVE_CONDITION}''',
+            uuid,
+            md_from,
+            md_to
+        )
+
+        if not query:
+            raise exc.WellNotFoundException()
+
+        return Well(
+            name=query['name'],
+            head=query['head'],
+            trajectory=Trajectory.from_arrays(
+                query['md'], query['x'], query['y'], query['z']
+            )
+        )
+
+    async def get_chunk(self, uuid: UUID, md: float) -> Trajectory:
+        try:
+            chunk: np.ndarray | None = await db_instance.fetch_val(
+                'SELECT read_well_chunk($1, $2)',
+                uuid,
+                md
+            )
+        except apg_exc.UndefinedTableError:
+            raise exc.WellNotFoundException()
+        except apg_exc.UndefinedColumnError:
+            # Скважина хранится в формате без фрагментов.
+            return (await self.get_well(uuid)).trajectory
+
+        if chunk is None:
+            raise exc.WellNotFoundException()
+
+        return Trajectory.from_packed(chunk)
@@ -0,0 +1,821 @@
+"""
+Содержит представление траектории скважины в виде массивов NumPy.
+
+"""
+
+import io
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+import services.exceptions as exc
+from database import encode_bytea
+
+if TYPE_CHECKING:
+    from services.spatial import SegmentIndex
+
+
+NPY_MAGIC: bytes = b'\x93NUMPY'
+
+# Размер блока узлов, внутри которого значимость узлов вычисляется
+# точным алгоритмом Дугласа-Пекера (см. douglas_peucker_significance).
+SIGNIFICANCE_BLOCK_SIZE: int = 256
+
+
+def decode_array(data: bytes) -> np.ndarray[Any, np.dtype[np.float64]]:
+    """
+    Декодирует одномерный массив чисел из файла формата .npy или из
+    последовательности чисел float64 little-endian без заголовка.
+
+    Сырые данные не копируются. Бросает InvalidArrayException, если
+    данные не являются непустым одномерным массивом конечных чисел.
+
+    """
+
+    try:
+        if data.startswith(NPY_MAGIC):
+            array: np.ndarray = np.lib.format.read_array(
+                io.BytesIO(data), allow_pickle=False
+            )
+        else:
+            array: np.ndarray = np.frombuffer(data, dtype='<f8')
+    except ValueError:
+        raise exc.InvalidArrayException()
+
+    if array.ndim != 1 or not array.size or array.dtype.kind not in 'fiu':
+        raise exc.InvalidArrayException()
+
+    array = array.astype(np.float64, copy=False)
+
+    if not np.isfinite(array).all():
+        raise exc.InvalidArrayException()
+
+    return array
+
+
+def _douglas_peucker(
+        points: np.ndarray[Any, np.dtype[np.float64]],
+        edge_errors: np.ndarray[Any, np.dtype[np.float64]] | None,
+        seeds: np.ndarray[Any, np.dtype[np.intp]]
+) -> tuple[np.ndarray[Any, np.dtype[np.float64]],
+           np.ndarray[Any, np.dtype[np.float64]]]:
+    """
+    Вычисляет значимость узлов ломаной points формы (3, N), разбитой
+    узлами seeds на отрезки, алгоритмом Дугласа-Пекера.
+
+    Все отрезки обрабатываются одновременно: за одну итерацию в каждом
+    отрезке выбирается самый удалённый от его хорды узел. Значимость
+    узла равна отклонению ломаной от хорды отрезка, в котором он был
+    выбран, но не больше значимости концов этого отрезка. Узлы seeds
+    получают бесконечную значимость.
+
+    edge_errors[i] - дополнительное отклонение на звене (i, i + 1),
+    которое прибавляется к отклонению отрезков, содержащих звено.
+
+    Возвращает значимость узлов и отклонение каждого исходного
+    отрезка от его хорды.
+
+    """
+
+    size: int = points.shape[1]
+    index: np.ndarray[Any, np.dtype[np.intp]] = np.arange(size)
+    significance: np.ndarray[Any, np.dtype[np.float64]] = np.full(
+        size, np.inf
+    )
+    kept: np.ndarray[Any, np.dtype[np.bool_]] = np.zeros(size, dtype=bool)
+    kept[seeds] = True
+    segment_errors: np.ndarray[Any, np.dtype[np.float64]] | None = None
+    # Отрезки с меньшим отклонением считаются прямыми, чтобы ошибки
+    # округления не приводили к разбиению их по одному узлу.
+    flat_error: float = 16. * np.finfo(np.float64).eps * max(
+        1., float(np.abs(points).max())
+    )
+
+    while True:
+        kept_index: np.ndarray[Any, np.dtype[np.intp]] = np.flatnonzero(kept)
+        edge_max: np.ndarray[Any, np.dtype[np.float64]] | None = (
+            None if edge_errors is None
+            else np.maximum.reduceat(edge_errors, kept_index[:-1])
+        )
+        is_first: bool = segment_errors is None
+
+        if is_first:
+            segment_errors = (
+                np.zeros(len(kept_index) - 1) if edge_max is None
+                else edge_max.copy()
+            )
+
+        nodes: np.ndarray[Any, np.dtype[np.intp]] = np.flatnonzero(~kept)
+
+        if not len(nodes):
+            return significance, segment_errors
+
+        # Концы отрезков, которым принадлежат узлы.
+        left: np.ndarray[Any, np.dtype[np.intp]] = np.maximum.accumulate(
+            np.where(kept, index, 0)
+        )[nodes]
+        right: np.ndarray[Any, np.dtype[np.intp]] = np.minimum.accumulate(
+            np.where(kept, index, size - 1)[::-1]
+        )[::-1][nodes]
+
+        # Расстояние от узлов до хорд их отрезков.
+        start: np.ndarray[Any, np.dtype[np.float64]] = points[:, left]
+        chord: np.ndarray[Any, np.dtype[np.float64]] = points[:, right] - start
+        offset: np.ndarray[Any, np.dtype[np.float64]] = points[:, nodes] - start
+        length: np.ndarray[Any, np.dtype[np.float64]] = np.einsum(
+            'ij,ij->j', chord, chord
+        )
+        t: np.ndarray[Any, np.dtype[np.float64]] = np.clip(
+            np.einsum('ij,ij->j', offset, chord)
+            / np.where(length > 0., length, 1.),
+            0.,
+            1.
+        )
+        offset -= chord * t
+        distance: np.ndarray[Any, np.dtype[np.float64]] = np.sqrt(
+            np.einsum('ij,ij->j', offset, offset)
+        )
+
+        # Узлы одного отрезка идут подряд.
+        groups: np.ndarray[Any, np.dtype[np.intp]] = np.flatnonzero(
+            np.r_[True, left[1:] != left[:-1]]
+        )
+        counts: np.ndarray[Any, np.dtype[np.intp]] = np.diff(
+            np.r_[groups, len(nodes)]
+        )
+        max_distance: np.ndarray[Any, np.dtype[np.float64]] = (
+            np.maximum.reduceat(distance, groups)
+        )
+        farthest: np.ndarray[Any, np.dtype[np.intp]] = nodes[
+            np.minimum.reduceat(
+                np.where(distance == np.repeat(max_distance, counts),
+                         np.arange(len(nodes)), len(nodes)),
+                groups
+            )
+        ]
+
+        segments: np.ndarray[Any, np.dtype[np.intp]] = np.searchsorted(
+            kept_index, left[groups]
+        )
+        error: np.ndarray[Any, np.dtype[np.float64]] = (
+            max_distance if edge_max is None
+            else max_distance + edge_max[segments]
+        )
+
+        if is_first:
+            segment_errors[segments] = error
+
+        value: np.ndarray[Any, np.dtype[np.float64]] = np.minimum(
+            error,
+            np.minimum(significance[left[groups]], significance[right[groups]])
+        )
+        is_flat: np.ndarray[Any, np.dtype[np.bool_]] = (
+            max_distance <= flat_error
+        )
+
+        # В прямых отрезках все узлы получают значимость сразу.
+        flat_nodes: np.ndarray[Any, np.dtype[np.intp]] = nodes[
+            np.repeat(is_flat, counts)
+        ]
+        significance[flat_nodes] = np.repeat(value[is_flat], counts[is_flat])
+        kept[flat_nodes] = True
+
+        significance[farthest[~is_flat]] = value[~is_flat]
+        kept[farthest[~is_flat]] = True
+
+
+def douglas_peucker_significance(
+        points: np.ndarray[Any, np.dtype[np.float64]],
+        edge_errors: np.ndarray[Any, np.dtype[np.float64]] | None = None
+) -> np.ndarray[Any, np.dtype[np.float64]]:
+    """
+    Вычисляет значимость узлов ломаной points формы (3, N) для её
+    упрощения: узлы со значимостью больше tolerance образуют ломаную,
+    отклоняющуюся от исходной не более чем на tolerance. Концы ломаной
+    имеют бесконечную значимость.
+
+    Упрощения с разными tolerance вложены друг в друга, а значит, N
+    узлов с наибольшей значимостью тоже образуют одно из них.
+
+    Точный алгоритм Дугласа-Пекера на длинных спиралевидных
+    траекториях требует порядка N итераций, поэтому он применяется
+    только внутри блоков по SIGNIFICANCE_BLOCK_SIZE узлов. Границы
+    блоков упрощаются тем же способом рекурсивно, а отклонение каждого
+    блока от его хорды учитывается как отклонение звена между его
+    границами. Оценка отклонения при этом остаётся верхней.
+
+    """
+
+    size: int = points.shape[1]
+    seeds: np.ndarray[Any, np.dtype[np.intp]] = np.r_[
+        np.arange(0, max(size - 1, 1), SIGNIFICANCE_BLOCK_SIZE), size - 1
+    ]
+    significance, block_errors = _douglas_peucker(points, edge_errors, seeds)
+
+    if len(seeds) <= 2:
+        return significance
+
+    seed_significance: np.ndarray[Any, np.dtype[np.float64]] = (
+        douglas_peucker_significance(points[:, seeds], block_errors)
+    )
+    significance[seeds] = seed_significance
+
+    # Значимость узлов блока не больше значимости его границ.
+    blocks: np.ndarray[Any, np.dtype[np.intp]] = np.minimum(
+        np.arange(size) // SIGNIFICANCE_BLOCK_SIZE, len(seeds) - 2
+    )
+    inner: np.ndarray[Any, np.dtype[np.bool_]] = np.ones(size, dtype=bool)
+    inner[seeds] = False
+    significance[inner] = np.minimum(
+        significance[inner],
+        np.minimum(seed_significance[:-1], seed_significance[1:])[
+            blocks[inner]
+        ]
+    )
+
+    return significance
+
+
+@dataclass(frozen=True, slots=True)
+class Trajectory:
+    """
+    Декодированная траектория скважины.
+
+    Элементы x[n], y[n] и z[n] представляют координаты скважины на
+    глубине md[n]. significance[n] - значимость узла для упрощения
+    траектории (см. douglas_peucker_significance); она вычисляется при
+    создании скважины и хранится пятым столбцом упакованного формата.
+
+    slopes[n] - приращения (x, y, z) на единицу MD на отрезке от узла
+    n до узла n + 1 (у последнего узла - нулевые, см. at). Они
+    вычисляются при загрузке траектории в кэш и не хранятся в БД.
+
+    """
+
+    md: np.ndarray[Any, np.dtype[np.float64]]
+    x: np.ndarray[Any, np.dtype[np.float64]]
+    y: np.ndarray[Any, np.dtype[np.float64]]
+    z: np.ndarray[Any, np.dtype[np.float64]]
+    significance: np.ndarray[Any, np.dtype[np.float64]] | None = None
+    slopes: np.ndarray[Any, np.dtype[np.float64]] | None = None
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            values.nbytes for values in (self.md, self.x, self.y, self.z,
+                                         self.significance, self.slopes)
+            if values is not None
+        )
+
+    @classmethod
+    def from_arrays(cls, md: list[float], x: list[float], y: list[float],
+                    z: list[float]) -> 'Trajectory':
+        return cls(
+            md=np.asarray(md, dtype=np.float64),
+            x=np.asarray(x, dtype=np.float64),
+            y=np.asarray(y, dtype=np.float64),
+            z=np.asarray(z, dtype=np.float64)
+        )
+
+    @classmethod
+    def from_packed(
+            cls,
+            packed: np.ndarray[Any, np.dtype[np.float64]]) -> 'Trajectory':
+        """
+        Создаёт траекторию из упакованного массива формы (4, N) или
+        (5, N), не копируя данные.
+
+        """
+
+        return cls(
+            md=packed[0],
+            x=packed[1],
+            y=packed[2],
+            z=packed[3],
+            significance=packed[4] if len(packed) > 4 else None
+        )
+
+    @classmethod
+    def from_chunks(
+            cls,
+            chunks: list[np.ndarray[Any, np.dtype[np.float64]]]
+    ) -> 'Trajectory':
+        """
+        Собирает траекторию из упакованных фрагментов, полученных
+        методом packed_chunks, в порядке их следования.
+
+        """
+
+        if len(chunks) == 1:
+            return cls.from_packed(chunks[0])
+
+        return cls.from_packed(np.concatenate(
+            [chunks[0]] + [chunk[:, 1:] for chunk in chunks[1:]],
+            axis=1
+        ))
+
+    def bounds(self) -> list[float]:
+        """
+        Возвращает габариты траектории в виде списка
+        [x_min, y_min, z_min, x_max, y_max, z_max].
+
+        """
+
+        nodes: tuple[np.ndarray, ...] = (self.x, self.y, self.z)
+
+        return (
+            [float(values.min()) for values in nodes]
+            + [float(values.max()) for values in nodes]
+        )
+
+    def with_significance(self) -> 'Trajectory':
+        """
+        Возвращает траекторию с вычисленной значимостью узлов.
+
+        """
+
+        return replace(
+            self,
+            significance=douglas_peucker_significance(
+                np.vstack((self.x, self.y, self.z))
+            )
+        )
+
+    def with_slopes(self) -> 'Trajectory':
+        """
+        Возвращает траекторию с вычисленными приращениями координат на
+        отрезках.
+
+        """
+
+        step: np.ndarray[Any, np.dtype[np.float64]] = np.diff(self.md)
+        slopes: np.ndarray[Any, np.dtype[np.float64]] = np.zeros(
+            (len(self), 3)
+        )
+        slopes[:-1] = np.stack(
+            (np.diff(self.x), np.diff(self.y), np.diff(self.z)), axis=-1
+        ) / np.where(step > 0., step, np.inf)[:, None]
+
+        return replace(self, slopes=slopes)
+
+    def extend(self, tail: 'Trajectory') -> 'Trajectory':
+        """
+        Возвращает траекторию, продолженную узлами tail. Первый узел
+        tail совпадает с последним узлом траектории.
+
+        Значимость и приращения slopes имеющихся узлов не
+        пересчитываются: значимость tail вычисляется отдельно (концы
+        tail бесконечно значимы, как и концы фрагментов при создании
+        скважины), а приращения - только для новых отрезков.
+
+        """
+
+        return Trajectory(
+            md=np.concatenate((self.md, tail.md[1:])),
+            x=np.concatenate((self.x, tail.x[1:])),
+            y=np.concatenate((self.y, tail.y[1:])),
+            z=np.concatenate((self.z, tail.z[1:])),
+            significance=(
+                None if self.significance is None or tail.significance is None
+                else np.concatenate((self.significance, tail.significance[1:]))
+            ),
+            slopes=None if self.slopes is None else np.concatenate(
+                (self.slopes[:-1], tail.with_slopes().slopes)
+            )
+        )
+
+    def at(
+            self,
+            md: float | list[float] | np.ndarray[Any, np.dtype[np.float64]]
+    ) -> np.ndarray[Any, np.dtype[np.float64]]:
+        """
+        Возвращает координаты точек траектории на глубинах md в виде
+        массива формы (..., 3) со столбцами x, y и z.
+
+        Отрезки всех глубин находятся одним вызовом searchsorted, а
+        координаты вычисляются вместе по приращениям slopes. Глубины
+        за пределами траектории заменяются ближайшим концом (как в
+        np.interp).
+
+        """
+
+        slopes: np.ndarray[Any, np.dtype[np.float64]] = (
+            self.slopes if self.slopes is not None
+            else self.with_slopes().slopes
+        )
+        md = np.clip(np.asarray(md, dtype=np.float64), self.md[0], self.md[-1])
+        segment: np.ndarray[Any, np.dtype[np.intp]] = (
+            self.md.searchsorted(md, 'right') - 1
+        )
+
+        return (
+            np.stack((self.x[segment], self.y[segment], self.z[segment]),
+                     axis=-1)
+            + slopes[segment] * (md - self.md[segment])[..., None]
+        )
+
+    def window(self, md_from: float | None = None,
+               md_to: float | None = None) -> 'Trajectory':
+        """
+        Возвращает часть траектории от глубины md_from до md_to: узлы
+        внутри этого диапазона и интерполированные (см. at) узлы на
+        его концах. Концы, выходящие за пределы траектории или не
+        заданные, заменяются её концами.
+
+        """
+
+        md_from = self.md[0] if md_from is None \
+            else min(max(md_from, self.md[0]), self.md[-1])
+        md_to = self.md[-1] if md_to is None \
+            else min(max(md_to, md_from), self.md[-1])
+
+        start: int = int(self.md.searchsorted(md_from, 'right'))
+        stop: int = max(int(self.md.searchsorted(md_to, 'left')), start)
+        edges: np.ndarray[Any, np.dtype[np.float64]] = np.array(
+            [md_from, md_to] if md_to > md_from else [md_from]
+        )
+        points: np.ndarray[Any, np.dtype[np.float64]] = self.at(edges)
+
+        return Trajectory(
+            md=np.concatenate((edges[:1], self.md[start:stop], edges[1:])),
+            x=np.concatenate(
+                (points[:1, 0], self.x[start:stop], points[1:, 0])
+            ),
+            y=np.concatenate(
+                (points[:1, 1], self.y[start:stop], points[1:, 1])
+            ),
+            z=np.concatenate(
+                (points[:1, 2], self.z[start:stop], points[1:, 2])
+            ),
+            # Концы окна всегда входят в упрощённую траекторию.
+            significance=None if self.significance is None
+            else np.concatenate((
+                [np.inf],
+                self.significance[start:stop],
+                np.full(len(edges) - 1, np.inf)
+            ))
+        )
+
+    def simplify(self, max_points: int | None = None,
+                 tolerance: float | None = None) -> 'Trajectory':
+        """
+        Возвращает упрощённую траекторию из узлов исходной.
+
+        Упрощённая траектория отклоняется от исходной не более чем на
+        tolerance и содержит не более max_points узлов (но не меньше
+        двух). Если заданы оба ограничения, выполняются оба.
+
+        """
+
+        significance: np.ndarray[Any, np.dtype[np.float64]] = (
+            self.significance if self.significance is not None
+            else self.with_significance().significance
+        )
+        kept: np.ndarray[Any, np.dtype[np.intp]] = (
+            np.arange(len(self)) if tolerance is None
+            else np.flatnonzero(significance > tolerance)
+        )
+
+        if max_points is not None and max(max_points, 2) < len(kept):
+            # Концы траектории имеют бесконечную значимость, поэтому
+            # всегда входят в max_points самых значимых узлов.
+            kept = np.sort(kept[np.argpartition(
+                -significance[kept], max(max_points, 2) - 1
+            )[:max(max_points, 2)]])
+
+        return Trajectory(
+            md=self.md[kept],
+            x=self.x[kept],
+            y=self.y[kept],
+            z=self.z[kept],
+            significance=significance[kept]
+        )
+
+    def __len__(self) -> int:
+        return len(self.md)
+
+    def slice(self, start: int, stop: int) -> 'Trajectory':
+        return Trajectory(
+            md=self.md[start:stop],
+            x=self.x[start:stop],
+            y=self.y[start:stop],
+            z=self.z[start:stop],
+            significance=(
+                None if self.significance is None
+                else self.significance[start:stop]
+            )
+        )
+
+    def split(self, chunk_size: int) -> list['Trajectory']:
+        """
+        Разбивает траекторию на фрагменты по chunk_size отрезков.
+
+        Соседние фрагменты имеют один общий узел. При chunk_size <= 0
+        траектория не разбивается.
+
+        """
+
+        if chunk_size <= 0 or len(self) <= chunk_size + 1:
+            return [self]
+
+        return [
+            self.slice(start, start + chunk_size + 1)
+            for start in range(0, len(self) - 1, chunk_size)
+        ]
+
+    def packed_chunks(
+            self,
+            chunk_size: int
+    ) -> tuple[list[float], list[float], list[bytes]]:
+        """
+        Возвращает аргументы md_min, md_max и chunks для функций
+        insert_well_packed и pack_well.
+
+        """
+
+        chunks: list[Trajectory] = self.split(chunk_size)
+
+        return (
+            [float(chunk.md[0]) for chunk in chunks],
+            [float(chunk.md[-1]) for chunk in chunks],
+            [encode_bytea(chunk.packed()) for chunk in chunks]
+        )
+
+    def packed(self) -> np.ndarray[Any, np.dtype[np.float64]]:
+        """
+        Возвращает траекторию в виде массива формы (4, N) или, если
+        значимость узлов вычислена, (5, N) для хранения в упакованном
+        формате.
+
+        """
+
+        if self.significance is None:
+            return np.vstack((self.md, self.x, self.y, self.z))
+
+        return np.vstack(
+            (self.md, self.x, self.y, self.z, self.significance)
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class MDGrid:
+    """
+    Равномерная сетка глубин start, start + step, ... с последней
+    глубиной end.
+
+    """
+
+    start: float
+    step: float
+    size: int
+    end: float
+
+    @classmethod
+    def by_step(cls, start: float, end: float, step: float) -> 'MDGrid':
+        """
+        Сетка с шагом step. Если end не попадает на сетку, он
+        добавляется последней глубиной.
+
+        """
+
+        steps: int = int(np.floor((end - start) / step))
+
+        return cls(
+            start=start,
+            step=step,
+            size=steps + (2 if start + steps * step < end else 1),
+            end=end
+        )
+
+    @classmethod
+    def by_count(cls, start: float, end: float, count: int) -> 'MDGrid':
+        """
+        Сетка из count глубин от start до end (как в np.linspace).
+
+        """
+
+        return cls(
+            start=start,
+            step=(end - start) / (count - 1),
+            size=count,
+            end=end
+        )
+
+    def __len__(self) -> int:
+        return self.size
+
+    def md(self, start: int = 0,
+           stop: int | None = None) -> np.ndarray[Any, np.dtype[np.float64]]:
+        """
+        Возвращает глубины сетки с номерами от start до stop.
+
+        """
+
+        stop = self.size if stop is None else min(stop, self.size)
+        md: np.ndarray[Any, np.dtype[np.float64]] = np.minimum(
+            self.start + self.step * np.arange(start, stop, dtype=np.float64),
+            self.end
+        )
+
+        if stop == self.size and stop > start:
+            md[-1] = self.end
+
+        return md
+
+
+@dataclass(frozen=True, slots=True)
+class DepthIndex:
+    """
+    Разбиение траектории на участки, на которых Z монотонно
+    возрастает или убывает.
+
+    Участок i содержит узлы от starts[i] до stops[i] включительно,
+    соседние участки имеют общий узел (точку разворота). Отрезки, на
+    которых Z не меняется, относятся к предыдущему участку.
+
+    """
+
+    starts: np.ndarray[Any, np.dtype[np.intp]]
+    stops: np.ndarray[Any, np.dtype[np.intp]]
+    z_min: np.ndarray[Any, np.dtype[np.float64]]
+    z_max: np.ndarray[Any, np.dtype[np.float64]]
+
+    @property
+    def nbytes(self) -> int:
+        return (self.starts.nbytes + self.stops.nbytes + self.z_min.nbytes
+                + self.z_max.nbytes)
+
+    @classmethod
+    def build(cls, trajectory: Trajectory) -> 'DepthIndex':
+        direction: np.ndarray[Any, np.dtype[np.float64]] = np.sign(
+            np.diff(trajectory.z)
+        )
+        # Направление отрезков без изменения Z заменяется направлением
+        # ближайшего предыдущего отрезка, на котором Z меняется.
+        changed: np.ndarray[Any, np.dtype[np.intp]] = np.where(
+            direction != 0., np.arange(len(direction)), 0
+        )
+        direction = direction[np.maximum.accumulate(changed)] \
+            if len(direction) else direction
+
+        turns: np.ndarray[Any, np.dtype[np.intp]] = (
+            np.flatnonzero(direction[1:] != direction[:-1]) + 1
+        )
+        starts: np.ndarray[Any, np.dtype[np.intp]] = np.concatenate(
+            ([0], turns)
+        ).astype(np.intp)
+        stops: np.ndarray[Any, np.dtype[np.intp]] = np.concatenate(
+            (turns, [len(trajectory) - 1])
+        ).astype(np.intp)
+
+        return cls(
+            starts=starts,
+            stops=stops,
+            z_min=np.minimum(trajectory.z[starts], trajectory.z[stops]),
+            z_max=np.maximum(trajectory.z[starts], trajectory.z[stops])
+        )
+
+    def extend(self, trajectory: Trajectory) -> 'DepthIndex':
+        """
+        Возвращает разбиение траектории trajectory, которая продолжает
+        разбитую траекторию (см. Trajectory.extend).
+
+        Участки до последнего не меняются. Последний участок начинается
+        с отрезка, на котором Z меняется, поэтому разбиение траектории
+        с его начала совпадает с разбиением траектории целиком и
+        заменяет его.
+
+        """
+
+        start: int = int(self.starts[-1])
+        tail: DepthIndex = DepthIndex.build(
+            trajectory.slice(start, len(trajectory))
+        )
+
+        return DepthIndex(
+            starts=np.concatenate((self.starts[:-1], tail.starts + start)),
+            stops=np.concatenate((self.stops[:-1], tail.stops + start)),
+            z_min=np.concatenate((self.z_min[:-1], tail.z_min)),
+            z_max=np.concatenate((self.z_max[:-1], tail.z_max))
+        )
+
+    def md_at(
+            self,
+            trajectory: Trajectory,
+            z: list[float] | np.ndarray[Any, np.dtype[np.float64]]
+    ) -> list[np.ndarray[Any, np.dtype[np.float64]]]:
+        """
+        Возвращает для каждого значения z все глубины, на которых
+        траектория его достигает, в порядке возрастания.
+
+        Для каждого участка, диапазон Z которого содержит значение,
+        отрезок находится двоичным поиском, а глубина - линейной
+        интерполяцией. Все значения обрабатываются участком вместе.
+
+        """
+
+        z = np.asarray(z, dtype=np.float64)
+        queries: list[np.ndarray[Any, np.dtype[np.intp]]] = []
+        depths: list[np.ndarray[Any, np.dtype[np.float64]]] = []
+
+        for run, (start, stop) in enumerate(zip(self.starts, self.stops)):
+            inside: np.ndarray[Any, np.dtype[np.bool_]] = (
+                (z >= self.z_min[run]) & (z <= self.z_max[run])
+            )
+
+            if run:
+                # Точка разворота уже найдена на предыдущем участке.
+                inside &= z != trajectory.z[start]
+
+            query: np.ndarray[Any, np.dtype[np.intp]] = np.flatnonzero(
+                inside
+            )
+
+            if not query.size:
+                continue
+
+            run_z: np.ndarray[Any, np.dtype[np.float64]] = (
+                trajectory.z[start:stop + 1]
+            )
+            run_md: np.ndarray[Any, np.dtype[np.float64]] = (
+                trajectory.md[start:stop + 1]
+            )
+            sign: float = 1. if run_z[-1] >= run_z[0] else -1.
+            segment: np.ndarray[Any, np.dtype[np.intp]] = np.clip(
+                (sign * run_z).searchsorted(sign * z[query], 'right') - 1,
+                0,
+                max(len(run_z) - 2, 0)
+            )
+            end: np.ndarray[Any, np.dtype[np.intp]] = np.minimum(
+                segment + 1, len(run_z) - 1
+            )
+            step: np.ndarray[Any, np.dtype[np.float64]] = (
+                run_z[end] - run_z[segment]
+            )
+            t: np.ndarray[Any, np.dtype[np.float64]] = (
+                (z[query] - run_z[segment])
+                / np.where(step != 0., step, np.inf)
+            )
+
+            queries.append(query)
+            depths.append(
+                run_md[segment] + (run_md[end] - run_md[segment]) * t
+            )
+
+        if not queries:
+            return [np.empty(0) for _ in range(len(z))]
+
+        query: np.ndarray[Any, np.dtype[np.intp]] = np.concatenate(queries)
+        # Участки упорядочены по MD, а устойчивая сортировка сохраняет
+        # этот порядок для каждого значения z.
+        order: np.ndarray[Any, np.dtype[np.intp]] = np.argsort(
+            query, kind='stable'
+        )
+
+        return np.split(
+            np.concatenate(depths)[order],
+            np.cumsum(np.bincount(query, minlength=len(z)))[:-1]
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class Well:
+    """
+    Скважина вместе с декодированной траекторией и, если они уже
+    построены, пространственным индексом её отрезков и разбиением на
+    участки монотонного изменения Z.
+
+    """
+
+    name: str
+    head: tuple[float, float]
+    trajectory: Trajectory
+    index: 'SegmentIndex | None' = None
+    depth_index: DepthIndex | None = None
+
+    @property
+    def nbytes(self) -> int:
+        return self.trajectory.nbytes + sum(
+            index.nbytes for index in (self.index, self.depth_index)
+            if index is not None
+        )
+
+    def extend(self, tail: Trajectory) -> 'Well':
+        """
+        Возвращает скважину, траектория которой продолжена узлами tail
+        (см. Trajectory.extend). Построенные индексы дополняются, а не
+        строятся заново.
+
+        """
+
+        trajectory: Trajectory = self.trajectory.extend(tail)
+
+        return replace(
+            self,
+            trajectory=trajectory,
+            index=None if self.index is None
+            else self.index.extend(trajectory),
+            depth_index=None if self.depth_index is None
+            else self.depth_index.extend(trajectory)
+        )
@@ -6,24 +6,73 @@
 
 """
 
-from typing import Any
+import asyncio
+from dataclasses import replace
+from functools import partial
+from typing import Any, Awaitable, Callable
 from uuid import UUID
 
-import asyncpg as apg
 import numpy as np
-import asyncpg.exceptions as apg_exc
 
 import services.exceptions as exc
+from config import TRAJECTORY_CACHE_SIZE
 from database import db_instance
+from services.cache import trajectory_cache
+from services.shared_cache import shared_trajectory_cache
+from services.spatial import SegmentIndex
+from services.storage import storage
+from services.trajectory import (
+    DepthIndex,
+    MDGrid,
+    Trajectory,
+    Well,
+    decode_array
+)
+
+
+# Количество соседних скважин, которые загружаются и сравниваются с
+# опорной одновременно (см. well_separation).
+SEPARATION_GROUP_SIZE: int = 16
+
+# Наибольшее количество точек траектории, пересчитанной на
+# равномерную сетку глубин (см. well_resample).
+RESAMPLE_MAX_POINTS: int = 10_000_000
+
+
+def _make_trajectory(
+        well_head: tuple[float, float],
+        md: list[float] | np.ndarray,
+        x: list[float] | np.ndarray,
+        y: list[float] | np.ndarray,
+        z: list[float] | np.ndarray) -> Trajectory:
+    """
+    Проверяет данные о скважине (в том числе возрастание MD) и
+    собирает из них траекторию вместе со значимостью узлов для её
+    упрощения.
+
+    """
+
+    if not (len(md) == len(x) == len(y) == len(z)):
+        raise exc.ArrayDifferentSizesException()
+
+    if well_head[0] != x[0] or well_head[1] != y[0]:
+        raise exc.InconsistentHeadAndFirstNodeException()
+
+    trajectory: Trajectory = Trajectory.from_arrays(md, x, y, z)
+
+    if not np.all(np.diff(trajectory.md) > 0.):
+        raise exc.NonMonotonicMDException()
+
+    return trajectory.with_significance()
 
 
 async def well_create(
         well_name: str,
         well_head: tuple[float, float],
-        md: list[float],
-        x: list[float],
-        y: list[float],
-        z: list[float]) -> UUID:
+        md: list[float] | np.ndarray,
+        x: list[float] | np.ndarray,
+        y: list[float] | np.ndarray,
+        z: list[float] | np.ndarray) -> UUID:
     """
     Добавляет новые данные о скважине в БД.
 
@@ -31,55 +80,539 @@ async def well_create(
 
     """
 
-    if not (len(md) == len(x) == len(y) == len(z)):
-        raise exc.ArrayDifferentSizesException()
+    return await storage.create(
+        well_name,
+        well_head,
+        _make_trajectory(well_head, md, x, y, z)
+    )
 
-    if well_head[0] != x[0] or well_head[1] != y[0]:
-        raise exc.InconsistentHeadAndFirstNodeException()
 
-    md_array: np.ndarray[Any, np.dtype[np.float64]] = np.asarray(
-        md, dtype=np.float64
+async def well_create_many(
+        wells: list[tuple[str, tuple[float, float], list[float],
+                          list[float], list[float], list[float]]]
+) -> list[UUID | Exception]:
+    """
+    Добавляет в БД данные сразу о нескольких скважинах одной
+    транзакцией.
+
+    Каждый элемент wells содержит имя, устье, md, x, y и z скважины
+    (как в well_create). Возвращает для каждой скважины в том же
+    порядке её идентификатор или исключение, из-за которого она не
+    была создана. Ошибка в одной скважине не мешает созданию
+    остальных.
+
+    """
+
+    results: list[UUID | Exception] = []
+    valid: list[tuple[str, tuple[float, float], Trajectory]] = []
+
+    for well_name, well_head, md, x, y, z in wells:
+        try:
+            valid.append((
+                well_name,
+                well_head,
+                _make_trajectory(well_head, md, x, y, z)
+            ))
+        except (exc.ArrayDifferentSizesException,
+                exc.InconsistentHeadAndFirstNodeException,
+                exc.NonMonotonicMDException) as e:
+            results.append(e)
+        else:
+            results.append(None)
+
+    uuids: list[UUID | None] = (
+        await storage.create_many(valid) if valid else []
     )
-    x_array: np.ndarray[Any, np.dtype[np.float64]] = np.asarray(
-        x, dtype=np.float64
+    created = iter(uuids)
+
+    for i, result in enumerate(results):
+        if result is None:
+            results[i] = (
+                next(created) or exc.WellAlreadyExistsException()
+            )
+
+    return results
+
+
+async def well_create_binary(
+        well_name: str,
+        well_head: tuple[float, float],
+        md: bytes,
+        x: bytes,
+        y: bytes,
+        z: bytes) -> UUID:
+    """
+    Добавляет новые данные о скважине в БД, принимая md, x, y и z в
+    бинарном виде (см. decode_array).
+
+    Данные преобразуются в массивы NumPy без создания объектов float
+    для каждой точки.
+
+    """
+
+    return await well_create(
+        well_name,
+        well_head,
+        decode_array(md),
+        decode_array(x),
+        decode_array(y),
+        decode_array(z)
     )
-    y_array: np.ndarray[Any, np.dtype[np.float64]] = np.asarray(
-        y, dtype=np.float64
+
+
+async def well_append(
+        uuid: UUID,
+        md: list[float] | np.ndarray,
+        x: list[float] | np.ndarray,
+        y: list[float] | np.ndarray,
+        z: list[float] | np.ndarray) -> int:
+    """
+    Добавляет узлы в конец траектории скважины и возвращает количество
+    её узлов после добавления.
+
+    MD новых узлов должна возрастать и быть больше MD последнего узла
+    траектории. Записанные узлы не перезаписываются (см.
+    WellStorage.append), а закэшированная траектория и построенные по
+    ней индексы продолжаются новыми узлами.
+
+    """
+
+    if not (len(md) == len(x) == len(y) == len(z)):
+        raise exc.ArrayDifferentSizesException()
+
+    nodes: Trajectory = Trajectory.from_arrays(md, x, y, z)
+    well: Well | None = trajectory_cache.get(uuid)
+    last: Trajectory = (
+        well.trajectory if well is not None
+        else await storage.get_chunk(uuid, np.inf)
     )
-    z_array: np.ndarray[Any, np.dtype[np.float64]] = np.asarray(
-        z, dtype=np.float64
+
+    while True:
+        end: int = len(last) - 1
+        tail: Trajectory = Trajectory(
+            md=np.r_[last.md[end], nodes.md],
+            x=np.r_[last.x[end], nodes.x],
+            y=np.r_[last.y[end], nodes.y],
+            z=np.r_[last.z[end], nodes.z]
+        )
+
+        if not np.all(np.diff(tail.md) > 0.):
+            raise exc.NonMonotonicMDException()
+
+        tail = tail.with_significance()
+        count: int | None = await storage.append(uuid, tail)
+
+        if count is not None:
+            break
+
+        # Траекторию продолжил другой запрос (возможно, в другом
+        # процессе), поэтому последний узел читается заново из БД.
+        last = await storage.get_chunk(uuid, np.inf)
+
+    _extend_cached_well(uuid, tail)
+    shared_trajectory_cache.invalidate(uuid)
+
+    return count
+
+
+def _extend_cached_well(uuid: UUID, tail: Trajectory) -> None:
+    """
+    Продолжает закэшированную траекторию скважины узлами tail, которые
+    начинаются не позже её последнего узла.
+
+    """
+
+    well: Well | None = trajectory_cache.peek(uuid)
+
+    if well is None or well.trajectory.md[-1] >= tail.md[-1]:
+        return
+
+    start: int = int(tail.md.searchsorted(well.trajectory.md[-1]))
+
+    if tail.md[start] != well.trajectory.md[-1]:
+        # Траектория в кэше не стыкуется с tail.
+        trajectory_cache.invalidate(uuid)
+        return
+
+    trajectory_cache.replace(
+        uuid,
+        well.extend(tail.slice(start, len(tail)))
     )
 
+
+async def _fetch_appended(uuid: UUID, md_from: float) -> None:
+    """
+    Загружает из хранилища узлы траектории скважины после глубины
+    md_from и продолжает ими закэшированную траекторию.
+
+    """
+
     try:
-        well_id: UUID = await db_instance.fetch_val(
-            '''SELECT insert_well(
-                $1,
-                $2,
-                $3::DOUBLE PRECISION[],
-                $4::DOUBLE PRECISION[],
-                $5::DOUBLE PRECISION[],
-                $6::DOUBLE PRECISION[])''',
-            well_name,
-            well_head,
-            md_array,
-            x_array,
-            y_array,
-            z_array
-        )
-    except apg_exc.UniqueViolationError:
-        raise exc.WellAlreadyExistsException()
+        well: Well = await storage.get_window(uuid, md_from, np.inf)
+    except Exception:
+        trajectory_cache.invalidate(uuid)
+        raise
 
-    return well_id
+    _extend_cached_well(uuid, well.trajectory)
 
 
 async def well_remove(uuid: UUID) -> None:
-    is_deleted: bool = await db_instance.fetch_val(
-        'SELECT * FROM delete_well($1)',
-        uuid
+    try:
+        await storage.remove(uuid)
+    finally:
+        trajectory_cache.invalidate(uuid)
+        shared_trajectory_cache.invalidate(uuid)
+
+
+def _clear_caches() -> None:
+    # При (пере)подключении уведомления могли быть пропущены, поэтому
+    # сбрасывается и общий кэш: его записи тоже могли устареть. Он
+    # очищается под блокировкой каталога, которую может держать другой
+    # воркер, поэтому не в цикле событий.
+    trajectory_cache.clear()
+    asyncio.get_running_loop().run_in_executor(
+        None,
+        shared_trajectory_cache.clear
+    )
+
+
+def _on_well_removed(payload: str | None) -> None:
+    if payload is None:
+        _clear_caches()
+    else:
+        trajectory_cache.invalidate(UUID(payload))
+        shared_trajectory_cache.invalidate(UUID(payload))
+
+
+def _on_well_appended(payload: str | None) -> None:
+    # payload - идентификатор скважины и новая MD последнего узла.
+    if payload is None:
+        _clear_caches()
+        return
+
+    uuid_text, md_max = payload.split()
+    uuid: UUID = UUID(uuid_text)
+    well: Well | None = trajectory_cache.peek(uuid)
+    # Запись общего кэша могла быть сделана другим воркером по
+    # загрузке, начатой до добавления узлов, уже после того, как её
+    # удалил добавивший узлы воркер.
+    shared_trajectory_cache.invalidate(uuid)
+
+    if well is None:
+        # Загрузки скважины, начатые до добавления узлов, не должны
+        # попасть в кэш.
+        trajectory_cache.invalidate(uuid)
+    elif well.trajectory.md[-1] < float(md_max):
+        # Из хранилища загружаются только новые фрагменты траектории.
+        _start_fetch(
+            ('appended', uuid, md_max),
+            partial(_fetch_appended, uuid, float(well.trajectory.md[-1]))
+        )
+
+
+async def listen_well_changes() -> None:
+    """
+    Подписывает кэш траекторий текущего процесса на удаление скважин
+    и продолжение их траекторий в других процессах (уведомления
+    каналов well_removed и well_appended).
+
+    """
+
+    await db_instance.listen('well_removed', _on_well_removed)
+    await db_instance.listen('well_appended', _on_well_appended)
+
+
+async def _load_well(uuid: UUID, cache_version: int) -> Well:
+    """
+    Берёт скважину из общего кэша воркеров, а при её отсутствии там -
+    загружает вместе с траекторией из хранилища, вычисляет приращения
+    координат на отрезках траектории для well_at и кладёт в общий кэш.
+
+    cache_version - версия кэша текущего процесса до начала загрузки
+    (см. TrajectoryCache.version).
+
+    """
+
+    # Чтение и запись общего кэша работают с файлами, а запись может
+    # ждать блокировку каталога (см. SharedTrajectoryCache._evict),
+    # поэтому выполняются не в цикле событий.
+    well: Well | None = await asyncio.to_thread(
+        shared_trajectory_cache.get, uuid
     )
 
-    if not is_deleted:
-        raise exc.WellNotFoundException()
+    if well is not None:
+        return well
+
+    well = await storage.get_well(uuid)
+    well = await asyncio.to_thread(
+        shared_trajectory_cache.put,
+        uuid,
+        replace(well, trajectory=well.trajectory.with_slopes())
+    )
+
+    if trajectory_cache.version != cache_version:
+        # Скважина могла быть удалена во время загрузки.
+        shared_trajectory_cache.invalidate(uuid)
+
+    return well
+
+
+# Выполняющиеся загрузки данных скважин по ключу (вид данных, uuid,
+# параметры) и количество запросов, которые дождались уже начатой
+# загрузки вместо выполнения своей (см. _coalesce).
+_in_flight: dict[tuple[Any, ...], asyncio.Task] = {}
+_coalesced_requests: int = 0
+
+
+def _start_fetch(key: tuple[Any, ...],
+                 fetch: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+    """
+    Возвращает задачу загрузки с ключом key, запуская fetch, если
+    такая загрузка ещё не выполняется.
+
+    """
+
+    task: asyncio.Task | None = _in_flight.get(key)
+
+    if task is None:
+        task = asyncio.create_task(fetch())
+        _in_flight[key] = task
+        task.add_done_callback(partial(_finish_fetch, key))
+
+    return task
+
+
+def _finish_fetch(key: tuple[Any, ...], task: asyncio.Task) -> None:
+    if _in_flight.get(key) is task:
+        del _in_flight[key]
+
+    # Исключение помечается полученным, даже если загрузку никто не
+    # дождался (например, фоновую в _warm_up).
+    if not task.cancelled():
+        task.exception()
+
+
+async def _coalesce(key: tuple[Any, ...],
+                    fetch: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Выполняет загрузку fetch один раз для всех одновременных запросов
+    с одинаковым key и возвращает каждому её результат (или бросает
+    её исключение).
+
+    Отмена одного из запросов не отменяет загрузку для остальных.
+
+    """
+
+    global _coalesced_requests
+
+    if key in _in_flight:
+        _coalesced_requests += 1
+
+    return await asyncio.shield(_start_fetch(key, fetch))
+
+
+def coalescing_stats() -> dict[str, int]:
+    """
+    Возвращает количество выполняющихся загрузок и запросов,
+    объединённых с уже начатыми загрузками, в текущем процессе.
+
+    """
+
+    return {
+        'in_flight': len(_in_flight),
+        'coalesced': _coalesced_requests
+    }
+
+
+async def _cache_well(uuid: UUID) -> Well:
+    cache_version: int = trajectory_cache.version
+    well: Well = await _load_well(uuid, cache_version)
+    trajectory_cache.put(uuid, well, cache_version)
+
+    return well
+
+
+async def _fetch_well(uuid: UUID) -> Well:
+    """
+    Загружает скважину (см. _load_well) и кладёт её в кэш.
+
+    Одновременные загрузки одной скважины объединяются.
+
+    """
+
+    return await _coalesce(('well', uuid), partial(_cache_well, uuid))
+
+
+def _warm_up(uuid: UUID) -> None:
+    """
+    Загружает траекторию скважины в кэш в фоне, чтобы последующие
+    запросы к ней не обращались к БД.
+
+    """
+
+    if TRAJECTORY_CACHE_SIZE:
+        _start_fetch(('well', uuid), partial(_cache_well, uuid))
+
+
+async def _get_trajectory(uuid: UUID) -> Trajectory:
+    """
+    Возвращает траекторию скважины из кэша, а при её отсутствии там -
+    из БД.
+
+    """
+
+    well: Well | None = trajectory_cache.get(uuid)
+
+    if well is None:
+        well = await _fetch_well(uuid)
+
+    return well.trajectory
+
+
+async def _get_indexed_well(uuid: UUID) -> Well:
+    """
+    Возвращает скважину вместе с пространственным индексом отрезков
+    траектории. Индекс строится при первом обращении и хранится в кэше
+    вместе с траекторией.
+
+    """
+
+    well: Well | None = trajectory_cache.get(uuid)
+
+    if well is not None and well.index is not None:
+        return well
+
+    async def fetch() -> Well:
+        cache_version: int = trajectory_cache.version
+        well: Well | None = trajectory_cache.get(uuid)
+
+        if well is None:
+            well = await _load_well(uuid, cache_version)
+
+        if well.index is None:
+            well = replace(well, index=SegmentIndex.build(well.trajectory))
+            trajectory_cache.put(uuid, well, cache_version)
+
+        return well
+
+    return await _coalesce(('indexed', uuid), fetch)
+
+
+async def _get_depth_indexed_well(uuid: UUID) -> Well:
+    """
+    Возвращает скважину вместе с разбиением траектории на участки
+    монотонного изменения Z (см. DepthIndex). Разбиение строится при
+    первом обращении и хранится в кэше вместе с траекторией.
+
+    """
+
+    well: Well | None = trajectory_cache.get(uuid)
+
+    if well is not None and well.depth_index is not None:
+        return well
+
+    async def fetch() -> Well:
+        cache_version: int = trajectory_cache.version
+        well: Well | None = trajectory_cache.get(uuid)
+
+        if well is None:
+            well = await _load_well(uuid, cache_version)
+
+        if well.depth_index is None:
+            well = replace(well,
+                           depth_index=DepthIndex.build(well.trajectory))
+            trajectory_cache.put(uuid, well, cache_version)
+
+        return well
+
+    return await _coalesce(('depth_indexed', uuid), fetch)
+
+
+async def well_get_trajectory(uuid: UUID,
+                              max_points: int | None = None,
+                              tolerance: float | None = None,
+                              md_from: float | None = None,
+                              md_to: float | None = None) -> Well:
+    """
+    Возвращает скважину вместе с траекторией в виде массивов NumPy.
+
+    Если задан md_from или md_to, возвращается только часть траектории
+    между этими глубинами (см. Trajectory.window). Если скважины нет
+    в кэше, из БД загружаются только фрагменты траектории, покрывающие
+    эту часть.
+
+    Если задан max_points или tolerance, траектория упрощается (см.
+    Trajectory.simplify).
+
+    """
+
+    windowed: bool = md_from is not None or md_to is not None
+    well: Well | None = trajectory_cache.get(uuid)
+
+    if well is None and windowed:
+        window: tuple[float, float] = (
+            -np.inf if md_from is None else md_from,
+            np.inf if md_to is None else md_to
+        )
+        well = await _coalesce(
+            ('window', uuid, *window),
+            partial(storage.get_window, uuid, *window)
+        )
+    elif well is None:
+        well = await _fetch_well(uuid)
+
+    trajectory: Trajectory = well.trajectory
+
+    if windowed:
+        trajectory = trajectory.window(md_from, md_to)
+
+    if max_points is not None or tolerance is not None:
+        trajectory = trajectory.simplify(max_points, tolerance)
+
+    if trajectory is well.trajectory:
+        return well
+
+    return Well(name=well.name, head=well.head, trajectory=trajectory)
+
+
+async def well_resample(
+        uuid: UUID,
+        step: float | None = None,
+        count: int | None = None,
+        md_from: float | None = None,
+        md_to: float | None = None,
+        max_points: int = RESAMPLE_MAX_POINTS) -> tuple[Well, MDGrid]:
+    """
+    Возвращает скважину вместе с полной траекторией и равномерную
+    сетку глубин с шагом step или из count глубин, на которую нужно
+    пересчитать траекторию (см. Trajectory.at).
+
+    Сетка покрывает траекторию целиком или диапазон глубин от md_from
+    до md_to. Бросает TooManyPointsException, если в сетке больше
+    max_points глубин.
+
+    """
+
+    well: Well = await well_get_trajectory(uuid)
+    md: np.ndarray[Any, np.dtype[np.float64]] = well.trajectory.md
+
+    start: float = float(md[0]) if md_from is None \
+        else min(max(md_from, float(md[0])), float(md[-1]))
+    end: float = float(md[-1]) if md_to is None \
+        else min(max(md_to, start), float(md[-1]))
+
+    if step is not None:
+        if (end - start) / step >= max_points:
+            raise exc.TooManyPointsException()
+
+        grid: MDGrid = MDGrid.by_step(start, end, step)
+    else:
+        if count > max_points:
+            raise exc.TooManyPointsException()
+
+        grid: MDGrid = MDGrid.by_count(start, end, count)
+
+    return well, grid
 
 
 async def well_get(uuid: UUID,
@@ -108,22 +641,64 @@ async def well_get(uuid: UUID,
 
     """
 
-    columns: str = (
-        'name, head, md as "MD", x as "X", y as "Y", z as "Z"'
-        if return_trajectory else 'name, head'
+    if return_trajectory:
+        well: Well = await well_get_trajectory(uuid)
+
+        return {
+            'name': well.name,
+            'head': well.head,
+            'MD': well.trajectory.md.tolist(),
+            'X': well.trajectory.x.tolist(),
+            'Y': well.trajectory.y.tolist(),
+            'Z': well.trajectory.z.tolist()
+        }
+
+    well: Well | None = trajectory_cache.get(uuid)
+
+    if well is not None:
+        return {'name': well.name, 'head': well.head}
+
+    name, head = await _coalesce(
+        ('header', uuid),
+        partial(storage.get_header, uuid)
     )
 
-    try:
-        query: apg.Record | None = await db_instance.fetch_row(
-            f'SELECT {columns} FROM well_{uuid.hex}'
-        )
-    except apg_exc.UndefinedTableError:
-        raise exc.WellNotFoundException()
+    return {'name': name, 'head': head}
 
-    if not query:
-        raise exc.WellNotFoundException()
 
-    return dict(query)
+async def well_search(
+        by_trajectory: bool,
+        box: tuple[float, float, float, float] | None = None,
+        point: tuple[float, float] | None = None,
+        radius: float | None = None,
+        depth: tuple[float, float] | None = None,
+        limit: int | None = None) -> list[dict[str, Any]]:
+    """
+    Ищет скважины по расположению устья или габаритов траектории (см.
+    WellStorage.search).
+
+    Возвращает список словарей следующего формата:
+
+    {
+        'uuid': 'well_uuid',
+        'name': 'well_name',
+        'head': (x: float, y: float),
+        'distance': float | None
+    }
+
+    """
+
+    return [
+        {
+            'uuid': str(well['pk_id']),
+            'name': well['name'],
+            'head': well['head'],
+            'distance': well['distance']
+        }
+        for well in await storage.search(
+            by_trajectory, box, point, radius, depth, limit
+        )
+    ]
 
 
 async def well_at(uuid: UUID, md: float) -> tuple[float, float, float]:
@@ -133,21 +708,200 @@ async def well_at(uuid: UUID, md: float) -> tuple[float, float, float]:
 
     """
     
-    try:
-        well_trajectory: apg.Record | None = await db_instance.fetch_row(
-            f'SELECT md, x, y, z FROM well_{uuid.hex}'
+    well: Well | None = trajectory_cache.get(uuid)
+
+    if well is not None:
+        trajectory: Trajectory = well.trajectory
+    elif ('well', uuid) in _in_flight:
+        # Скважина уже загружается целиком (например, в _warm_up).
+        trajectory: Trajectory = (await _fetch_well(uuid)).trajectory
+    else:
+        trajectory: Trajectory = await _coalesce(
+            ('chunk', uuid, md),
+            partial(storage.get_chunk, uuid, md)
         )
-    except apg_exc.UndefinedTableError:
-        raise exc.WellNotFoundException()
-    
-    if not well_trajectory:
-        raise exc.WellNotFoundException()
+        _warm_up(uuid)
+
+    x, y, z = trajectory.at(md).tolist()
+
+    return x, y, z
+
 
-    md_array: np.ndarray[Any, np.dtype[np.float64]] = np.asarray(
-        well_trajectory['md'])
+async def well_at_many(
+        uuid: UUID,
+        md: list[float]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Возвращает координаты точек на траектории скважины сразу для
+    нескольких значений глубины md.
+
+    Траектория запрашивается из БД один раз, а координаты вычисляются
+    векторно для всего списка глубин тем же способом, что и в well_at.
+
+    """
+
+    trajectory: Trajectory = await _get_trajectory(uuid)
 
-    x: float = float(np.interp(md, md_array, well_trajectory['x']))
-    y: float = float(np.interp(md, md_array, well_trajectory['y']))
-    z: float = float(np.interp(md, md_array, well_trajectory['z']))
+    x, y, z = np.ascontiguousarray(trajectory.at(md).T)
 
     return x, y, z
+
+
+async def well_md_at_depth(
+        uuid: UUID,
+        z: list[float]) -> list[np.ndarray]:
+    """
+    Возвращает для каждого значения z все глубины MD, на которых
+    траектория скважины его достигает, в порядке возрастания.
+
+    Если траектория не достигает значения, для него возвращается
+    пустой массив. Для скважин, которые поворачивают вверх, одному
+    значению соответствует несколько глубин.
+
+    """
+
+    well: Well = await _get_depth_indexed_well(uuid)
+
+    return well.depth_index.md_at(well.trajectory, z)
+
+
+async def well_nearest(
+        uuid: UUID,
+        points: list[tuple[float, float, float]]
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Находит для каждой точки (x, y, z) из points ближайшую к ней точку
+    траектории скважины.
+
+    Возвращает MD, X, Y, Z найденных точек и расстояния до них.
+
+    """
+
+    well: Well = await _get_indexed_well(uuid)
+    trajectory: Trajectory = well.trajectory
+
+    distance, segments, t = well.index.nearest(
+        np.asarray(points, dtype=np.float64).T
+    )
+    end: np.ndarray[Any, np.dtype[np.intp]] = np.minimum(
+        segments + 1, len(trajectory) - 1
+    )
+
+    md, x, y, z = (
+        values[segments] + (values[end] - values[segments]) * t
+        for values in (trajectory.md, trajectory.x, trajectory.y,
+                       trajectory.z)
+    )
+
+    return md, x, y, z, distance
+
+
+def _md_at(trajectory: Trajectory, segment: int, position: float) -> float:
+    end: int = min(segment + 1, len(trajectory) - 1)
+
+    return float(
+        trajectory.md[segment]
+        + (trajectory.md[end] - trajectory.md[segment]) * position
+    )
+
+
+async def well_separation(
+        uuid: UUID,
+        offsets: list[UUID] | None = None,
+        radius: float | None = None,
+        limit: int | None = None) -> list[dict[str, Any]]:
+    """
+    Находит наименьшие расстояния между траекторией скважины uuid и
+    траекториями соседних скважин offsets.
+
+    Если offsets не заданы, соседними считаются скважины, габариты
+    траекторий которых находятся в пределах radius от габаритов
+    траектории uuid (не более limit скважин). Скважины, траектории
+    которых дальше radius, не возвращаются.
+
+    Соседние скважины загружаются и сравниваются группами по
+    SEPARATION_GROUP_SIZE, а сравнение выполняется в отдельном потоке,
+    чтобы не останавливать обработку других запросов.
+
+    Возвращает список словарей, упорядоченный по расстоянию:
+
+    {
+        'uuid': 'offset_uuid',
+        'name': 'offset_name',
+        'distance': float,
+        'MD': float,          # глубина ближайшей точки на uuid
+        'offset_MD': float    # глубина ближайшей точки на offset
+    }
+
+    """
+
+    reference: Well = await _get_indexed_well(uuid)
+    found_nearby: bool = offsets is None
+
+    if found_nearby:
+        x_min, y_min, z_min, x_max, y_max, z_max = (
+            reference.trajectory.bounds()
+        )
+        offsets = [
+            well['pk_id'] for well in await storage.search(
+                True,
+                (x_min - radius, y_min - radius,
+                 x_max + radius, y_max + radius),
+                None,
+                None,
+                (z_min - radius, z_max + radius),
+                limit
+            )
+            if well['pk_id'] != uuid
+        ]
+
+    max_distance: float = np.inf if radius is None else radius
+    results: list[dict[str, Any]] = []
+
+    def compare(wells: list[tuple[UUID, Well]]) -> list[dict[str, Any]]:
+        compared: list[dict[str, Any]] = []
+
+        for offset_uuid, offset in wells:
+            separation: tuple[float, int, float, int, float] | None = (
+                reference.index.separation(offset.index, max_distance)
+            )
+
+            if separation is None:
+                continue
+
+            distance, segment, position, offset_segment, offset_position = (
+                separation
+            )
+            compared.append({
+                'uuid': str(offset_uuid),
+                'name': offset.name,
+                'distance': distance,
+                'MD': _md_at(reference.trajectory, segment, position),
+                'offset_MD': _md_at(offset.trajectory, offset_segment,
+                                    offset_position)
+            })
+
+        return compared
+
+    for start in range(0, len(offsets), SEPARATION_GROUP_SIZE):
+        group: list[UUID] = offsets[start:start + SEPARATION_GROUP_SIZE]
+        wells: list[Well | Exception] = await asyncio.gather(
+            *map(_get_indexed_well, group),
+            return_exceptions=True
+        )
+        loaded: list[tuple[UUID, Well]] = []
+
+        for offset_uuid, well in zip(group, wells):
+            if isinstance(well, exc.WellNotFoundException) and found_nearby:
+                # Скважина удалена после поиска.
+                continue
+
+            if isinstance(well, BaseException):
+                raise well
+
+            loaded.append((offset_uuid, well))
+
+        results.extend(await asyncio.to_thread(compare, loaded))
+
+    results.sort(key=lambda result: result['distance'])
+
+    return results
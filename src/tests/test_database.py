@@ -0,0 +1,18 @@
+import numpy as np
+import pytest
+
+from database import decode_bytea, encode_bytea
+
+
+@pytest.mark.parametrize('codec', ['raw', 'delta'])
+@pytest.mark.parametrize('nodes', [1, 2, 500])
+def test_packed_trajectory_round_trip(codec, nodes):
+    values: np.ndarray = np.cumsum(
+        np.random.default_rng(nodes).uniform(0., 10., (5, nodes)),
+        axis=1
+    )
+
+    decoded = decode_bytea(encode_bytea(values, codec))
+
+    assert decoded.shape == values.shape
+    assert np.array_equal(decoded, values)
@@ -1,8 +1,11 @@
+import io
 from uuid import UUID, uuid4
 
+import numpy as np
 import pytest
 import requests
 
+from schemas.well import WellCreateBinarySchema
 from utils.well_generator import generate_random_well, Well
 
 
@@ -104,6 +107,9 @@ def test_well_create_inconsistent_head():
         ('invalid_4', (1., 4.), [0, 3], ['x1', 'x2'], [4., 0], [0, 3]),
         ('invalid_5', (1., 4.), [0, 3], [1., 0], ['y1', 'y2'], [0, 3]),
         ('invalid_6', (1., 4.), [0, 3], [1., 0], [4., 0], ['z1', 'z2']),
+        ('invalid_7', (1., 4.), [0, None], [1., 0], [4., 0], [0, 3]),
+        ('invalid_8', (1., 4.), [], [], [], []),
+        ('invalid_9', (1., 4.), [[0, 3]], [1., 0], [4., 0], [0, 3]),
     ]
 )
 def test_well_create_invalid_data(name, head, md, x, y, z):
@@ -125,6 +131,288 @@ def test_well_create_invalid_data(name, head, md, x, y, z):
     assert resp.json()['error'] is not None
 
 
+def test_well_create_invalid_data_location():
+    # Ошибка в массиве сообщается так же, как при проверке каждого
+    # числа средствами pydantic.
+    resp = session.post(
+        'http://localhost:8070/api/well.create',
+        json={
+            'method': 'well.create',
+            'params': {
+                'name': 'invalid_location',
+                'head': (1., 4.),
+                'MD': [0, 3],
+                'X': [1., 'x'],
+                'Y': [4., 0],
+                'Z': [0, 3]
+            }
+        }
+    )
+
+    result = resp.json()
+
+    assert result['data']['arg'] == ['body', 'params', 'X', 1]
+    assert result['error']['message'].startswith(
+        'Input should be a valid number'
+    )
+
+
+def to_npy(values: list[float]) -> bytes:
+    buffer: io.BytesIO = io.BytesIO()
+    np.save(buffer, np.asarray(values))
+
+    return buffer.getvalue()
+
+
+def to_raw(values: list[float]) -> bytes:
+    return np.asarray(values, dtype='<f8').tobytes()
+
+
+@pytest.mark.parametrize(
+    ('suffix', 'encode'),
+    [
+        ('_npy', to_npy),
+        ('_raw', to_raw)
+    ]
+)
+def test_well_create_binary(suffix, encode):
+    resp = session.post(
+        'http://localhost:8070/api/well.create_binary',
+        data={
+            'well': WellCreateBinarySchema(
+                method='well.create_binary',
+                params={'name': well.name + suffix, 'head': well.head}
+            ).model_dump_json()
+        },
+        files={
+            'MD': encode(well.md),
+            'X': encode(well.x),
+            'Y': encode(well.y),
+            'Z': encode(well.z)
+        }
+    )
+
+    try:
+        uuid = resp.json()['data']['uuid']
+    except (KeyError, TypeError):
+        assert False
+    else:
+        assert uuid is not None
+        uuids.append(uuid)
+
+
+@pytest.mark.parametrize(
+    ('md', 'error'),
+    [
+        (b'\x00' * 12, 'MD, X, Y and Z must be non-empty float64 arrays!'),
+        (to_raw([0., 1.]), 'Sizes of MD, X, Y and Z must be equal!'),
+        (to_raw([0., 3., 3.]), 'MD must be strictly increasing!'),
+    ]
+)
+def test_well_create_binary_invalid_data(md, error):
+    resp = session.post(
+        'http://localhost:8070/api/well.create_binary',
+        data={
+            'well': WellCreateBinarySchema(
+                params={'name': 'invalid_binary', 'head': (1., 4.)}
+            ).model_dump_json()
+        },
+        files={
+            'MD': md,
+            'X': to_raw([1., 0., 0.]),
+            'Y': to_raw([4., 0., 0.]),
+            'Z': to_raw([0., 3., 4.])
+        }
+    )
+
+    assert resp.json()['error']['message'] == error
+
+
+def test_well_create_many():
+    params = {
+        'name': well.name + '_many',
+        'head': well.head,
+        'MD': well.md,
+        'X': well.x,
+        'Y': well.y,
+        'Z': well.z
+    }
+    resp = session.post(
+        'http://localhost:8070/api/well.create_many',
+        json={
+            'method': 'well.create_many',
+            'params': {
+                'wells': [
+                    params,
+                    params,
+                    {**params, 'name': well.name},
+                    {**params, 'name': well.name + '_many_sizes', 'MD': [0.]}
+                ]
+            }
+        }
+    )
+
+    results = resp.json()['data']['wells']
+
+    assert len(results) == 4
+    assert results[0]['error'] is None
+    uuids.append(results[0]['data']['uuid'])
+
+    assert results[1]['error']['message'] == 'Well already exists!'
+    assert results[2]['error']['message'] == 'Well already exists!'
+    assert results[3]['error']['message'] == \
+        'Sizes of MD, X, Y and Z must be equal!'
+
+
+def test_well_create_binary_invalid_metadata():
+    resp = session.post(
+        'http://localhost:8070/api/well.create_binary',
+        data={'well': '{"params": {"name": ""}}'},
+        files={
+            'MD': to_raw([0.]),
+            'X': to_raw([1.]),
+            'Y': to_raw([4.]),
+            'Z': to_raw([0.])
+        }
+    )
+
+    result = resp.json()
+
+    assert result['error'] is not None
+    assert result['data']['arg'] == ['body', 'params', 'name']
+
+
+def test_well_append():
+    resp = session.post(
+        'http://localhost:8070/api/well.create',
+        json={
+            "method": "well.create",
+            "params": {
+                "name": generate_random_well(2).name,
+                "head": [0., 0.],
+                "MD": [0., 100.],
+                "X": [0., 0.],
+                "Y": [0., 0.],
+                "Z": [0., 100.]
+            }
+        }
+    )
+    uuid: str = resp.json()['data']['uuid']
+
+    # Траектория и индексы попадают в кэш до добавления узлов.
+    session.post(
+        'http://localhost:8070/api/well.md_at_depth',
+        json={
+            "method": "well.md_at_depth",
+            "params": {"uuid": uuid, "Z": 50.}
+        }
+    )
+
+    appended: list[dict] = []
+
+    for md, x, z in (([150., 200.], [0., 50.], [150., 150.]),
+                     ([250.], [100.], [100.])):
+        resp = session.post(
+            'http://localhost:8070/api/well.append',
+            json={
+                "method": "well.append",
+                "params": {
+                    "uuid": uuid,
+                    "MD": md,
+                    "X": x,
+                    "Y": [0.] * len(md),
+                    "Z": z
+                }
+            }
+        )
+        appended.append(resp.json())
+
+    trajectory = session.post(
+        'http://localhost:8070/api/well.get',
+        json={
+            "method": "well.get",
+            "params": {"uuid": uuid, "return_trajectory": True}
+        }
+    ).json()['data']
+    depths = session.post(
+        'http://localhost:8070/api/well.md_at_depth',
+        json={
+            "method": "well.md_at_depth",
+            "params": {"uuid": uuid, "Z": 125.}
+        }
+    ).json()['data']
+    point = session.post(
+        'http://localhost:8070/api/well.at',
+        json={
+            "method": "well.at",
+            "params": {"uuid": uuid, "MD": 225.}
+        }
+    ).json()['data']
+    session.post(
+        'http://localhost:8070/api/well.remove',
+        json={"method": "well.remove", "params": {"uuid": uuid}}
+    )
+
+    assert appended == [{'data': {'nodes': 4}, 'error': None},
+                        {'data': {'nodes': 5}, 'error': None}]
+    assert trajectory['MD'] == [0., 100., 150., 200., 250.]
+    assert trajectory['X'] == [0., 0., 0., 50., 100.]
+    assert trajectory['Z'] == [0., 100., 150., 150., 100.]
+    assert depths['MD'] == [125., 225.]
+    assert [point['X'], point['Y'], point['Z']] == [75., 0., 125.]
+
+
+@pytest.mark.parametrize(
+    ('md', 'x', 'error'),
+    [
+        ([well.md[-1]], [0.], 'MD must be strictly increasing!'),
+        ([well.md[-1] + 2., well.md[-1] + 1.], [0., 0.],
+         'MD must be strictly increasing!'),
+        ([well.md[-1] + 1.], [0., 0.],
+         'Sizes of MD, X, Y and Z must be equal!')
+    ]
+)
+def test_well_append_invalid_data(md, x, error):
+    resp = session.post(
+        'http://localhost:8070/api/well.append',
+        json={
+            "method": "well.append",
+            "params": {
+                "uuid": uuids[0],
+                "MD": md,
+                "X": x,
+                "Y": [0.] * len(md),
+                "Z": [0.] * len(md)
+            }
+        }
+    )
+
+    assert resp.json()['error']['message'] == error
+
+
+def test_well_append_not_existing_id():
+    resp = session.post(
+        'http://localhost:8070/api/well.append',
+        json={
+            "method": "well.append",
+            "params": {
+                "uuid": str(uuid4()),
+                "MD": [1.],
+                "X": [0.],
+                "Y": [0.],
+                "Z": [0.]
+            }
+        }
+    )
+
+    try:
+        error_message: str = resp.json()['error']['message']
+    except KeyError:
+        assert False
+    else:
+        assert error_message == 'Well not found!'
+
+
 @pytest.mark.parametrize(
     ('return_trajectory'),
     [
@@ -159,6 +447,114 @@ def test_well_get(return_trajectory: bool):
                 assert item in ['name', 'head']
 
 
+def test_well_get_trajectory_values():
+    resp = session.post(
+        'http://localhost:8070/api/well.get',
+        json={
+            'method': 'well.get',
+            'params': {
+                'uuid': uuids[0],
+                'return_trajectory': True
+            }
+        }
+    )
+
+    result = resp.json()
+
+    assert result['error'] is None
+    assert result['data']['name'] == well.name
+    assert result['data']['head'] == list(well.head)
+    assert result['data']['MD'] == well.md
+    assert result['data']['X'] == well.x
+    assert result['data']['Y'] == well.y
+    assert result['data']['Z'] == well.z
+
+
+@pytest.mark.parametrize(
+    ('max_points', 'tolerance'),
+    [
+        (10, None),
+        (None, 1.),
+        (10, 1.)
+    ]
+)
+def test_well_get_simplified(max_points, tolerance):
+    resp = session.post(
+        'http://localhost:8070/api/well.get',
+        json={
+            'method': 'well.get',
+            'params': {
+                'uuid': uuids[0],
+                'return_trajectory': True,
+                'max_points': max_points,
+                'tolerance': tolerance
+            }
+        }
+    )
+
+    data = resp.json()['data']
+    nodes = dict(zip(well.md, zip(well.x, well.y, well.z)))
+
+    assert 2 <= len(data['MD']) < len(well.md)
+    assert max_points is None or len(data['MD']) <= max_points
+    assert data['MD'][0] == well.md[0] and data['MD'][-1] == well.md[-1]
+
+    for md, x, y, z in zip(data['MD'], data['X'], data['Y'], data['Z']):
+        assert nodes[md] == (x, y, z)
+
+
+@pytest.mark.parametrize(
+    ('md_from', 'md_to', 'start', 'stop'),
+    [
+        ((well.md[10] + well.md[11]) / 2., well.md[20], 11, 20),
+        (None, well.md[5], 1, 5),
+        (well.md[-3], well.md[-1] + 100., len(well.md) - 2, len(well.md) - 1)
+    ]
+)
+def test_well_get_window(md_from, md_to, start, stop):
+    resp = session.post(
+        'http://localhost:8070/api/well.get',
+        json={
+            'method': 'well.get',
+            'params': {
+                'uuid': uuids[0],
+                'return_trajectory': True,
+                'md_from': md_from,
+                'md_to': md_to
+            }
+        }
+    )
+
+    data = resp.json()['data']
+    md_from = well.md[0] if md_from is None else md_from
+    md_to = min(md_to, well.md[-1])
+
+    assert data['MD'] == pytest.approx([md_from] + well.md[start:stop]
+                                       + [md_to])
+
+    for key, values in (('X', well.x), ('Y', well.y), ('Z', well.z)):
+        assert data[key] == pytest.approx(
+            np.interp(data['MD'], well.md, values).tolist()
+        )
+
+
+def test_well_get_window_invalid():
+    resp = session.post(
+        'http://localhost:8070/api/well.get',
+        json={
+            'method': 'well.get',
+            'params': {
+                'uuid': uuids[0],
+                'return_trajectory': True,
+                'md_from': well.md[20],
+                'md_to': well.md[10]
+            }
+        }
+    )
+
+    assert resp.json()['error'] is not None
+
+
 @pytest.mark.parametrize(
     ('return_trajectory'),
     [
@@ -184,6 +580,82 @@ def test_well_get_not_existing(return_trajectory: bool):
     assert data is None
 
 
+@pytest.mark.parametrize(
+    ('params', 'expected'),
+    [
+        ({'step': 1.}, np.append(np.arange(well.md[0], well.md[-1], 1.),
+                                 well.md[-1])),
+        ({'count': 7}, np.linspace(well.md[0], well.md[-1], 7)),
+        ({'count': 5, 'md_from': well.md[10], 'md_to': well.md[20]},
+         np.linspace(well.md[10], well.md[20], 5))
+    ]
+)
+def test_well_resample(params, expected):
+    resp = session.post(
+        'http://localhost:8070/api/well.resample',
+        json={
+            'method': 'well.resample',
+            'params': {'uuid': uuids[0]} | params
+        }
+    )
+
+    data = resp.json()['data']
+
+    assert data['name'] == well.name
+    assert data['MD'] == pytest.approx(expected.tolist())
+
+    for key, values in (('X', well.x), ('Y', well.y), ('Z', well.z)):
+        assert data[key] == pytest.approx(
+            np.interp(data['MD'], well.md, values).tolist()
+        )
+
+
+@pytest.mark.parametrize(
+    ('params'),
+    [
+        ({}),
+        ({'step': 1., 'count': 10}),
+        ({'step': 0.}),
+        ({'count': 1}),
+        ({'count': 10, 'md_from': well.md[20], 'md_to': well.md[10]})
+    ]
+)
+def test_well_resample_invalid(params):
+    resp = session.post(
+        'http://localhost:8070/api/well.resample',
+        json={
+            'method': 'well.resample',
+            'params': {'uuid': uuids[0]} | params
+        }
+    )
+
+    assert resp.json()['error'] is not None
+
+
+def test_well_resample_too_many_points():
+    resp = session.post(
+        'http://localhost:8070/api/well.resample',
+        json={
+            'method': 'well.resample',
+            'params': {'uuid': uuids[0], 'step': 1e-9}
+        }
+    )
+
+    assert resp.json()['error']['message'] == 'Too many points requested!'
+
+
+def test_well_resample_not_existing_id():
+    resp = session.post(
+        'http://localhost:8070/api/well.resample',
+        json={
+            'method': 'well.resample',
+            'params': {'uuid': str(uuid4()), 'count': 10}
+        }
+    )
+
+    assert resp.json()['error']['message'] == 'Well not found!'
+
+
 def test_well_at():
     for uuid in uuids:
         session.post(
@@ -218,6 +690,426 @@ def test_well_at_not_existing_id():
         assert error_message == 'Well not found!'
 
 
+def test_well_at_many():
+    md: list[float] = [well.md[0], 10.1546, well.md[-1]]
+
+    for uuid in uuids:
+        resp = session.post(
+            'http://localhost:8070/api/well.at_many',
+            json={
+                "method": "well.at_many",
+                "params": {
+                    "uuid": uuid,
+                    "MD": md
+                }
+            }
+        )
+
+        data = resp.json()['data']
+
+        for item in ['X', 'Y', 'Z']:
+            assert len(data[item]) == len(md)
+
+        assert data['X'][0] == well.x[0]
+        assert data['Y'][-1] == well.y[-1]
+        assert data['Z'][-1] == well.z[-1]
+
+
+def test_well_at_many_not_existing_id():
+    resp = session.post(
+        'http://localhost:8070/api/well.at_many',
+        json={
+            "method": "well.at_many",
+            "params": {
+                "uuid": str(uuid4()),
+                "MD": [10.1546]
+            }
+        }
+    )
+
+    try:
+        error_message: str = resp.json()['error']['message']
+    except KeyError:
+        assert False
+    else:
+        assert error_message == 'Well not found!'
+
+
+def test_well_md_at_depth():
+    # Z скважины возрастает вместе с MD, поэтому у каждого значения
+    # не больше одной глубины.
+    z: list[float] = [well.z[10], (well.z[20] + well.z[21]) / 2.,
+                      well.z[-1] + 1.]
+
+    resp = session.post(
+        'http://localhost:8070/api/well.md_at_depth',
+        json={
+            "method": "well.md_at_depth",
+            "params": {
+                "uuid": uuids[0],
+                "Z": z
+            }
+        }
+    )
+
+    data = resp.json()['data']
+
+    assert data['MD'][0] == pytest.approx([well.md[10]])
+    assert data['MD'][1] == pytest.approx([(well.md[20] + well.md[21]) / 2.])
+    assert data['MD'][2] == []
+
+    resp = session.post(
+        'http://localhost:8070/api/well.md_at_depth',
+        json={
+            "method": "well.md_at_depth",
+            "params": {
+                "uuid": uuids[0],
+                "Z": well.z[10]
+            }
+        }
+    )
+
+    assert resp.json()['data']['MD'] == pytest.approx([well.md[10]])
+
+
+def test_well_md_at_depth_turning_back():
+    # Скважина опускается до Z = 100 и поднимается обратно до Z = 50.
+    resp = session.post(
+        'http://localhost:8070/api/well.create',
+        json={
+            "method": "well.create",
+            "params": {
+                "name": generate_random_well(2).name,
+                "head": [0., 0.],
+                "MD": [0., 100., 150.],
+                "X": [0., 0., 0.],
+                "Y": [0., 0., 0.],
+                "Z": [0., 100., 50.]
+            }
+        }
+    )
+    uuid: str = resp.json()['data']['uuid']
+
+    resp = session.post(
+        'http://localhost:8070/api/well.md_at_depth',
+        json={
+            "method": "well.md_at_depth",
+            "params": {
+                "uuid": uuid,
+                "Z": [75., 100., 25.]
+            }
+        }
+    )
+    session.post(
+        'http://localhost:8070/api/well.remove',
+        json={"method": "well.remove", "params": {"uuid": uuid}}
+    )
+
+    assert resp.json()['data']['MD'] == [[75., 125.], [100.], [25.]]
+
+
+def test_well_md_at_depth_not_existing_id():
+    resp = session.post(
+        'http://localhost:8070/api/well.md_at_depth',
+        json={
+            "method": "well.md_at_depth",
+            "params": {
+                "uuid": str(uuid4()),
+                "Z": [10.]
+            }
+        }
+    )
+
+    try:
+        error_message: str = resp.json()['error']['message']
+    except KeyError:
+        assert False
+    else:
+        assert error_message == 'Well not found!'
+
+
+def test_well_nearest():
+    nodes: list[int] = [0, 50, len(well.md) - 1]
+    points: list[list[float]] = [
+        [well.x[i], well.y[i], well.z[i]] for i in nodes
+    ]
+    # Середина отрезка между узлами 10 и 11.
+    points.append([(well.x[10] + well.x[11]) / 2.,
+                   (well.y[10] + well.y[11]) / 2.,
+                   (well.z[10] + well.z[11]) / 2.])
+
+    resp = session.post(
+        'http://localhost:8070/api/well.nearest',
+        json={
+            "method": "well.nearest",
+            "params": {
+                "uuid": uuids[0],
+                "points": points
+            }
+        }
+    )
+
+    data = resp.json()['data']
+
+    assert data['MD'] == pytest.approx(
+        [well.md[i] for i in nodes] + [(well.md[10] + well.md[11]) / 2.]
+    )
+    assert data['distance'] == pytest.approx([0.] * len(points), abs=1e-9)
+    assert [list(point) for point in zip(data['X'], data['Y'], data['Z'])] \
+        == [pytest.approx(point) for point in points]
+
+
+def test_well_nearest_not_existing_id():
+    resp = session.post(
+        'http://localhost:8070/api/well.nearest',
+        json={
+            "method": "well.nearest",
+            "params": {
+                "uuid": str(uuid4()),
+                "points": [[0., 0., 0.]]
+            }
+        }
+    )
+
+    try:
+        error_message: str = resp.json()['error']['message']
+    except KeyError:
+        assert False
+    else:
+        assert error_message == 'Well not found!'
+
+
+def test_well_separation():
+    # Две вертикальные скважины в 10 м друг от друга по горизонтали:
+    # первая от 0 до 100 м по Z, вторая - от 200 до 300 м.
+    created: list[str] = []
+
+    for head, z in (((1000., 1000.), [0., 50., 100.]),
+                    ((1010., 1000.), [200., 250., 300.])):
+        resp = session.post(
+            'http://localhost:8070/api/well.create',
+            json={
+                "method": "well.create",
+                "params": {
+                    "name": uuid4().hex,
+                    "head": head,
+                    "MD": [0., 50., 100.],
+                    "X": [head[0]] * 3,
+                    "Y": [head[1]] * 3,
+                    "Z": z
+                }
+            }
+        )
+        created.append(resp.json()['data']['uuid'])
+
+    for params, expected in (
+            ({'offsets': created[1:]}, [created[1]]),
+            ({'radius': 101.}, [created[1]]),
+            ({'radius': 100.}, [])):
+        resp = session.post(
+            'http://localhost:8070/api/well.separation',
+            json={
+                "method": "well.separation",
+                "params": {"uuid": created[0], **params}
+            }
+        )
+
+        wells = resp.json()['data']['wells']
+
+        assert [item['uuid'] for item in wells] == expected
+
+        if wells:
+            assert wells[0]['distance'] == pytest.approx(np.hypot(10., 100.))
+            assert wells[0]['MD'] == pytest.approx(100.)
+            assert wells[0]['offset_MD'] == pytest.approx(0.)
+
+    for uuid in created:
+        session.post(
+            'http://localhost:8070/api/well.remove',
+            json={"method": "well.remove", "params": {"uuid": uuid}}
+        )
+
+
+def test_well_separation_not_existing_id():
+    resp = session.post(
+        'http://localhost:8070/api/well.separation',
+        json={
+            "method": "well.separation",
+            "params": {"uuid": uuids[0], "offsets": [str(uuid4())]}
+        }
+    )
+
+    try:
+        error_message: str = resp.json()['error']['message']
+    except KeyError:
+        assert False
+    else:
+        assert error_message == 'Well not found!'
+
+
+@pytest.mark.parametrize(
+    ('params'),
+    [
+        ({'point': well.head, 'radius': 1e-6}),
+        ({'box': (well.head[0] - 1e-6, well.head[1] - 1e-6,
+                  well.head[0] + 1e-6, well.head[1] + 1e-6)}),
+        ({'by': 'trajectory', 'point': (min(well.x), min(well.y)),
+          'radius': 1e-6, 'depth': (well.z[-1], well.z[-1] + 1.)}),
+        ({'by': 'trajectory', 'box': (max(well.x), max(well.y),
+                                      max(well.x) + 1., max(well.y) + 1.)})
+    ]
+)
+def test_well_search(params):
+    resp = session.post(
+        'http://localhost:8070/api/well.search',
+        json={
+            'method': 'well.search',
+            'params': params
+        }
+    )
+
+    found = [item['uuid'] for item in resp.json()['data']['wells']]
+
+    assert uuids[0] in found
+
+
+@pytest.mark.parametrize(
+    ('params'),
+    [
+        ({'point': well.head, 'radius': 1e-6,
+          'depth': (well.z[-1] + 1., well.z[-1] + 2.)}),
+        ({'by': 'trajectory', 'box': (max(well.x) + 1., max(well.y) + 1.,
+                                      max(well.x) + 2., max(well.y) + 2.)})
+    ]
+)
+def test_well_search_outside(params):
+    resp = session.post(
+        'http://localhost:8070/api/well.search',
+        json={
+            'method': 'well.search',
+            'params': params
+        }
+    )
+
+    found = [item['uuid'] for item in resp.json()['data']['wells']]
+
+    assert uuids[0] not in found
+
+
+def test_well_search_invalid_params():
+    resp = session.post(
+        'http://localhost:8070/api/well.search',
+        json={
+            'method': 'well.search',
+            'params': {'point': well.head}
+        }
+    )
+
+    assert resp.json()['error'] is not None
+
+
+def test_rpc_batch():
+    resp = session.post(
+        'http://localhost:8070/api',
+        json=[
+            {
+                'jsonrpc': '2.0',
+                'method': 'well.get',
+                'params': {'uuid': uuids[0]},
+                'id': 1
+            },
+            {
+                'jsonrpc': '2.0',
+                'method': 'well.at',
+                'params': {'uuid': uuids[0], 'MD': well.md[0]},
+                'id': 2
+            },
+            {
+                'jsonrpc': '2.0',
+                'method': 'well.at',
+                'params': {'uuid': str(uuid4()), 'MD': 10.},
+                'id': 3
+            },
+            {
+                'jsonrpc': '2.0',
+                'method': 'well.at',
+                'params': {'uuid': uuids[0]},
+                'id': 4
+            },
+            {
+                'jsonrpc': '2.0',
+                'method': 'well.unknown',
+                'id': 5
+            },
+            {
+                'jsonrpc': '2.0',
+                'method': 'well.get',
+                'params': {'uuid': uuids[0]}
+            },
+            {
+                'method': 'well.get',
+                'id': 6
+            }
+        ]
+    )
+
+    results = resp.json()
+
+    assert [result['id'] for result in results] == [1, 2, 3, 4, 5, None]
+    assert results[0]['result'] == {'name': well.name, 'head': list(well.head)}
+    assert results[1]['result'] == {
+        'X': well.x[0], 'Y': well.y[0], 'Z': well.z[0]
+    }
+    assert results[2]['error']['message'] == 'Well not found!'
+    assert results[3]['error']['code'] == -32602
+    assert results[4]['error']['code'] == -32601
+    assert results[5]['error']['code'] == -32600
+
+
+def test_rpc_single():
+    resp = session.post(
+        'http://localhost:8070/api',
+        json={
+            'jsonrpc': '2.0',
+            'method': 'well.at_many',
+            'params': {'uuid': uuids[0], 'MD': well.md[:10]},
+            'id': 'at_many'
+        }
+    )
+
+    result = resp.json()
+
+    assert result['id'] == 'at_many'
+    assert result['result']['X'] == well.x[:10]
+
+
+def test_rpc_resample_too_many_points():
+    resp = session.post(
+        'http://localhost:8070/api',
+        json={
+            'jsonrpc': '2.0',
+            'method': 'well.resample',
+            'params': {'uuid': uuids[0], 'count': 100_001},
+            'id': 'resample'
+        }
+    )
+
+    result = resp.json()
+
+    assert result['error']['code'] == -32000
+    assert result['error']['message'] == 'Too many points requested!'
+
+
+def test_rpc_parse_error():
+    resp = session.post(
+        'http://localhost:8070/api',
+        data='[{"jsonrpc": "2.0"',
+        headers={'Content-Type': 'application/json'}
+    )
+
+    assert resp.json()['error']['code'] == -32700
+
+
 def test_well_remove():
     for uuid in uuids:
         resp = session.post(
@@ -231,3 +1123,43 @@ def test_well_remove():
         )
 
         assert resp.json()['error'] is None
+
+
+def test_well_at_removed():
+    for uuid in uuids:
+        resp = session.post(
+            'http://localhost:8070/api/well.at',
+            json={
+                "method": "well.at",
+                "params": {
+                    "uuid": uuid,
+                    "MD": 10.1546
+                }
+            }
+        )
+
+        assert resp.json()['error']['message'] == 'Well not found!'
+
+
+def test_stats():
+    resp = session.get('http://localhost:8070/api/stats')
+
+    cache_stats = resp.json()['data']['trajectory_cache']
+
+    for item in ['hits', 'misses', 'size_bytes', 'max_bytes']:
+        assert item in cache_stats
+
+    pool_stats = resp.json()['data']['db_pool']
+
+    for item in ['size', 'idle', 'acquires', 'wait_ms_total', 'wait_ms_max']:
+        assert item in pool_stats
+
+    shared_cache_stats = resp.json()['data']['shared_trajectory_cache']
+
+    for item in ['entries', 'size_bytes', 'max_bytes', 'hits', 'misses']:
+        assert item in shared_cache_stats
+
+    coalescing_stats = resp.json()['data']['coalescing']
+
+    for item in ['in_flight', 'coalesced']:
+        assert item in coalescing_stats
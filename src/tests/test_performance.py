@@ -1,18 +1,33 @@
 import random
 from uuid import UUID
 
+import numpy as np
+import pytest
 import requests
 
 from utils.well_generator import Well, generate_random_well
 
 
-def test_api_well_at(benchmark):
-    wells: list[Well] = [generate_random_well(100_000) for _ in range(10)]
-    uuids: list[UUID] = []
+session: requests.Session = requests.session()
 
-    session: requests.Session = requests.session()
 
-    for well in wells:
+def remove_well(uuid: UUID) -> None:
+    session.post(
+        'http://localhost:8070/api/well.remove',
+        json={
+            "method": "well.remove",
+            "params": {
+                "uuid": uuid
+            }
+        }
+    )
+
+
+@pytest.fixture(scope='module')
+def wells() -> list[tuple[UUID, Well]]:
+    created: list[tuple[UUID, Well]] = []
+
+    for well in [generate_random_well(100_000) for _ in range(10)]:
         resp = session.post(
             'http://localhost:8070/api/well.create',
             json={
@@ -27,10 +42,17 @@ def test_api_well_at(benchmark):
                 }
             }
         )
-        uuids.append(resp.json()['data']['uuid'])
+        created.append((resp.json()['data']['uuid'], well))
+
+    yield created
 
+    for uuid, _ in created:
+        remove_well(uuid)
+
+
+def test_api_well_at(benchmark, wells):
     def call():
-        for uuid in uuids:
+        for uuid, well in wells:
             min_md = min(well.md)
             max_md = max(well.md)
 
@@ -47,13 +69,271 @@ def test_api_well_at(benchmark):
 
     benchmark(call,)
 
-    for uuid in uuids:
-        requests.post(
-            'http://localhost:8070/api/well.remove',
+
+def test_api_rpc_batch_at(benchmark, wells):
+    def call():
+        batch = []
+
+        for i, (uuid, well) in enumerate(wells):
+            min_md = min(well.md)
+            max_md = max(well.md)
+
+            batch.append({
+                "jsonrpc": "2.0",
+                "method": "well.at",
+                "params": {
+                    "uuid": uuid,
+                    "MD": float(random.randint(int(min_md), int(max_md)))
+                },
+                "id": i
+            })
+
+        session.post('http://localhost:8070/api', json=batch)
+
+    benchmark(call,)
+
+
+def test_api_well_at_many(benchmark, wells):
+    def call():
+        for uuid, well in wells:
+            min_md = min(well.md)
+            max_md = max(well.md)
+
+            session.post(
+                'http://localhost:8070/api/well.at_many',
+                json={
+                    "method": "well.at_many",
+                    "params": {
+                        "uuid": uuid,
+                        "MD": [random.uniform(min_md, max_md)
+                               for _ in range(1000)]
+                    }
+                }
+            )
+
+    benchmark(call,)
+
+
+def test_api_well_md_at_depth(benchmark, wells):
+    def call():
+        for uuid, well in wells:
+            min_z = min(well.z)
+            max_z = max(well.z)
+
+            session.post(
+                'http://localhost:8070/api/well.md_at_depth',
+                json={
+                    "method": "well.md_at_depth",
+                    "params": {
+                        "uuid": uuid,
+                        "Z": [random.uniform(min_z, max_z)
+                              for _ in range(1000)]
+                    }
+                }
+            )
+
+    benchmark(call,)
+
+
+def test_api_well_nearest(benchmark, wells):
+    def call():
+        for uuid, well in wells:
+            bounds = [(min(values), max(values))
+                      for values in (well.x, well.y, well.z)]
+
+            session.post(
+                'http://localhost:8070/api/well.nearest',
+                json={
+                    "method": "well.nearest",
+                    "params": {
+                        "uuid": uuid,
+                        "points": [
+                            [random.uniform(*bound) for bound in bounds]
+                            for _ in range(1000)
+                        ]
+                    }
+                }
+            )
+
+    benchmark(call,)
+
+
+def test_api_well_separation(benchmark, wells):
+    def call():
+        for uuid, _ in wells:
+            session.post(
+                'http://localhost:8070/api/well.separation',
+                json={
+                    "method": "well.separation",
+                    "params": {
+                        "uuid": uuid,
+                        "offsets": [offset for offset, _ in wells
+                                    if offset != uuid]
+                    }
+                }
+            )
+
+    benchmark(call,)
+
+
+def test_api_well_get_trajectory(benchmark, wells: list[tuple[UUID, Well]]):
+    def call():
+        for uuid, _ in wells:
+            session.post(
+                'http://localhost:8070/api/well.get',
+                json={
+                    "method": "well.get",
+                    "params": {
+                        "uuid": uuid,
+                        "return_trajectory": True
+                    }
+                }
+            )
+
+    benchmark(call,)
+
+
+def test_api_well_get_simplified(benchmark, wells: list[tuple[UUID, Well]]):
+    def call():
+        for uuid, _ in wells:
+            session.post(
+                'http://localhost:8070/api/well.get',
+                json={
+                    "method": "well.get",
+                    "params": {
+                        "uuid": uuid,
+                        "return_trajectory": True,
+                        "max_points": 2000
+                    }
+                }
+            )
+
+    benchmark(call,)
+
+
+def test_api_well_get_window(benchmark, wells: list[tuple[UUID, Well]]):
+    def call():
+        for uuid, well in wells:
+            session.post(
+                'http://localhost:8070/api/well.get',
+                json={
+                    "method": "well.get",
+                    "params": {
+                        "uuid": uuid,
+                        "return_trajectory": True,
+                        "md_from": well.md[len(well.md) // 2],
+                        "md_to": well.md[len(well.md) // 2 + 10_000]
+                    }
+                }
+            )
+
+    benchmark(call,)
+
+
+def test_api_well_resample(benchmark, wells: list[tuple[UUID, Well]]):
+    def call():
+        for uuid, _ in wells:
+            session.post(
+                'http://localhost:8070/api/well.resample',
+                json={
+                    "method": "well.resample",
+                    "params": {
+                        "uuid": uuid,
+                        "step": 1.0
+                    }
+                }
+            )
+
+    benchmark(call,)
+
+
+def test_api_well_create(benchmark):
+    well: Well = generate_random_well(100_000)
+
+    def call():
+        resp = session.post(
+            'http://localhost:8070/api/well.create',
+            json={
+                "method": "well.create",
+                "params": {
+                    "name": well.name,
+                    "head": well.head,
+                    "MD": well.md,
+                    "X": well.x,
+                    "Y": well.y,
+                    "Z": well.z
+                }
+            }
+        )
+        remove_well(resp.json()['data']['uuid'])
+
+    benchmark(call,)
+
+
+def test_api_well_create_binary(benchmark):
+    well: Well = generate_random_well(100_000)
+    files: dict[str, bytes] = {
+        'MD': np.asarray(well.md, dtype='<f8').tobytes(),
+        'X': np.asarray(well.x, dtype='<f8').tobytes(),
+        'Y': np.asarray(well.y, dtype='<f8').tobytes(),
+        'Z': np.asarray(well.z, dtype='<f8').tobytes()
+    }
+    metadata: str = (
+        '{"method": "well.create_binary", '
+        f'"params": {{"name": "{well.name}", "head": {list(well.head)}}}}}'
+    )
+
+    def call():
+        resp = session.post(
+            'http://localhost:8070/api/well.create_binary',
+            data={'well': metadata},
+            files=files
+        )
+        remove_well(resp.json()['data']['uuid'])
+
+    benchmark(call,)
+
+
+def test_api_well_append(benchmark):
+    well: Well = generate_random_well(100_000)
+    resp = session.post(
+        'http://localhost:8070/api/well.create',
+        json={
+            "method": "well.create",
+            "params": {
+                "name": well.name,
+                "head": well.head,
+                "MD": well.md,
+                "X": well.x,
+                "Y": well.y,
+                "Z": well.z
+            }
+        }
+    )
+    uuid: UUID = resp.json()['data']['uuid']
+    # Последний узел траектории, которую продолжает каждый вызов.
+    last: list[float] = [well.md[-1], well.x[-1], well.y[-1], well.z[-1]]
+
+    def call():
+        # Пачка замеров из 100 узлов, продолжающих скважину вниз.
+        step: np.ndarray = np.arange(1., 101.)
+        md: list[float] = (last[0] + step).tolist()
+        z: list[float] = (last[3] + step).tolist()
+        last[0], last[3] = md[-1], z[-1]
+
+        session.post(
+            'http://localhost:8070/api/well.append',
             json={
-                "method": "well.remove",
+                "method": "well.append",
                 "params": {
-                    "uuid": uuid
+                    "uuid": uuid,
+                    "MD": md,
+                    "X": [last[1]] * len(md),
+                    "Y": [last[2]] * len(md),
+                    "Z": z
                 }
             }
         )
+
+    benchmark(call,)
+    remove_well(uuid)
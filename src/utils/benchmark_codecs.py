@@ -0,0 +1,142 @@
+"""
+Сравнивает кодеки упакованного формата траекторий (TRAJECTORY_CODEC)
+по размеру данных в БД, времени кодирования и декодирования и времени
+чтения траектории из БД.
+
+Запуск из каталога src:
+
+    python -m utils.benchmark_codecs --wells 20 --nodes 100000
+
+Фрагменты траекторий каждого кодека записываются во временную
+таблицу того же вида, что и таблицы скважин, после чего каждая
+траектория читается из неё целиком (вместе с декодированием).
+Размер таблицы учитывает сжатие TOAST, которое PostgreSQL применяет
+к большим значениям BYTEA. Время указано в миллисекундах, а размер -
+в килобайтах на одну скважину.
+
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Any
+
+import asyncpg as apg
+import numpy as np
+
+from config import TRAJECTORY_CHUNK_SIZE
+from database import (
+    PACKED_TRAJECTORY_CODECS,
+    db_instance,
+    decode_bytea,
+    encode_bytea
+)
+from services.trajectory import Trajectory
+from utils.well_generator import Well, generate_random_well
+
+
+async def benchmark(conn: apg.Connection, codec: str,
+                    chunks: list[list[np.ndarray]]) -> dict[str, float]:
+    start: float = time.perf_counter()
+    encoded: list[list[bytes]] = [
+        [encode_bytea(chunk, codec) for chunk in well] for well in chunks
+    ]
+    result: dict[str, float] = {
+        'encode': (time.perf_counter() - start) / len(chunks) * 1e3
+    }
+
+    start = time.perf_counter()
+
+    for well in encoded:
+        for chunk in well:
+            decode_bytea(chunk)
+
+    result['decode'] = (time.perf_counter() - start) / len(chunks) * 1e3
+    result['encoded'] = sum(
+        len(chunk) for well in encoded for chunk in well
+    ) / len(chunks) / 1024.
+
+    table: str = f'codec_benchmark_{codec}'
+    await conn.execute(
+        f'''CREATE TEMP TABLE {table} (
+            well INT,
+            chunk_no INT,
+            chunk BYTEA,
+            PRIMARY KEY (well, chunk_no)
+        )'''
+    )
+    await conn.copy_records_to_table(table, records=[
+        (well_no, chunk_no, chunk)
+        for well_no, well in enumerate(encoded)
+        for chunk_no, chunk in enumerate(well)
+    ])
+
+    result['stored'] = await conn.fetchval(
+        f'SELECT pg_total_relation_size(\'{table}\')'
+    ) / len(chunks) / 1024.
+
+    start = time.perf_counter()
+
+    for well_no in range(len(chunks)):
+        rows: list[apg.Record] = await conn.fetch(
+            f'SELECT chunk FROM {table} WHERE well = $1 ORDER BY chunk_no',
+            well_no
+        )
+        Trajectory.from_chunks([row['chunk'] for row in rows])
+
+    result['read'] = (time.perf_counter() - start) / len(chunks) * 1e3
+
+    await conn.execute(f'DROP TABLE {table}')
+
+    return result
+
+
+async def main() -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser()
+    parser.add_argument('--codecs', nargs='+',
+                        default=list(PACKED_TRAJECTORY_CODECS))
+    parser.add_argument('--wells', type=int, default=20)
+    parser.add_argument('--nodes', type=int, default=100_000)
+    args: argparse.Namespace = parser.parse_args()
+
+    wells: list[Well] = [
+        generate_random_well(args.nodes) for _ in range(args.wells)
+    ]
+    chunks: list[list[np.ndarray]] = [
+        [
+            chunk.packed() for chunk in Trajectory.from_arrays(
+                well.md, well.x, well.y, well.z
+            ).with_significance().split(TRAJECTORY_CHUNK_SIZE)
+        ]
+        for well in wells
+    ]
+    columns: dict[str, str] = {
+        'encoded': 'encoded KB',
+        'stored': 'stored KB',
+        'encode': 'encode ms',
+        'decode': 'decode ms',
+        'read': 'read ms'
+    }
+
+    print(f'{"codec":<8}', end='')
+
+    for title in columns.values():
+        print(f'{title:>14}', end='')
+
+    print()
+
+    async with db_instance.transaction() as conn:
+        for codec in args.codecs:
+            result: dict[str, Any] = await benchmark(conn, codec, chunks)
+            print(f'{codec:<8}', end='')
+
+            for key in columns:
+                print(f'{result[key]:>14.1f}', end='')
+
+            print(flush=True)
+
+    await db_instance.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
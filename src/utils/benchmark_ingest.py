@@ -0,0 +1,100 @@
+"""
+Сравнивает время разбора тела запроса well.create прежним способом
+(json из стандартной библиотеки и проверка WellCreateSchema
+средствами pydantic, как это делает FastAPI) и быстрым (orjson и
+WellCreateSchema.validate_request) в зависимости от количества узлов
+траектории.
+
+Запуск из каталога src:
+
+    python -m utils.benchmark_ingest --nodes 1000 100000 1000000
+
+Для каждого количества узлов измеряется разбор тела запроса
+(validate) и последующая проверка данных и сборка траектории вместе
+со значимостью узлов (trajectory, см. services.well._make_trajectory).
+Запись в БД не измеряется. Выводится среднее время в миллисекундах.
+
+"""
+
+import argparse
+import json
+import time
+from typing import Any, Callable
+
+import orjson
+
+from schemas.well import WellCreateSchema
+from services.well import _make_trajectory
+from utils.well_generator import Well, generate_random_well
+
+
+def parse_default(body: bytes) -> WellCreateSchema:
+    return WellCreateSchema.model_validate(json.loads(body))
+
+
+def parse_fast(body: bytes) -> WellCreateSchema:
+    return WellCreateSchema.validate_request(orjson.loads(body))
+
+
+def measure(operation: Callable[[], Any], repeat: int) -> float:
+    start: float = time.perf_counter()
+
+    for _ in range(repeat):
+        operation()
+
+    return (time.perf_counter() - start) / repeat * 1e3
+
+
+def benchmark(body: bytes, parse: Callable[[bytes], WellCreateSchema],
+              repeat: int) -> dict[str, float]:
+    well: WellCreateSchema = parse(body)
+
+    return {
+        'validate': measure(lambda: parse(body), repeat),
+        'trajectory': measure(
+            lambda: _make_trajectory(well.params.head, well.params.MD,
+                                     well.params.X, well.params.Y,
+                                     well.params.Z),
+            repeat
+        )
+    }
+
+
+def main() -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser()
+    parser.add_argument('--nodes', type=int, nargs='+',
+                        default=[1000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args: argparse.Namespace = parser.parse_args()
+
+    print(f'{"nodes":>9}{"path":>9}{"validate ms":>14}'
+          f'{"trajectory ms":>16}{"total ms":>11}')
+
+    for nodes in args.nodes:
+        well: Well = generate_random_well(nodes)
+        body: bytes = orjson.dumps({
+            'method': 'well.create',
+            'params': {
+                'name': well.name,
+                'head': well.head,
+                'MD': well.md,
+                'X': well.x,
+                'Y': well.y,
+                'Z': well.z
+            }
+        })
+        totals: dict[str, float] = {}
+
+        for path, parse in (('default', parse_default),
+                            ('fast', parse_fast)):
+            result: dict[str, float] = benchmark(body, parse, args.repeat)
+            totals[path] = result['validate'] + result['trajectory']
+            print(f'{nodes:>9}{path:>9}{result["validate"]:>14.1f}'
+                  f'{result["trajectory"]:>16.1f}{totals[path]:>11.1f}')
+
+        print(f'{nodes:>9}{"speed-up":>9}'
+              f'{totals["default"] / totals["fast"]:>41.1f}x', flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Сравнивает хранилища скважин по времени операций create, get, at и
+remove в зависимости от количества скважин в БД.
+
+Запуск из каталога src (БД должна быть инициализирована init.sql):
+
+    python -m utils.benchmark_storages --wells 1000 10000 100000
+
+Для каждого хранилища и каждого количества скважин создаётся
+указанное количество скважин, затем на случайной выборке измеряются
+чтения (мимо кэша траекторий), после чего все скважины удаляются.
+Время удаления не включает последующую очистку данных (reap_wells).
+Выводится среднее время одной операции в миллисекундах.
+
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable
+from uuid import UUID
+
+from database import db_instance
+from services.reaper import reap_removed_wells
+from services.storage import STORAGES
+from services.storage.base import WellStorage
+from services.trajectory import Trajectory
+from utils.well_generator import Well, generate_random_well
+
+
+async def measure(operation: Callable[..., Awaitable], args: list) -> float:
+    start: float = time.perf_counter()
+
+    for arg in args:
+        await operation(*arg)
+
+    return (time.perf_counter() - start) / len(args) * 1e3
+
+
+async def benchmark(storage: WellStorage, wells_count: int, nodes: int,
+                    samples: int) -> dict[str, float]:
+    wells: list[Well] = [
+        generate_random_well(nodes) for _ in range(wells_count)
+    ]
+    uuids: list[UUID] = []
+
+    async def create(well: Well) -> None:
+        uuids.append(await storage.create(
+            well.name,
+            well.head,
+            Trajectory.from_arrays(well.md, well.x, well.y, well.z)
+        ))
+
+    result: dict[str, float] = {
+        'create': await measure(create, [(well,) for well in wells])
+    }
+
+    sample: list[UUID] = random.sample(uuids, min(samples, len(uuids)))
+    md: float = wells[0].md[-1] / 2.
+
+    result['get'] = await measure(
+        storage.get_header, [(uuid,) for uuid in sample]
+    )
+    result['get trajectory'] = await measure(
+        storage.get_well, [(uuid,) for uuid in sample]
+    )
+    result['at'] = await measure(
+        storage.get_chunk, [(uuid, md) for uuid in sample]
+    )
+    result['remove'] = await measure(
+        storage.remove, [(uuid,) for uuid in uuids]
+    )
+
+    while await reap_removed_wells():
+        pass
+
+    return result
+
+
+async def main() -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser()
+    parser.add_argument('--storages', nargs='+', default=list(STORAGES))
+    parser.add_argument('--wells', nargs='+', type=int,
+                        default=[1_000, 10_000, 100_000])
+    parser.add_argument('--nodes', type=int, default=100)
+    parser.add_argument('--samples', type=int, default=500)
+    args: argparse.Namespace = parser.parse_args()
+
+    print(f'{"storage":<12}{"wells":>8}', end='')
+    operations: list[str] = ['create', 'get', 'get trajectory', 'at',
+                             'remove']
+
+    for operation in operations:
+        print(f'{operation:>16}', end='')
+
+    print()
+
+    for wells_count in args.wells:
+        for name in args.storages:
+            result: dict[str, float] = await benchmark(
+                STORAGES[name](), wells_count, args.nodes, args.samples
+            )
+            print(f'{name:<12}{wells_count:>8}', end='')
+
+            for operation in operations:
+                print(f'{result[operation]:>16.3f}', end='')
+
+            print(flush=True)
+
+    await db_instance.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
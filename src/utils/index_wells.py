@@ -0,0 +1,68 @@
+"""
+Заполняет габариты траекторий (bbox, z_min, z_max) в well_registry для
+скважин, созданных до их появления. Без габаритов скважины не находятся
+методом well.search по траектории.
+
+Запуск из каталога src:
+
+    python -m utils.index_wells
+
+Каждая скважина обновляется отдельным запросом, поэтому индексацию
+можно прерывать и запускать повторно.
+
+"""
+
+import asyncio
+
+import asyncpg as apg
+
+import services.exceptions as exc
+from database import db_instance
+from services.storage import STORAGES
+from services.storage.base import WellStorage
+from services.trajectory import Well
+
+
+async def index() -> int:
+    wells: list[apg.Record] = await db_instance.fetch(
+        '''SELECT pk_id, storage FROM well_registry
+        WHERE bbox IS NULL AND removed_at IS NULL'''
+    )
+    storages: dict[str, WellStorage] = {
+        name: storage() for name, storage in STORAGES.items()
+    }
+    indexed: int = 0
+
+    for well in wells:
+        try:
+            found: Well = await storages[well['storage']].get_well(
+                well['pk_id']
+            )
+        except exc.WellNotFoundException:
+            continue
+
+        bounds: list[float] = found.trajectory.bounds()
+
+        await db_instance.execute(
+            '''UPDATE well_registry
+            SET bbox = box(point($2, $3), point($5, $6)),
+                z_min = $4,
+                z_max = $7
+            WHERE pk_id = $1''',
+            well['pk_id'],
+            *bounds
+        )
+        indexed += 1
+
+    return indexed
+
+
+async def main() -> None:
+    indexed: int = await index()
+    await db_instance.close()
+
+    print(f'Indexed wells: {indexed}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
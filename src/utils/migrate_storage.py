@@ -0,0 +1,54 @@
+"""
+Переносит скважины из хранилища tables (таблица well_{uuid} на каждую
+скважину) в хранилище partitioned (единая таблица well).
+
+Запуск из каталога src:
+
+    python -m utils.migrate_storage
+
+Скважины в формате массивов сначала переводятся на упакованный
+формат (см. utils.migrate_to_packed). Каждая скважина переносится
+одним вызовом move_well_to_partitioned с сохранением идентификатора,
+поэтому миграцию можно прерывать и запускать повторно. После неё
+сервис нужно перезапустить с WELL_STORAGE=partitioned.
+
+"""
+
+import asyncio
+from uuid import UUID
+
+import asyncpg as apg
+
+from database import db_instance
+from utils.migrate_to_packed import migrate as migrate_to_packed
+
+
+async def migrate() -> int:
+    await migrate_to_packed()
+
+    tables: list[apg.Record] = await db_instance.fetch(
+        '''SELECT table_name FROM information_schema.columns
+        WHERE table_name ~ '^well_[0-9a-f]{32}$'
+            AND column_name = 'chunk_no' '''
+    )
+    moved: int = 0
+
+    for table in tables:
+        is_moved: bool = await db_instance.fetch_val(
+            'SELECT move_well_to_partitioned($1)',
+            UUID(table['table_name'].removeprefix('well_'))
+        )
+        moved += is_moved
+
+    return moved
+
+
+async def main() -> None:
+    moved: int = await migrate()
+    await db_instance.close()
+
+    print(f'Moved wells: {moved}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
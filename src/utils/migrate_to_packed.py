@@ -0,0 +1,68 @@
+"""
+Переводит все скважины, траектории которых хранятся в виде массивов
+DOUBLE PRECISION[], на упакованный формат BYTEA.
+
+Запуск из каталога src:
+
+    python -m utils.migrate_to_packed
+
+Скважины переводятся по одной функцией pack_well, которая заменяет
+таблицу скважины в одной транзакции: чтения скважины на время замены
+ждут её завершения, а не получают ошибку. Поэтому миграцию можно
+выполнять на работающем сервисе и прерывать в любой момент.
+
+"""
+
+import asyncio
+from uuid import UUID
+
+import asyncpg as apg
+
+from config import TRAJECTORY_CHUNK_SIZE
+from database import db_instance
+from services.trajectory import Trajectory
+
+
+async def migrate() -> int:
+    tables: list[apg.Record] = await db_instance.fetch(
+        '''SELECT table_name FROM information_schema.columns
+        WHERE table_name LIKE 'well\\_%' AND column_name = 'md' '''
+    )
+    migrated: int = 0
+
+    for table in tables:
+        table_name: str = table['table_name']
+        query: apg.Record | None = await db_instance.fetch_row(
+            f'SELECT md, x, y, z FROM {table_name}'
+        )
+
+        if not query:
+            continue
+
+        trajectory: Trajectory = Trajectory.from_arrays(
+            query['md'], query['x'], query['y'], query['z']
+        ).with_significance()
+
+        is_packed: bool = await db_instance.fetch_val(
+            '''SELECT pack_well(
+                $1,
+                $2::DOUBLE PRECISION[],
+                $3::DOUBLE PRECISION[],
+                $4::BYTEA[])''',
+            UUID(table_name.removeprefix('well_')),
+            *trajectory.packed_chunks(TRAJECTORY_CHUNK_SIZE)
+        )
+        migrated += is_packed
+
+    return migrated
+
+
+async def main() -> None:
+    migrated: int = await migrate()
+    await db_instance.close()
+
+    print(f'Migrated wells: {migrated}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())